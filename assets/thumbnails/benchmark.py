@@ -0,0 +1,545 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the thumbnail/banner pipeline.
+
+Times the compositing hot paths on synthetic backgrounds. No API key,
+network or real backgrounds are needed:
+
+  - wrap_text, layout_title (font fitting) — cold (measure cache cleared)
+    and warm
+  - composite_thumbnail (alone and with its derived variants),
+    composite_banner, draw_safe_zone_guides
+  - prepare_thumbnail — an upload-ready file and an oversized one
+  - end-to-end: thumbnail → prepare_thumbnail, banner → guides
+  - scaling: layout for thousands of synthetic episodes with long titles
+
+--decode instead compares background loading (qe_render.backdrop.load_cover) with
+the old full-resolution open → convert → resize → crop path on every
+source: speed-up, peak memory (each load in a fresh process) and the mean
+pixel difference between the two outputs.
+
+--startup times the entry points' cheap modes (--help, --plan, --dry-run)
+as fresh processes, and records which heavy packages (Pillow, requests,
+the Google client, NumPy) each one imported. Save the results as a
+baseline like any other run. --compare then flags a slower startup, and
+also flags a heavy import that a case didn't make before.
+
+Compositing cases run on backgrounds of several source sizes, in PNG and JPEG.
+Results are written as JSON, with min/median/mean/max seconds per case.
+--compare checks them against a saved baseline and exits 1 on a
+regression.
+
+Usage:
+  python benchmark.py                        # Full suite, JSON to stdout
+  python benchmark.py --output bench.json    # Save results (e.g. as a baseline)
+  python benchmark.py --compare bench.json   # Flag regressions vs a baseline
+  python benchmark.py --quick --only wrap    # Fewer repeats, matching cases only
+  python benchmark.py --episodes 5000        # Bigger scaling scenario
+  python benchmark.py --decode               # Background loading: speed-up and memory saved
+  python benchmark.py --startup --output startup.json  # Entry-point startup and import times
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import shutil
+import platform
+import tempfile
+import subprocess
+import contextlib
+import statistics
+import importlib.util
+import multiprocessing
+from io import StringIO
+from concurrent.futures import ProcessPoolExecutor
+import PIL
+from PIL import Image, ImageChops, ImageFilter, ImageStat
+from qe_render.backdrop import load_cover
+from catalog import load_catalog
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Source backgrounds: what the image model returns today (1024x1024), its
+# 16:9 option, and larger sources to show how decode/resample cost scales
+SOURCE_SIZES = [(1024, 1024), (1344, 768), (1920, 1080), (3840, 2160)]
+SOURCE_FORMATS = ["png", "jpeg"]
+REGRESSION_THRESHOLD = 0.10  # flag medians more than 10% slower than baseline
+NOISE_FLOOR = 0.0005  # ignore differences under 0.5 ms
+
+
+def load_script(filename, name):
+    """Import one of the hyphenated scripts in this directory as a module."""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BASE_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# ── Synthetic inputs ────────────────────────────────────────────────
+def synthetic_background(size, seed=0):
+    """Photo-like RGB image: smooth colour gradients plus soft noise, tuned
+    so PNG sizes land near real generated backgrounds (~1.4 bytes/pixel) —
+    flat fills would make every encode unrealistically cheap."""
+    random.seed(seed)
+    channels = []
+    for _ in range(3):
+        gradient = Image.linear_gradient("L").rotate(random.uniform(0, 360)).resize(size)
+        noise = Image.effect_noise(size, random.uniform(30, 60)).filter(ImageFilter.GaussianBlur(2))
+        channels.append(Image.blend(gradient, noise, 0.2))
+    return Image.merge("RGB", channels)
+
+
+def write_backgrounds(tmp_dir):
+    """Save every SOURCE_SIZES × SOURCE_FORMATS background; returns {label: path}."""
+    paths = {}
+    for i, size in enumerate(SOURCE_SIZES):
+        img = synthetic_background(size, seed=i)
+        for fmt in SOURCE_FORMATS:
+            ext = "jpg" if fmt == "jpeg" else fmt
+            path = os.path.join(tmp_dir, f"bg-{size[0]}x{size[1]}.{ext}")
+            img.save(path, fmt.upper(), **({"quality": 92} if fmt == "jpeg" else {}))
+            paths[f"{size[0]}x{size[1]}.{ext}"] = path
+    return paths
+
+
+WORDS = (
+    "QUESTION EVERYTHING THE OF AND A TO IN ON WITH WHY HOW WHAT TRUTH FUTURE "
+    "MEDICINE MORALITY ETHICS PROGRESS CLASSROOM REVOLUTION ATTENTION HEIST "
+    "DIGITAL DIVIDE CONSPIRACY THEORIES LONELINESS SUPREMACY PHILOSOPHY "
+    "SATOSHI NAKAMOTO TRIBES TWEETS TROUBLE KNOWING YOURSELF MATTERS JOURNEY "
+    "SPEED SHIRE ECHOES RAPID RIFFS WORDS HEALTH HARM REVELATIONS INTERNATIONALIZATION"
+).split()
+
+
+def synthetic_episodes(count, seed=0):
+    """`count` episodes with long titles (6-18 words) and occasional guests."""
+    rng = random.Random(seed)
+    episodes = []
+    for i in range(count):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 18)))
+        guest = f"Guest Number {i}" if rng.random() < 0.4 else None
+        episodes.append({"num": f"{i:04d}", "title": title, "guest": guest})
+    return episodes
+
+
+# ── Timing ──────────────────────────────────────────────────────────
+def timed(fn, repeat, setup=None):
+    """Run fn() `repeat` times after one warm-up; returns per-run seconds.
+    `setup()` runs untimed before every call (e.g. to clear caches)."""
+    if setup:
+        setup()
+    fn()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples, **extra):
+    return {
+        "n": len(samples),
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "max": max(samples),
+        **extra,
+    }
+
+
+@contextlib.contextmanager
+def quiet():
+    """Swallow the scripts' progress printing while timing."""
+    with contextlib.redirect_stdout(StringIO()):
+        yield
+
+
+# ── Suite ───────────────────────────────────────────────────────────
+def run_suite(repeat, episodes_count, only=None):
+    gen = load_script("generate-thumbnails.py", "generate_thumbnails")
+    banner = load_script("generate-banner.py", "generate_banner")
+    upload = load_script("upload-youtube-thumbnails.py", "upload_youtube_thumbnails")
+
+    # The banner defaults to macOS system fonts; fall back to the
+    # thumbnail fonts elsewhere so the suite runs on any machine
+    if not os.path.exists(banner.FONT_BOLD):
+        banner.FONT_BOLD, banner.FONT_REG = gen.FONT_BOLD, gen.FONT_REG
+
+    results = {}
+
+    heavy = max(1, repeat // 2)  # full renders take seconds each
+
+    def wanted(*names):
+        # names may be case-name prefixes, so a more specific --only matches too
+        return not only or any(o in name or name in o for o in only for name in names)
+
+    def case(name, fn, reps=repeat, setup=None, **extra):
+        if not wanted(name):
+            return
+        with quiet():
+            samples = timed(fn, reps, setup)
+        results[name] = summarize(samples, **extra)
+        r = results[name]
+        print(f"  {name:<48} median {r['median'] * 1000:9.2f} ms  (min {r['min'] * 1000:.2f}, n={r['n']})",
+              file=sys.stderr)
+
+    def cold():
+        gen.measure.cache_clear()
+
+    geo = gen.thumbnail_geometry()
+    max_width = int((1920 - geo["text_x"]) * 0.55)
+    titles = [ep["title"] for ep in gen.EPISODES]
+    long_title = max(titles, key=len)
+
+    print("Text layout", file=sys.stderr)
+    case("wrap_text/catalog/cold", lambda: [gen.wrap_text(t, gen.FONT_BOLD, 76, max_width) for t in titles],
+         setup=cold, items=len(titles))
+    case("wrap_text/catalog/warm", lambda: [gen.wrap_text(t, gen.FONT_BOLD, 76, max_width) for t in titles],
+         items=len(titles))
+    case("wrap_text/longest/warm", lambda: gen.wrap_text(long_title, gen.FONT_BOLD, 76, max_width))
+    case("layout_title/catalog/cold",
+         lambda: [gen.layout_title(ep["title"], ep["guest"], geo["text_x"], geo["available_height"])
+                  for ep in gen.EPISODES],
+         setup=cold, items=len(titles))
+    case("layout_title/catalog/warm",
+         lambda: [gen.layout_title(ep["title"], ep["guest"], geo["text_x"], geo["available_height"])
+                  for ep in gen.EPISODES],
+         items=len(titles))
+
+    print(f"Scaling ({episodes_count} synthetic episodes)", file=sys.stderr)
+    synthetic = synthetic_episodes(episodes_count)
+    case(f"scaling/layout_title/{episodes_count}/cold",
+         lambda: [gen.layout_title(ep["title"], ep["guest"], geo["text_x"], geo["available_height"])
+                  for ep in synthetic],
+         reps=max(1, repeat // 3), setup=cold, items=episodes_count)
+    case(f"scaling/plan_episode/{episodes_count}/warm",
+         lambda: [gen.plan_episode(ep) for ep in synthetic],
+         reps=max(1, repeat // 3), items=episodes_count)
+
+    if not wanted("composite_", "draw_safe_zone_guides", "prepare_thumbnail", "e2e/"):
+        return results
+
+    with tempfile.TemporaryDirectory(prefix="qe-bench-") as tmp:
+        backgrounds = write_backgrounds(tmp)
+        ep = next(e for e in gen.EPISODES if e["guest"])
+        thumb_out = os.path.join(tmp, "thumb.png")
+        banner_out = os.path.join(tmp, "banner.png")
+
+        print("Compositing", file=sys.stderr)
+        for label, bg_path in backgrounds.items():
+            case(f"composite_thumbnail/{label}",
+                 lambda: gen.composite_thumbnail(bg_path, ep["title"], ep["guest"], thumb_out), reps=heavy)
+            case(f"composite_banner/{label}", lambda: banner.composite_banner(bg_path, banner_out), reps=heavy)
+
+        # One render plus every derived size (qe_render/variants.py) from the same master
+        case("composite_thumbnail/variants/1920x1080.png",
+             lambda: gen.composite_thumbnail(backgrounds["1920x1080.png"], ep["title"], ep["guest"], thumb_out,
+                                             variants_dir=os.path.join(tmp, "variants")), reps=heavy)
+
+        # Guides and upload prep run on rendered outputs, which don't
+        # depend on the source size — time them once
+        if wanted("draw_safe_zone_guides"):
+            with quiet():
+                banner_path = banner.composite_banner(backgrounds["1920x1080.png"], banner_out)
+            case("draw_safe_zone_guides", lambda: banner.draw_safe_zone_guides(banner_path), reps=heavy)
+        if wanted("prepare_thumbnail/"):
+            with quiet():
+                thumb_path = gen.composite_thumbnail(
+                    backgrounds["1920x1080.png"], ep["title"], ep["guest"], thumb_out)
+            oversized = os.path.join(tmp, "oversized.png")
+            Image.effect_noise((1920, 1080), 80).convert("RGB").save(oversized)
+            case("prepare_thumbnail/upload-ready", lambda: upload.prepare_thumbnail(thumb_path),
+                 bytes=os.path.getsize(thumb_path))
+            case("prepare_thumbnail/oversized", lambda: upload.prepare_thumbnail(oversized),
+                 bytes=os.path.getsize(oversized))
+
+        print("End-to-end", file=sys.stderr)
+        for label, bg_path in backgrounds.items():
+            if not label.endswith(".png"):
+                continue  # the model returns PNG; per-format decode cost is covered above
+            case(f"e2e/thumbnail/{label}",
+                 lambda: upload.prepare_thumbnail(
+                     gen.composite_thumbnail(bg_path, ep["title"], ep["guest"], thumb_out)), reps=heavy)
+            case(f"e2e/banner/{label}",
+                 lambda: banner.draw_safe_zone_guides(banner.composite_banner(bg_path, banner_out)),
+                 reps=heavy)
+
+    return results
+
+
+# ── Background decode ───────────────────────────────────────────────
+DECODE_TARGETS = {"thumbnail": (1920, 1080), "banner": (2048, 1152)}
+
+
+def legacy_cover(path, size):
+    """The compositors' loading path before qe_render/backdrop.py: decode
+    and convert the full source, resize all of it, then crop."""
+    bg = Image.open(path).convert("RGB")
+    scale = max(size[0] / bg.width, size[1] / bg.height)
+    bg = bg.resize((int(bg.width * scale), int(bg.height * scale)), Image.LANCZOS)
+    left = (bg.width - size[0]) // 2
+    top = (bg.height - size[1]) // 2
+    return bg.crop((left, top, left + size[0], top + size[1]))
+
+
+LOADERS = {"legacy": legacy_cover, "cover": load_cover}
+
+
+def rss_high_water():
+    """Peak resident set size of this process, in bytes."""
+    try:
+        # Linux: VmHWM belongs to the address space, so it starts fresh after
+        # exec — ru_maxrss would carry over the parent's peak
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # bytes on macOS
+
+
+def _peak_child(loader, path, size):
+    before = rss_high_water()
+    LOADERS[loader](path, size)
+    return rss_high_water() - before
+
+
+def peak_memory(loader, path, size):
+    """Peak RSS growth (bytes) of one load, in a freshly spawned process so
+    earlier allocations can't hide it."""
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_peak_child, loader, path, size).result()
+
+
+def run_decode(repeat, only=None):
+    """Time load_cover against legacy_cover for every source and target."""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="qe-bench-") as tmp:
+        backgrounds = write_backgrounds(tmp)
+        print(f"{'case':<28} {'legacy ms':>10} {'cover ms':>9} {'speed-up':>8}"
+              f" {'legacy MB':>10} {'cover MB':>9} {'diff':>6}", file=sys.stderr)
+        for target, size in DECODE_TARGETS.items():
+            for label, path in backgrounds.items():
+                name = f"{target}/{label}"
+                if only and not any(o in f"decode/{name}" for o in only):
+                    continue
+                old = summarize(timed(lambda: legacy_cover(path, size), repeat),
+                                peak_bytes=peak_memory("legacy", path, size))
+                new = summarize(timed(lambda: load_cover(path, size), repeat),
+                                peak_bytes=peak_memory("cover", path, size))
+                diff = ImageStat.Stat(ImageChops.difference(legacy_cover(path, size), load_cover(path, size)))
+                new["speedup"] = old["median"] / new["median"]
+                new["memory_saved"] = 1 - new["peak_bytes"] / old["peak_bytes"] if old["peak_bytes"] else 0.0
+                new["mean_abs_diff"] = statistics.fmean(diff.mean)
+                results[f"decode/legacy/{name}"] = old
+                results[f"decode/cover/{name}"] = new
+                print(f"{name:<28} {old['median'] * 1000:10.1f} {new['median'] * 1000:9.1f}"
+                      f" {new['speedup']:7.1f}x {old['peak_bytes'] / 1e6:10.1f} {new['peak_bytes'] / 1e6:9.1f}"
+                      f" {new['mean_abs_diff']:6.2f}", file=sys.stderr)
+    return results
+
+
+# ── Startup ─────────────────────────────────────────────────────────
+# --dry-run reads the episode index from this URL's sandbox (see
+# qe_render/sandbox.py); nothing listens there and nothing connects
+STARTUP_BASE_URL = "http://127.0.0.1:9"
+
+# (case, script, arguments): none of these may call an API or render
+STARTUP_CASES = [
+    ("generate-thumbnails/--help", "generate-thumbnails.py", ["--help"]),
+    ("generate-thumbnails/--plan", "generate-thumbnails.py", ["--plan"]),
+    ("generate-banner/--help", "generate-banner.py", ["--help"]),
+    ("upload-youtube-thumbnails/--help", "upload-youtube-thumbnails.py", ["--help"]),
+    ("upload-youtube-thumbnails/--dry-run", "upload-youtube-thumbnails.py",
+     ["--dry-run", "--base-url", STARTUP_BASE_URL]),
+    ("generate-atlas/--help", "generate-atlas.py", ["--help"]),
+]
+
+# Packages worth 50-300 ms of startup each; a cheap mode should load none
+# (--plan needs Pillow's font support)
+HEAVY_MODULES = {"PIL", "numpy", "requests", "google", "googleapiclient", "google_auth_oauthlib", "httplib2"}
+
+
+def import_times(stderr):
+    """{top-level module: cumulative ms} from `python -X importtime` output."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if name[1:].startswith(" ") or not cumulative.strip().isdigit():
+            continue  # nested import (already in its parent's total), or the header
+        times[name.strip()] = times.get(name.strip(), 0) + int(cumulative) / 1000
+    return times
+
+
+def run_python(args, importtime=False):
+    """Run `python args...` in this directory to completion; returns
+    (seconds, stderr)."""
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + args
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=BASE_DIR, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    seconds = time.perf_counter() - start
+    if "Traceback" in proc.stderr:
+        raise RuntimeError(f"python {' '.join(args)} crashed:\n{proc.stderr}")
+    return seconds, proc.stderr
+
+
+def time_startup(args, repeat):
+    """summarize() of `repeat` runs after an untimed one that warms the page
+    cache and bytecode, plus {top-level module: ms} from an importtime run."""
+    _, stderr = run_python(args, importtime=True)
+    run_python(args)
+    return summarize([run_python(args)[0] for _ in range(repeat)]), import_times(stderr)
+
+
+def seed_dry_run_sandbox(sandbox):
+    """Episode index and upload manifest for STARTUP_BASE_URL's sandbox, as
+    after a full upload: every episode with a thumbnail is matched and
+    unchanged, so --dry-run reads no file contents and makes no API call."""
+    from video_index import save_index
+    from qe_render.encoder import find_artifact
+
+    index = {"playlist_id": "UUbench", "etag": None, "watermark": "", "videos": {}, "episodes": {}}
+    manifest = {}
+    for ep in load_catalog().episodes:
+        video_id = f"bench-{ep['num']}"
+        index["videos"][video_id] = {"title": ep["title"], "published_at": ""}
+        index["episodes"][ep["num"]] = video_id
+        path = find_artifact(os.path.join(BASE_DIR, "final", f"ep-{ep['num']}-thumbnail.png"))
+        if path:
+            st = os.stat(path)
+            manifest[video_id] = {"episode": ep["num"], "file": os.path.basename(path),
+                                  "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    save_index(index, os.path.join(sandbox, "video-index.json"))
+    with open(os.path.join(sandbox, ".upload-manifest.json"), "w") as f:
+        json.dump(manifest, f)
+
+
+def run_startup(repeat, only=None):
+    """Wall time and import breakdown of each STARTUP_CASES run."""
+    from qe_render.sandbox import sandbox_dir
+
+    sandbox = sandbox_dir(STARTUP_BASE_URL)
+    os.makedirs(sandbox, exist_ok=True)
+    results = {}
+    try:
+        seed_dry_run_sandbox(sandbox)
+        # The bare interpreter: its time is the floor, its imports aren't the scripts'
+        floor, interpreter = time_startup(["-c", "pass"], repeat)
+        results["startup/interpreter"] = floor
+        print(f"{'case':<40} {'median ms':>10} {'over python':>12} {'imports ms':>11}  heavy imports",
+              file=sys.stderr)
+        print(f"{'interpreter':<40} {floor['median'] * 1000:10.1f}", file=sys.stderr)
+        for name, script, args in STARTUP_CASES:
+            if only and not any(o in f"startup/{name}" for o in only):
+                continue
+            r, times = time_startup([script] + args, repeat)
+            times = {m: ms for m, ms in times.items() if m not in interpreter}
+            r["over_interpreter"] = r["median"] - floor["median"]
+            r["import_ms"] = round(sum(times.values()), 1)
+            r["heavy_imports"] = sorted({m.split(".")[0] for m in times} & HEAVY_MODULES)
+            r["slowest_imports"] = {m: round(ms, 1) for m, ms in
+                                    sorted(times.items(), key=lambda item: -item[1])[:5]}
+            results[f"startup/{name}"] = r
+            print(f"{name:<40} {r['median'] * 1000:10.1f} {r['over_interpreter'] * 1000:12.1f}"
+                  f" {r['import_ms']:11.1f}  {', '.join(r['heavy_imports']) or '—'}", file=sys.stderr)
+    finally:
+        shutil.rmtree(sandbox, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print a per-case comparison; returns the names of regressed cases."""
+    regressions = []
+    print(f"{'case':<48} {'baseline':>11} {'current':>11} {'change':>8}", file=sys.stderr)
+    for name, current in results.items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            print(f"{name:<48} {'—':>11} {current['median'] * 1000:9.2f}ms {'new':>8}", file=sys.stderr)
+            continue
+        change = current["median"] / before["median"] - 1 if before["median"] else 0.0
+        regressed = (change > threshold
+                     and current["median"] - before["median"] > NOISE_FLOOR)
+        flag = "  REGRESSION" if regressed else ""
+        # Startup cases: a newly eager heavy import regresses even if timing noise hides it
+        new_imports = sorted(set(current.get("heavy_imports", ())) - set(before.get("heavy_imports", ())))
+        if new_imports:
+            regressed = True
+            flag += f"  NEW IMPORT {', '.join(new_imports)}"
+        print(f"{name:<48} {before['median'] * 1000:9.2f}ms {current['median'] * 1000:9.2f}ms "
+              f"{change:+7.1%}{flag}", file=sys.stderr)
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the QE thumbnail pipeline offline")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Timed runs per case; full renders get half (default: 5)")
+    parser.add_argument("--quick", action="store_true", help="2 runs per case and 500 scaling episodes")
+    parser.add_argument("--episodes", type=int, default=3000,
+                        help="Synthetic episodes in the scaling scenario (default: 3000)")
+    parser.add_argument("--only", action="append", help="Only cases whose name contains this (repeatable)")
+    parser.add_argument("--decode", action="store_true",
+                        help="Compare background loading with the old full-resolution path instead")
+    parser.add_argument("--startup", action="store_true",
+                        help="Time --help/--plan/--dry-run of each entry point and record their imports instead")
+    parser.add_argument("--output", help="Write results JSON here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against a saved results file")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help=f"Median slowdown counted as a regression (default: {REGRESSION_THRESHOLD:.0%})")
+    args = parser.parse_args()
+
+    repeat = 2 if args.quick else max(1, args.repeat)
+    episodes = 500 if args.quick and args.episodes == 3000 else args.episodes
+
+    if args.decode:
+        results = run_decode(repeat, args.only)
+    elif args.startup:
+        results = run_startup(repeat * 4, args.only)  # a run is ~50 ms; more samples steady the median
+    else:
+        results = run_suite(repeat, episodes, args.only)
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+            "scaling_episodes": episodes,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(file=sys.stderr)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+        print("\nNo regressions.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
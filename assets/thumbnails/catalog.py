@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Episode catalog shared by generate-thumbnails.py, upload-youtube-thumbnails.py
+and prompts.md.
+
+episodes.json is the single source of truth for every episode's number,
+title, guest, tags and background prompt. ("backdrop" and "logo_accent"
+only feed the hand-prompting guide in prompts.md.) Catalog indexes it by
+number, guest and tag and resolves selection expressions:
+
+  05                  one episode ("5" works too)
+  00-teaser           the teaser
+  03-07  /  20-       an inclusive range / everything from 20 on
+  01,04,10-12         any comma-separated mix of the above
+  guest:pearce        episodes whose guest name contains "pearce"
+  tag:education       episodes tagged "education"
+  all                 everything (same as no expression)
+
+Two filters narrow a selection further:
+  --changed-since REV  catalog entries added or edited since a git revision
+  --missing-output     episodes whose final thumbnail doesn't exist yet
+
+Usage:
+  python catalog.py tag:ai               # List matching episodes
+  python catalog.py --changed-since HEAD~5
+  python catalog.py --write-prompts-md   # Regenerate prompts.md from the catalog
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CATALOG_PATH = os.path.join(BASE_DIR, "episodes.json")
+PROMPTS_MD_PATH = os.path.join(BASE_DIR, "prompts.md")
+
+RANGE = re.compile(r"^(\d*)-(\d*)$")
+
+
+class Catalog:
+    """Ordered episodes plus lookups by number, guest and tag."""
+
+    def __init__(self, episodes):
+        self.episodes = list(episodes)
+        self.by_num = {ep["num"]: ep for ep in self.episodes}
+        self.by_guest = {}
+        self.by_tag = {}
+        for ep in self.episodes:
+            if ep.get("guest"):
+                self.by_guest.setdefault(ep["guest"].casefold(), []).append(ep)
+            for tag in ep.get("tags", []):
+                self.by_tag.setdefault(tag.casefold(), []).append(ep)
+
+    def __iter__(self):
+        return iter(self.episodes)
+
+    def __len__(self):
+        return len(self.episodes)
+
+    def get(self, num):
+        """Episode by number — exact ("00-teaser", "05") or unpadded ("5")."""
+        return self.by_num.get(num) or (self.by_num.get(num.zfill(2)) if num.isdigit() else None)
+
+    @staticmethod
+    def ordinal(ep):
+        """Leading integer of an episode number ("00-teaser" → 0)."""
+        return int(re.match(r"\d+", ep["num"]).group())
+
+    def _term(self, term):
+        lowered = term.casefold()
+        if lowered == "all":
+            return self.episodes
+        if lowered.startswith("guest:"):
+            name = lowered[len("guest:"):].strip()
+            return [ep for guest, eps in self.by_guest.items() if name in guest for ep in eps]
+        if lowered.startswith("tag:"):
+            return self.by_tag.get(lowered[len("tag:"):].strip(), [])
+        ep = self.get(term)
+        if ep:
+            return [ep]
+        m = RANGE.match(term)
+        if m and (m.group(1) or m.group(2)):
+            lo = int(m.group(1)) if m.group(1) else 0
+            hi = int(m.group(2)) if m.group(2) else float("inf")
+            return [ep for ep in self.episodes if lo <= self.ordinal(ep) <= hi]
+        raise ValueError(f"Unknown episode or selection term: {term!r}")
+
+    def select(self, expression=None):
+        """Episodes matching a selection expression, in catalog order."""
+        if not expression:
+            return list(self.episodes)
+        chosen = set()
+        for term in expression.split(","):
+            if term.strip():
+                chosen.update(ep["num"] for ep in self._term(term.strip()))
+        return [ep for ep in self.episodes if ep["num"] in chosen]
+
+    def changed_since(self, revision, path=CATALOG_PATH):
+        """Numbers of episodes added or edited in the catalog since `revision`."""
+        import subprocess
+        try:
+            old = subprocess.run(
+                ["git", "show", f"{revision}:./{os.path.basename(path)}"],
+                cwd=os.path.dirname(path), capture_output=True, text=True, check=True,
+            ).stdout
+        except (OSError, subprocess.CalledProcessError) as e:
+            stderr = getattr(e, "stderr", "") or str(e)
+            if "exists on disk, but not in" in stderr or "does not exist in" in stderr:
+                return {ep["num"] for ep in self.episodes}  # catalog is newer than `revision`
+            raise ValueError(f"Can't read the catalog at {revision!r}: {stderr.strip()}")
+        before = {ep["num"]: ep for ep in json.loads(old).get("episodes", [])}
+        return {ep["num"] for ep in self.episodes if before.get(ep["num"]) != ep}
+
+
+def load_catalog(path=CATALOG_PATH):
+    with open(path, encoding="utf-8") as f:
+        return Catalog(json.load(f)["episodes"])
+
+
+# ── Command-line selection ──────────────────────────────────────────
+def add_selection_arguments(parser, missing_output=True):
+    """--changed-since (and optionally --missing-output) for any script.
+
+    The selection expression itself is the caller's argument, so each
+    script keeps its own spelling (positional vs --episode).
+    """
+    parser.add_argument("--changed-since", metavar="REV",
+                        help="Only episodes added or edited in episodes.json since a git revision")
+    if missing_output:
+        parser.add_argument("--missing-output", action="store_true",
+                            help="Only episodes whose final thumbnail doesn't exist yet")
+
+
+def select_episodes(catalog, expression, args, output_exists=None):
+    """Apply a selection expression, then the --changed-since /
+    --missing-output filters. `output_exists(ep) -> bool` backs
+    --missing-output. Raises ValueError for a bad expression or revision."""
+    episodes = catalog.select(expression)
+    if getattr(args, "changed_since", None):
+        changed = catalog.changed_since(args.changed_since)
+        episodes = [ep for ep in episodes if ep["num"] in changed]
+    if getattr(args, "missing_output", False):
+        episodes = [ep for ep in episodes if not output_exists(ep)]
+    return episodes
+
+
+# ── prompts.md ──────────────────────────────────────────────────────
+PROMPTS_MD_STYLE = "Cinematic photography style, slightly desaturated to feel editorial and premium."
+PROMPTS_MD_SECTION = """\
+## {heading}
+
+Create a podcast episode thumbnail image, 1920x1080 pixels (16:9 landscape format).
+
+Background scene: {prompt} {style}
+
+Layout and text:
+
+The left two-thirds of the image is the scenic background, slightly darkened for contrast
+
+A subtle dark gradient overlay covers the bottom third of the image
+
+In the bottom-left corner, place the attached logo (the orange microphone ?E! PODCAST logo) at about 15% of the image height
+
+To the right of the logo, display the episode title "{title}" in clean white sans-serif bold text, all caps
+{guest_line}
+Keep the right side of the image more open to let the {backdrop} breathe
+
+Style notes: The overall feel should be cinematic and contemplative — not busy. The orange in the logo should feel like {logo_accent}. Keep it clean and minimal. This should read clearly as a thumbnail even at small sizes.
+"""
+
+
+def render_prompts_md(catalog):
+    """The hand-prompting guide, one copy-paste section per episode."""
+    sections = []
+    for ep in catalog:
+        if ep["num"].endswith("teaser"):
+            heading = f'Teaser Trailer — "{ep["title"]}"'
+        else:
+            heading = f'Episode #{Catalog.ordinal(ep)} — "{ep["title"]}"'
+        if ep.get("guest"):
+            heading += f' | with {ep["guest"]}'
+        sections.append(PROMPTS_MD_SECTION.format(
+            heading=heading,
+            prompt=ep["prompt"],
+            style=PROMPTS_MD_STYLE,
+            title=ep["title"],
+            guest_line=f'\nBelow the title in smaller white text: "with {ep["guest"]}"\n' if ep.get("guest") else "",
+            backdrop=ep.get("backdrop", "scene"),
+            logo_accent=ep.get("logo_accent", "it belongs with the warmest tones in the scene"),
+        ))
+    header = (
+        f"# QE Thumbnail Prompts — All {len(catalog)} Episodes\n\n"
+        "Generated from episodes.json by `python catalog.py --write-prompts-md` — edit the "
+        "catalog, not this file. Each prompt is ready to copy-paste into Gemini or "
+        "Midjourney with the ?E! logo attached.\n"
+    )
+    return "\n---\n\n".join([header] + sections)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the QE episode catalog")
+    parser.add_argument("selection", nargs="?", help="Selection expression (e.g. '03-07,tag:ai')")
+    add_selection_arguments(parser)
+    parser.add_argument("--write-prompts-md", action="store_true", help=f"Regenerate {PROMPTS_MD_PATH}")
+    args = parser.parse_args()
+
+    catalog = load_catalog()
+    if args.write_prompts_md:
+        with open(PROMPTS_MD_PATH, "w", encoding="utf-8") as f:
+            f.write(render_prompts_md(catalog))
+        print(f"Wrote {PROMPTS_MD_PATH} ({len(catalog)} episodes)")
+        return
+
+    from qe_render.encoder import find_artifact
+    output_dir = os.path.join(BASE_DIR, "final")
+    try:
+        episodes = select_episodes(
+            catalog, args.selection, args,
+            lambda ep: find_artifact(os.path.join(output_dir, f"ep-{ep['num']}-thumbnail.png")),
+        )
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    for ep in episodes:
+        guest = f" | with {ep['guest']}" if ep.get("guest") else ""
+        print(f"{ep['num']:>9}  {ep['title']}{guest}  [{', '.join(ep.get('tags', []))}]")
+
+
+if __name__ == "__main__":
+    main()
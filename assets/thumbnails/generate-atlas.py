@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+QE Episode Grid Sprite Atlas Builder
+
+Packs downscaled episode thumbnails from final/ into a few WebP sprite
+atlases, so the website's episode grid can load every card's artwork in one
+or two requests instead of one per episode.
+
+Each episode gets a slot the first time the atlas sees it, in catalog
+order (episodes.json), and keeps it: slot s is position s % (columns × rows)
+of page s // (columns × rows). Slots are recorded in atlas.json and only
+ever appended, so a new episode only touches the last page, even one
+inserted mid-catalog, and a re-rendered thumbnail only touches its own
+page. An episode dropped from the catalog leaves its slot empty; --force
+lays every slot out afresh in catalog order.
+
+Each page's signature is a hash of its members' thumbnail contents plus
+the tile settings, and pages whose signature is unchanged are not rebuilt.
+A thumbnail is only re-hashed when its name, size or mtime differ from
+the last run. Page files carry the signature in their name
+(atlas-0.1a2b3c4d.webp), so they can be served with long cache lifetimes.
+
+Output, in final/atlas/:
+  atlas-<page>.<signature>.webp
+  atlas.json:
+    {
+      "version": 2,
+      "tile":  {"width": 480, "height": 270},
+      "pages": [{"file", "width", "height", "signature", "members": [num or null...]}],
+      "episodes": {num: {"page", "file", "x", "y", "width", "height"}},
+      "slots":   {num: slot},
+      "sources": {num: {"file", "size", "mtime_ns", "sha256"}},
+    }
+
+Episodes without a thumbnail yet leave their slot empty and are missing
+from "episodes".
+
+Usage:
+  python generate-atlas.py                   # Rebuild changed pages only
+  python generate-atlas.py --force           # Re-slot in catalog order and rebuild every page
+  python generate-atlas.py --tile 320x180 --columns 6 --rows 5
+  python generate-atlas.py --final .cache/stub/127.0.0.1-8780/final  # Another final/ folder
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from catalog import load_catalog
+from qe_render.encoder import encode_to_file, find_artifact
+
+# ── Config ──────────────────────────────────────────────────────────
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FINAL_DIR = os.path.join(BASE_DIR, "final")
+TILE = (480, 270)  # the site's cards are 480px wide; 16:9 like the thumbnails
+COLUMNS = 4
+ROWS = 4
+QUALITY = 80
+MAX_WEBP_SIDE = 16383  # WebP's hard limit per dimension
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def parse_tile(text):
+    try:
+        w, h = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}")
+    if w < 1 or h < 1:
+        raise argparse.ArgumentTypeError(f"width and height must be at least 1, got {text!r}")
+    return w, h
+
+
+def positive_int(text):
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a whole number, got {text!r}")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {text!r}")
+    return value
+
+
+def source_sha256(num, path, previous, sources):
+    """SHA-256 of an episode's thumbnail, reusing the last run's digest while
+    the file's name, size and mtime are unchanged. Records it in `sources`."""
+    st = os.stat(path)
+    source = {"file": os.path.basename(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    old = previous.get(num)
+    if old and all(old.get(k) == v for k, v in source.items()):
+        source["sha256"] = old["sha256"]  # stat fast path: never opened
+    else:
+        source["sha256"] = file_sha256(path)
+    sources[num] = source
+    return source["sha256"]
+
+
+# ── Layout ──────────────────────────────────────────────────────────
+def assign_slots(episodes, previous):
+    """Episode → slot: every slot in `previous` is kept and episodes new to
+    the atlas are appended in catalog order."""
+    slots = dict(previous)
+    next_slot = max(slots.values(), default=-1) + 1
+    for ep in episodes:
+        if ep["num"] not in slots:
+            slots[ep["num"]] = next_slot
+            next_slot += 1
+    return slots
+
+
+def plan_pages(episodes, slots, final_dir, tile, columns, rows, quality, previous_sources):
+    """Split the slots into pages. Each page is
+    {"index", "members": [(num or None, thumbnail path or None)], "signature"}.
+    Also returns the thumbnails' sources for the manifest."""
+    per_page = columns * rows
+    current = {ep["num"] for ep in episodes}
+    by_slot = {slot: num for num, slot in slots.items() if num in current}
+    count = max(slots.values(), default=-1) + 1
+    pages, sources = [], {}
+    for start in range(0, count, per_page):
+        members = []
+        for slot in range(start, min(start + per_page, count)):
+            num = by_slot.get(slot)
+            path = num and find_artifact(os.path.join(final_dir, f"ep-{num}-thumbnail.png"))
+            members.append((num, path or None))
+        h = hashlib.sha256(json.dumps([tile, columns, rows, quality]).encode())
+        for num, path in members:
+            digest = source_sha256(num, path, previous_sources, sources) if path else "-"
+            h.update(f"{num or ''}\0{digest}\0".encode())
+        pages.append({"index": len(pages), "members": members, "signature": h.hexdigest()[:12]})
+    return pages, sources
+
+
+def slot_origin(slot, tile, columns):
+    return (slot % columns) * tile[0], (slot // columns) * tile[1]
+
+
+def page_size(count, tile, columns):
+    """Pixel size of a page holding `count` slots (the last page may be short)."""
+    used_rows = -(-count // columns)
+    return min(count, columns) * tile[0], used_rows * tile[1]
+
+
+def build_page(page, out_dir, tile, columns, quality, pool):
+    """Decode, downscale and pack one page's tiles; returns the written path."""
+    from PIL import Image
+    from qe_render.backdrop import load_cover
+
+    size = page_size(len(page["members"]), tile, columns)
+    sheet = Image.new("RGB", size, (0, 0, 0))
+    tiles = pool.map(lambda member: load_cover(member[1], tile) if member[1] else None, page["members"])
+    for slot, img in enumerate(tiles):
+        if img is not None:
+            sheet.paste(img, slot_origin(slot, tile, columns))
+    path = os.path.join(out_dir, f"atlas-{page['index']}.{page['signature']}.webp")
+    encode_to_file(sheet, path, formats=("webp",), max_quality=quality, exclusive=False)
+    return path
+
+
+# ── Manifest ────────────────────────────────────────────────────────
+def load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, path):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def build_manifest(pages, tile, columns, slots, sources):
+    manifest = {
+        "version": 2,
+        "tile": {"width": tile[0], "height": tile[1]},
+        "pages": [],
+        "episodes": {},
+        "slots": slots,
+        "sources": sources,
+    }
+    for page in pages:
+        file = f"atlas-{page['index']}.{page['signature']}.webp"
+        width, height = page_size(len(page["members"]), tile, columns)
+        manifest["pages"].append({
+            "file": file,
+            "width": width,
+            "height": height,
+            "signature": page["signature"],
+            "members": [num for num, _ in page["members"]],
+        })
+        for slot, (num, path) in enumerate(page["members"]):
+            if path:
+                x, y = slot_origin(slot, tile, columns)
+                manifest["episodes"][num] = {
+                    "page": page["index"],
+                    "file": file,
+                    "x": x,
+                    "y": y,
+                    "width": tile[0],
+                    "height": tile[1],
+                }
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack episode thumbnails into WebP sprite atlases")
+    parser.add_argument("--final", default=FINAL_DIR, help="Folder of rendered thumbnails (default: final/)")
+    parser.add_argument("--tile", type=parse_tile, default=TILE,
+                        help=f"Tile size as WIDTHxHEIGHT (default: {TILE[0]}x{TILE[1]})")
+    parser.add_argument("--columns", type=positive_int, default=COLUMNS, help=f"Tiles per row (default: {COLUMNS})")
+    parser.add_argument("--rows", type=positive_int, default=ROWS, help=f"Rows per page (default: {ROWS})")
+    parser.add_argument("--quality", type=int, default=QUALITY, help=f"WebP quality (default: {QUALITY})")
+    parser.add_argument("--force", action="store_true",
+                        help="Lay slots out afresh in catalog order and rebuild every page")
+    args = parser.parse_args()
+
+    tile, columns, rows = args.tile, args.columns, args.rows
+    if columns * tile[0] > MAX_WEBP_SIDE or rows * tile[1] > MAX_WEBP_SIDE:
+        print(f"ERROR: pages would exceed WebP's {MAX_WEBP_SIDE}px limit — use fewer columns/rows or smaller tiles")
+        sys.exit(1)
+
+    out_dir = os.path.join(args.final, "atlas")
+    manifest_path = os.path.join(out_dir, "atlas.json")
+    os.makedirs(out_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    episodes = load_catalog().episodes
+    old = {} if args.force else load_manifest(manifest_path)
+    if old.get("version") != 2:
+        old = {}
+    slots = assign_slots(episodes, old.get("slots", {}))
+    pages, sources = plan_pages(episodes, slots, args.final, tile, columns, rows, args.quality,
+                                old.get("sources", {}))
+    previous = {p["file"] for p in old.get("pages", [])}
+    present = sum(1 for page in pages for _, path in page["members"] if path)
+
+    print(f"Atlas: {present}/{len(episodes)} thumbnail(s) → {len(pages)} page(s) of "
+          f"{columns}x{rows} {tile[0]}x{tile[1]} tiles")
+    print(f"Output: {out_dir}")
+    print()
+
+    rebuilt = []
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+        for page in pages:
+            file = f"atlas-{page['index']}.{page['signature']}.webp"
+            nums = [num for num, _ in page["members"] if num]
+            label = f"[page {page['index']}] {nums[0]}–{nums[-1]}" if nums else f"[page {page['index']}] (empty)"
+            if not args.force and file in previous and os.path.exists(os.path.join(out_dir, file)):
+                print(f"  {label}: unchanged")
+                continue
+            path = build_page(page, out_dir, tile, columns, args.quality, pool)
+            print(f"  {label}: built {file} ({os.path.getsize(path) / 1e3:.0f} kB)")
+            rebuilt.append(page["index"])
+
+    manifest = build_manifest(pages, tile, columns, slots, sources)
+    save_manifest(manifest, manifest_path)
+
+    # Drop page files no longer referenced (older signatures, removed pages)
+    current = {p["file"] for p in manifest["pages"]}
+    stale = [f for f in os.listdir(out_dir)
+             if f.startswith("atlas-") and f.endswith(".webp") and f not in current]
+    for f in stale:
+        os.remove(os.path.join(out_dir, f))
+
+    print()
+    print("=" * 50)
+    print(f"Done! {len(rebuilt)} page(s) rebuilt, {len(pages) - len(rebuilt)} unchanged"
+          f"{f', {len(stale)} stale file(s) removed' if stale else ''} "
+          f"({time.perf_counter() - start:.2f}s)")
+    print(f"Manifest: {manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,22 +18,31 @@ Usage:
   python generate-banner.py                     # Generate with AI background
   python generate-banner.py --bg path/to/bg.png # Use a custom background image
   python generate-banner.py --prompt "..."       # Override the background prompt
+  python generate-banner.py --base-url http://127.0.0.1:8780/api/v1  # Local stub (stub_servers.py)
+  python generate-banner.py --bg bg.png --profile  # Per-stage timings + Chrome trace (see qe_render/profiler.py)
+
+Generated backgrounds are cached in backgrounds/ keyed by model + prompt
+(see qe_render/background_cache.py), so a new --prompt never reuses a
+stale image. The API client, compositing and encoding live in the
+qe_render package. Pillow and requests are imported only when there is
+something to render, so --help starts immediately.
 """
 
 import os
 import sys
 import argparse
-import base64
-import time
-import requests
-from PIL import Image, ImageDraw, ImageFont, ImageEnhance, ImageFilter
-from io import BytesIO
+from functools import lru_cache
+from qe_render import profiler
+from qe_render.background_cache import BackgroundCache
+from qe_render.openrouter import DEFAULT_BASE_URL, OpenRouterClient, generate_background
 
 # ── Config ──────────────────────────────────────────────────────────
 OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY", "")
+OPENROUTER_BASE_URL = os.environ.get("OPENROUTER_BASE_URL", DEFAULT_BASE_URL)
 MODEL = "google/gemini-2.5-flash-image"
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_DIR = BASE_DIR
+BG_DIR = os.path.join(BASE_DIR, "backgrounds")
 LOGO_PATH = os.path.join(BASE_DIR, "..", "question-everything-logo.png")
 FONT_BOLD = "/System/Library/Fonts/Supplemental/Arial Bold.ttf"
 FONT_REG = "/System/Library/Fonts/Supplemental/Arial.ttf"
@@ -63,112 +72,92 @@ DEFAULT_BG_PROMPT = (
     "Ultra-wide panoramic format, suitable as a background banner."
 )
 
+# Extra request fields sent with every generation call (part of the cache key)
+GEN_PARAMS = {}
 
-def generate_background(prompt_text, output_path, retries=3):
-    """Call OpenRouter API to generate a background image."""
-    if os.path.exists(output_path):
-        print(f"  [skip] Background already exists: {os.path.basename(output_path)}")
-        return True
 
+def banner_background(prompt_text, candidates=1, base_url=DEFAULT_BASE_URL):
+    """Return the cached background for this prompt, generating on a miss.
+
+    Returns the image path, or None if generation failed.
+    """
+    cache = BackgroundCache(BG_DIR)
+    client = OpenRouterClient(OPENROUTER_API_KEY, pool_size=1, base_url=base_url)
     full_prompt = f"Generate an image: {prompt_text}"
 
-    for attempt in range(retries):
-        try:
-            print(f"  [gen] Calling {MODEL} (attempt {attempt + 1}/{retries})...")
-            resp = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": MODEL,
-                    "messages": [{"role": "user", "content": full_prompt}],
-                },
-                timeout=120,
-            )
-            data = resp.json()
-
-            if "error" in data:
-                print(f"  [error] API error: {data['error'].get('message', data['error'])}")
-                if attempt < retries - 1:
-                    time.sleep(10)
-                    continue
-                return False
-
-            images = data.get("choices", [{}])[0].get("message", {}).get("images", [])
-            if not images:
-                print(f"  [error] No images in response")
-                if attempt < retries - 1:
-                    time.sleep(10)
-                    continue
-                return False
-
-            url = images[0].get("image_url", {}).get("url", "")
-            if url.startswith("data:"):
-                _, b64data = url.split(",", 1)
-                img_bytes = base64.b64decode(b64data)
-                with open(output_path, "wb") as f:
-                    f.write(img_bytes)
-                print(f"  [ok] Background saved ({len(img_bytes)} bytes)")
-                return True
-
-        except Exception as e:
-            print(f"  [error] Exception: {e}")
-            if attempt < retries - 1:
-                time.sleep(10)
-                continue
-            return False
-
-    return False
+    def generate(out):
+        print(f"  [gen] Calling {MODEL}...")
+        return generate_background(client, MODEL, full_prompt, out, params=GEN_PARAMS)
+
+    path, hit = cache.get_or_generate(
+        "banner-background",
+        MODEL,
+        full_prompt,
+        generate,
+        params=GEN_PARAMS,
+        candidates=candidates,
+        legacy_path=os.path.join(OUTPUT_DIR, "banner-background.png"),
+    )
+    if hit:
+        print(f"  [skip] Background cached: {os.path.basename(path)}")
+    evicted = cache.evict()
+    if evicted:
+        print(f"  [cache] Evicted {len(evicted)} stale background file(s)")
+    return path
+
+
+# Horizontal dark band across the center (safe zone area)
+BAND_TOP = SAFE_Y - 40
+BAND_BOTTOM = SAFE_Y + SAFE_H + 40
+
+
+@lru_cache(maxsize=1)
+def banner_band():
+    """Per-row overlay alpha for the center band, BAND_TOP..BAND_BOTTOM."""
+    band_center = (BAND_TOP + BAND_BOTTOM) // 2
+    max_dist = (BAND_BOTTOM - BAND_TOP) // 2
+    alphas = []
+    for y in range(BAND_TOP, BAND_BOTTOM):
+        dist_from_center = abs(y - band_center)
+        # Stronger in center, fades to edges
+        alpha = int(140 * (1 - (dist_from_center / max_dist) ** 1.5))
+        alphas.append(max(0, min(alpha, 140)))
+    return tuple(alphas)
 
 
 def composite_banner(bg_path, output_path):
     """Composite background + gradient + logo + text into the channel banner."""
-    # Load and resize background to banner dimensions
-    bg = Image.open(bg_path).convert("RGBA")
-    scale = max(BANNER_W / bg.width, BANNER_H / bg.height)
-    bg = bg.resize((int(bg.width * scale), int(bg.height * scale)), Image.LANCZOS)
-    left = (bg.width - BANNER_W) // 2
-    top = (bg.height - BANNER_H) // 2
-    bg = bg.crop((left, top, left + BANNER_W, top + BANNER_H))
-
-    # Slight brightness reduction for text contrast
-    bg = ImageEnhance.Brightness(bg).enhance(0.80)
-
-    # Center gradient overlay — darker band in the middle for text readability
-    gradient = Image.new("RGBA", (BANNER_W, BANNER_H), (0, 0, 0, 0))
-    draw_grad = ImageDraw.Draw(gradient)
-
-    # Horizontal dark band across the center (safe zone area)
-    band_top = SAFE_Y - 40
-    band_bottom = SAFE_Y + SAFE_H + 40
-    band_center = (band_top + band_bottom) // 2
-
-    for y in range(band_top, band_bottom):
-        dist_from_center = abs(y - band_center)
-        max_dist = (band_bottom - band_top) // 2
-        # Stronger in center, fades to edges
-        alpha = int(140 * (1 - (dist_from_center / max_dist) ** 1.5))
-        alpha = max(0, min(alpha, 140))
-        draw_grad.line([(0, y), (BANNER_W, y)], fill=(0, 0, 0, alpha))
+    with profiler.span("composite_banner"):
+        return _composite_banner(bg_path, output_path)
+
+
+def _composite_banner(bg_path, output_path):
+    from PIL import ImageDraw
+    from qe_render.backdrop import load_cover
+    from qe_render.encoder import encode_to_file
+    from qe_render.overlay import shade
+    from qe_render.resource_cache import get_font, get_logo
+
+    # Background scaled to cover the banner and center-cropped, decoding
+    # and resampling only what survives the crop — see qe_render/backdrop.py
+    bg = load_cover(bg_path, (BANNER_W, BANNER_H))
 
-    bg = Image.alpha_composite(bg, gradient)
+    # Slight brightness reduction + darker center band for text
+    # readability, fused into one multiply — see qe_render/overlay.py
+    with profiler.span("banner.gradient"):
+        bg = shade(bg, 0.80, BAND_TOP, banner_band())
 
     # Logo — centered vertically in safe zone, positioned left of center
-    logo = Image.open(LOGO_PATH).convert("RGBA")
     logo_height = 280
-    logo_ratio = logo_height / logo.height
-    logo = logo.resize(
-        (int(logo.width * logo_ratio), logo_height), Image.LANCZOS
-    )
+    with profiler.span("banner.logo"):
+        logo = get_logo(LOGO_PATH, logo_height)
 
-    # Center the entire composition (logo + text) within the safe zone
-    # Logo sits to the left, text to the right
-    gap = 30  # space between logo and text
-    logo_x = SAFE_X + (SAFE_W // 2) - logo.width - (gap // 2) - 40
-    logo_y = SAFE_Y + (SAFE_H - logo_height) // 2
-    bg.paste(logo, (logo_x, logo_y), logo)
+        # Center the entire composition (logo + text) within the safe zone
+        # Logo sits to the left, text to the right
+        gap = 30  # space between logo and text
+        logo_x = SAFE_X + (SAFE_W // 2) - logo.width - (gap // 2) - 40
+        logo_y = SAFE_Y + (SAFE_H - logo_height) // 2
+        bg.paste(logo, (logo_x, logo_y), logo)
 
     draw = ImageDraw.Draw(bg)
 
@@ -178,12 +167,12 @@ def composite_banner(bg_path, output_path):
     # Show name
     show_name = "QUESTION\nEVERYTHING"
     title_size = 72
-    title_font = ImageFont.truetype(FONT_BOLD, title_size)
+    title_font = get_font(FONT_BOLD, title_size)
 
     # Tagline
     tagline = "(EXCEPT THIS PODCAST!)"
     tagline_size = 28
-    tagline_font = ImageFont.truetype(FONT_REG, tagline_size)
+    tagline_font = get_font(FONT_REG, tagline_size)
 
     # Measure text block height for vertical centering
     name_lines = show_name.split("\n")
@@ -194,50 +183,47 @@ def composite_banner(bg_path, output_path):
 
     text_y_start = SAFE_Y + (SAFE_H - total_text_h) // 2
 
-    # Draw show name
-    for i, line in enumerate(name_lines):
+    with profiler.span("banner.draw_text"):
+        # Draw show name
+        for i, line in enumerate(name_lines):
+            draw.text(
+                (text_x, text_y_start + i * line_height),
+                line,
+                font=title_font,
+                fill=(255, 255, 255, 255),
+            )
+
+        # Draw tagline
+        tagline_y = text_y_start + name_block_h + tagline_gap
         draw.text(
-            (text_x, text_y_start + i * line_height),
-            line,
-            font=title_font,
-            fill=(255, 255, 255, 255),
+            (text_x, tagline_y),
+            tagline,
+            font=tagline_font,
+            fill=(255, 255, 255, 190),
         )
 
-    # Draw tagline
-    tagline_y = text_y_start + name_block_h + tagline_gap
-    draw.text(
-        (text_x, tagline_y),
-        tagline,
-        font=tagline_font,
-        fill=(255, 255, 255, 190),
-    )
-
-    # Convert and save — ensure under 6MB
-    bg = bg.convert("RGB")
-    bg.save(output_path, "PNG", optimize=True)
-
-    file_size = os.path.getsize(output_path)
-    if file_size > MAX_FILE_BYTES:
-        print(f"  [compress] PNG is {file_size / 1e6:.1f} MB, converting to JPEG...")
-        for quality in (95, 90, 85, 80):
-            jpeg_path = output_path.rsplit(".", 1)[0] + ".jpg"
-            bg.save(jpeg_path, "JPEG", quality=quality, optimize=True)
-            jpeg_size = os.path.getsize(jpeg_path)
-            if jpeg_size <= MAX_FILE_BYTES:
-                print(f"  [ok] JPEG saved at quality={quality} ({jpeg_size / 1e6:.1f} MB)")
-                # Remove the oversized PNG
-                if jpeg_path != output_path:
-                    os.remove(output_path)
-                return jpeg_path
-        print(f"  [warn] Could not get under 6 MB even at quality=80")
-        return jpeg_path
-
-    print(f"  [ok] Banner saved: {os.path.basename(output_path)} ({file_size / 1e6:.1f} MB)")
-    return output_path
+    # Encode in memory — optimized PNG if it fits under 6MB, else the
+    # best JPEG quality that does — and write only the winner
+    with profiler.span("banner.encode"):
+        result = encode_to_file(
+            bg.convert("RGB"), output_path, MAX_FILE_BYTES,
+            formats=("png", "jpeg"), png_optimize=True,
+        )
+    if not result.fits:
+        print(f"  [warn] Could not get under 6 MB even at quality={result.quality}")
+    print(f"  [ok] Banner saved: {os.path.basename(result.path)} ({result.describe()})")
+    return result.path
 
 
 def draw_safe_zone_guides(img_path):
     """Draw safe-zone guides on a copy of the banner for preview."""
+    with profiler.span("draw_safe_zone_guides"):
+        return _draw_safe_zone_guides(img_path)
+
+
+def _draw_safe_zone_guides(img_path):
+    from PIL import Image, ImageDraw
+
     img = Image.open(img_path).convert("RGBA")
     overlay = Image.new("RGBA", img.size, (0, 0, 0, 0))
     draw = ImageDraw.Draw(overlay)
@@ -264,17 +250,39 @@ def draw_safe_zone_guides(img_path):
     return guide_path
 
 
+def use_state_dir(root):
+    """Write the banner and its backgrounds under `root` — used for runs
+    against a local stub API."""
+    global OUTPUT_DIR, BG_DIR
+    OUTPUT_DIR = root
+    BG_DIR = os.path.join(root, "backgrounds")
+    os.makedirs(BG_DIR, exist_ok=True)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Generate QE YouTube channel banner")
     parser.add_argument("--bg", type=str, help="Path to a custom background image (skips AI generation)")
     parser.add_argument("--prompt", type=str, help="Override the background generation prompt")
     parser.add_argument("--no-guides", action="store_true", help="Skip generating the safe-zone guide image")
     parser.add_argument("--output", type=str, default=None, help="Output filename (default: qe-channel-banner.png)")
+    parser.add_argument("--candidates", type=int, default=1, help="Background candidates to keep for the prompt (default: 1)")
+    parser.add_argument("--base-url", default=OPENROUTER_BASE_URL,
+                        help="OpenRouter-compatible API base URL (default: $OPENROUTER_BASE_URL or OpenRouter)")
+    parser.add_argument("--profile", nargs="?", const="", metavar="TRACE",
+                        help="Time each render stage; print the per-stage table and write a Chrome trace "
+                             "(default: .cache/profile/banner-<time>.trace.json)")
     args = parser.parse_args()
+    if args.profile is not None:
+        profiler.enable()
+
+    if args.base_url != DEFAULT_BASE_URL:
+        from qe_render.sandbox import sandbox_dir
+        sandbox = sandbox_dir(args.base_url)
+        if sandbox:
+            use_state_dir(sandbox)
 
     output_name = args.output or "qe-channel-banner.png"
     output_path = os.path.join(OUTPUT_DIR, output_name)
-    bg_path = os.path.join(OUTPUT_DIR, "banner-background.png")
 
     print("=" * 50)
     print("QE Podcast — YouTube Channel Banner Generator")
@@ -293,7 +301,8 @@ def main():
             print("ERROR: Set OPENROUTER_API_KEY environment variable")
             print("  Or use --bg to provide a custom background image")
             sys.exit(1)
-        if not generate_background(prompt, bg_path):
+        bg_path = banner_background(prompt, max(1, args.candidates), args.base_url)
+        if not bg_path:
             print("FAILED: Could not generate background")
             sys.exit(1)
 
@@ -313,6 +322,8 @@ def main():
     print("Done! Upload your banner at:")
     print("  https://studio.youtube.com → Customization → Branding → Banner image")
     print("=" * 50)
+    if args.profile is not None:
+        profiler.report(args.profile or None, "banner")
 
 
 if __name__ == "__main__":
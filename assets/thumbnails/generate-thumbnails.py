@@ -3,19 +3,57 @@
 QE Podcast Thumbnail Generator
 Generates scenic backgrounds via OpenRouter (Gemini), then composites
 logo + title text + guest name using Pillow.
+
+Usage:
+  python generate-thumbnails.py              # All episodes, one API call at a time
+  python generate-thumbnails.py 05           # Just one episode
+  python generate-thumbnails.py 03-07,tag:ai # Any selection (see catalog.py)
+  python generate-thumbnails.py --missing-output  # Only episodes without a thumbnail yet
+  python generate-thumbnails.py --changed-since HEAD~3  # Episodes edited in episodes.json
+  python generate-thumbnails.py --jobs 4     # Fetch backgrounds 4 at a time
+  python generate-thumbnails.py --jobs 4 --rate 0.5 --burst 2
+  python generate-thumbnails.py --workers 0  # Composite on every CPU core
+  python generate-thumbnails.py --force      # Re-composite even if cached
+  python generate-thumbnails.py --candidates 3  # Keep 3 background options per prompt
+  python generate-thumbnails.py --plan       # JSON layout report, no rendering or API calls
+  python generate-thumbnails.py --base-url http://127.0.0.1:8780/api/v1  # Local stub (stub_servers.py)
+  python generate-thumbnails.py --force --profile  # Per-stage p50/p95 + Chrome trace (see qe_render/profiler.py)
+  python generate-thumbnails.py --no-variants  # Only the 1920x1080 master, no derived sizes
+
+Each render also writes the YouTube, OG, square and srcset sizes to
+final/variants/ from the same in-memory image (see qe_render/variants.py),
+and final/placeholders.json is brought up to date (see placeholders.py).
+
+Backgrounds are cached by model + full prompt (see
+qe_render/background_cache.py); editing a prompt or PROMPT_SUFFIX
+regenerates just the affected images.
+
+The API client, compositing and encoding live in the qe_render package.
+Its Pillow-bound modules are imported by the functions that render:
+--help loads neither Pillow nor requests, and --plan only the Pillow it
+needs to measure text and read the logo's size.
 """
 
 import os
 import sys
 import json
 import time
-import base64
-import requests
-from PIL import Image, ImageDraw, ImageFont, ImageEnhance
-from io import BytesIO
+import hashlib
+import argparse
+import threading
+import contextlib
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import StringIO
+from qe_render import profiler
+from qe_render.background_cache import BackgroundCache
+from qe_render.encoder import encode_to_file, find_artifact
+from qe_render.openrouter import DEFAULT_BASE_URL, OpenRouterClient, generate_background
+from catalog import add_selection_arguments, load_catalog, select_episodes
 
 # ── Config ──────────────────────────────────────────────────────────
 OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY", "")
+OPENROUTER_BASE_URL = os.environ.get("OPENROUTER_BASE_URL", DEFAULT_BASE_URL)
 MODEL = "google/gemini-2.5-flash-image"
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_DIR = os.path.join(BASE_DIR, "final")
@@ -24,379 +62,21 @@ LOGO_PATH = os.path.join(BASE_DIR, "..", "question-everything-logo.png")
 FONTS_DIR = os.path.join(BASE_DIR, "..", "fonts")
 FONT_BOLD = os.path.join(FONTS_DIR, "Oswald-Regular.ttf")   # title text
 FONT_REG  = os.path.join(FONTS_DIR, "Inter-Medium.ttf")     # guest name
+RENDER_CACHE_PATH = os.path.join(OUTPUT_DIR, ".render-cache.json")
+VARIANTS_DIR = os.path.join(OUTPUT_DIR, "variants")
+MAX_THUMBNAIL_BYTES = 2_097_152  # YouTube's 2 MB limit
+
+# Background API throttling: sustained calls/sec and burst size
+API_RATE = 1 / 3
+API_BURST = 1
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(BG_DIR, exist_ok=True)
 
 # ── Episode Data ────────────────────────────────────────────────────
-EPISODES = [
-    {
-        "num": "00-teaser",
-        "title": "QUESTION EVERYTHING (EXCEPT THIS PODCAST!)",
-        "guest": None,
-        "prompt": (
-            "Two weathered wooden chairs facing each other on a rocky mountain "
-            "overlook at dawn, a vast valley of fog rolling beneath them. The chairs "
-            "are simple and imperfect — one slightly turned as if mid-conversation. "
-            "Beyond the fog, layers of mountain ridges fade into the distance. "
-            "Dramatic golden hour lighting with warm amber and soft pink tones "
-            "breaking through clouds on the horizon."
-        ),
-    },
-    {
-        "num": "01",
-        "title": "GET TO KNOW US",
-        "guest": None,
-        "prompt": (
-            "Two dirt paths converging into one at a wooded trailhead, shot from "
-            "ground level looking forward into the trail. Autumn leaves scattered "
-            "along the paths. A hand-carved wooden trail marker post stands at the "
-            "junction point. Morning light filters through the tree canopy creating "
-            "dappled golden light on the forest floor."
-        ),
-    },
-    {
-        "num": "02",
-        "title": "PHILOSOPHICAL JOURNEY",
-        "guest": None,
-        "prompt": (
-            "A long stone corridor inside an ancient library or monastery, with "
-            "towering bookshelves lining both walls. A single beam of warm light "
-            "streams through a high arched window at the far end, illuminating dust "
-            "motes floating in the air. The perspective draws the eye deep into the "
-            "corridor. Old leather-bound books fill the shelves. Warm amber tones "
-            "from the light contrast with the cool stone walls."
-        ),
-    },
-    {
-        "num": "03",
-        "title": "ATTENTION HEIST",
-        "guest": None,
-        "prompt": (
-            "A busy city intersection at night, shot from slightly above street "
-            "level. Hundreds of glowing screens — billboards, phone screens, digital "
-            "displays — compete for attention in every direction, their light washing "
-            "the scene in blue and white. In the center of the frame, a single figure "
-            "stands still on the crosswalk, looking up at the night sky while the "
-            "world of screens swirls around them. Cool blue and neon tones dominate, "
-            "with a single warm streetlamp casting an amber glow on the figure."
-        ),
-    },
-    {
-        "num": "04",
-        "title": "THE MORALITY OF MASS DESTRUCTION",
-        "guest": None,
-        "prompt": (
-            "A vast, empty desert landscape at dusk — cracked earth stretching to the "
-            "horizon. In the middle distance, a lone concrete watchtower or bunker "
-            "stands silhouetted against a heavy, dramatic sky. The sky is layered "
-            "with deep oranges, reds, and dark purples as the sun sets behind thick "
-            "clouds. The landscape feels post-apocalyptic in its emptiness and "
-            "stillness. Dramatic warm-to-cool gradient in the sky."
-        ),
-    },
-    {
-        "num": "05",
-        "title": "THE DIGITAL DIVIDE",
-        "guest": None,
-        "prompt": (
-            "A long wooden pier extending over a calm lake at twilight, shot from the "
-            "entrance of the pier looking outward. On the near end of the pier, a "
-            "warm lantern glows amber on a post. At the far end, a figure sits alone, "
-            "the cool blue twilight reflecting off the water around them. The left "
-            "side of the frame is warmer (the lantern's glow on wooden planks), "
-            "gradually transitioning to cool blues and silvers on the right."
-        ),
-    },
-    {
-        "num": "06",
-        "title": "WHERE DO YOU GET YOUR NEWS FROM?",
-        "guest": None,
-        "prompt": (
-            "An old-fashioned newspaper stand on a street corner at golden hour. "
-            "Stacks of newspapers and magazines fill the wooden kiosk, their "
-            "headlines illegible but layered thick. A few newspapers have blown onto "
-            "the sidewalk. Behind the stand, the blurry glow of a large digital "
-            "billboard casts cool blue light, contrasting with the warm wood and "
-            "paper of the stand. Warm golden tones on the physical newspapers, cool "
-            "digital blue from the billboard behind."
-        ),
-    },
-    {
-        "num": "07",
-        "title": "THE SCIENCE AND FICTION OF TERRENCE HOWARD",
-        "guest": None,
-        "prompt": (
-            "A dimly lit university lecture hall, shot from the back row looking down "
-            "toward the front. A large green chalkboard dominates the front wall, "
-            "covered in a chaotic mix of mathematical equations — some elegantly "
-            "written, others scrawled and crossed out, circles and arrows connecting "
-            "ideas. A single desk lamp illuminates the board from below, casting "
-            "dramatic upward shadows. Chalk dust hangs in the air. Warm amber from "
-            "the desk lamp against the cool dark green of the chalkboard."
-        ),
-    },
-    {
-        "num": "08",
-        "title": "COMBATTING CONSPIRACY THEORIES",
-        "guest": None,
-        "prompt": (
-            "A weathered community bulletin board on the side of an old brick "
-            "building in a small town. The board is covered in overlapping layers of "
-            "flyers, posters, and newspaper clippings — some connected by red string, "
-            "others pinned at odd angles. A single bare bulb above the board casts "
-            "harsh warm light, creating strong shadows. The surrounding brick wall "
-            "and sidewalk are bathed in late afternoon golden light."
-        ),
-    },
-    {
-        "num": "09",
-        "title": "REVISITING LONELINESS",
-        "guest": None,
-        "prompt": (
-            "A single empty park bench in a vast public park at dusk, shot from a low "
-            "angle. The bench faces outward toward a distant city skyline, its lights "
-            "just beginning to flicker on. Fallen autumn leaves gather around the "
-            "bench legs. The park is empty — no people visible anywhere. A single "
-            "old-fashioned street lamp near the bench casts a warm amber pool of "
-            "light in the gathering blue twilight."
-        ),
-    },
-    {
-        "num": "10",
-        "title": "RACE TO AI SUPREMACY",
-        "guest": None,
-        "prompt": (
-            "A desolate crossroads on a rural two-lane highway at twilight, shot from "
-            "ground level at the center of the intersection. The two roads stretch in "
-            "four directions toward distant horizons. A weathered road sign stands at "
-            "the junction, its text illegible. Storm clouds gather on one horizon "
-            "while the other shows a sliver of clear sky with warm amber light "
-            "breaking through. Power lines run along one road, disappearing into the "
-            "distance."
-        ),
-    },
-    {
-        "num": "11",
-        "title": "CURATE LESS, LIVE MORE",
-        "guest": None,
-        "prompt": (
-            "An open doorway in a plain white wall, shot from inside looking out. "
-            "Through the door, a wild, overgrown meadow bursts with untamed "
-            "wildflowers and tall grass swaying in the wind, bathed in warm "
-            "late-afternoon golden light. The interior side of the frame is clean, "
-            "sterile, and cool-toned — a perfectly organized but empty room. The "
-            "contrast between the controlled interior and the chaotic, beautiful "
-            "exterior is the tension. Dramatic golden hour warmth flooding through "
-            "the doorway."
-        ),
-    },
-    {
-        "num": "12",
-        "title": "HOPE IN THE CYCLE",
-        "guest": None,
-        "prompt": (
-            "A grand civic rotunda interior — marble columns, a domed ceiling — shot "
-            "looking upward from the floor. A large pendulum hangs from the center of "
-            "the dome, caught mid-swing. Late afternoon sunlight streams through tall "
-            "arched windows, casting long golden shafts of light across the marble "
-            "floor. The architecture is timeless and dignified. Dust motes float in "
-            "the light beams. Warm amber sunlight against cool grey-white marble."
-        ),
-    },
-    {
-        "num": "13",
-        "title": "MEDICINE, MORALITY, AND THE ETHICS OF PROGRESS",
-        "guest": None,
-        "prompt": (
-            "An old apothecary shelf — dark wood, glass bottles of various sizes "
-            "filled with liquids of amber, green, and clear tones — shot in dramatic "
-            "chiaroscuro lighting. A brass mortar and pestle sits on the worn wooden "
-            "counter in the foreground. A single warm light source from the left "
-            "illuminates the glass bottles, creating rich reflections and deep "
-            "shadows. The shelves stretch into soft-focus darkness on the right."
-        ),
-    },
-    {
-        "num": "14",
-        "title": "WORDS, HEALTH, AND HARM",
-        "guest": None,
-        "prompt": (
-            "Stone courthouse steps in autumn, shot from a low angle. A vintage "
-            "megaphone lies abandoned on the middle step, slightly tilted. Dry autumn "
-            "leaves — burnt orange and deep red — have gathered around it and continue "
-            "to blow across the steps. The building's columns rise behind, partially "
-            "visible. Late afternoon light casts long dramatic shadows across the "
-            "stone. Warm autumn amber and orange tones against cool grey stone."
-        ),
-    },
-    {
-        "num": "15",
-        "title": "THE CLASSROOM REVOLUTION",
-        "guest": "Lauren Escobar-Phani",
-        "prompt": (
-            "A New York City public school classroom, shot from the back corner. "
-            "Morning sunlight streams through tall, old windows with wire-reinforced "
-            "glass, casting warm light across rows of empty wooden desks. On one desk "
-            "in the foreground, a worn textbook sits next to an open laptop — the old "
-            "and new side by side. A faded world map hangs on the wall. The "
-            "chalkboard at the front still has faint traces of erased writing. Warm "
-            "golden morning light against cool institutional green walls."
-        ),
-    },
-    {
-        "num": "16",
-        "title": "REEL PHILOSOPHY: GROUNDHOG DAY",
-        "guest": None,
-        "prompt": (
-            "A charming small-town main street in winter, shot from the middle of the "
-            "road looking toward a prominent clock tower. The clock reads 6:00. Light "
-            "snow falls, and the same set of footprints appears multiple times on the "
-            "snowy sidewalk — walking in the same direction, slightly offset, as if "
-            "someone has walked the same path again and again. Warm amber light "
-            "spills from storefronts onto the snow. The sky is that pre-dawn "
-            "blue-grey of early morning."
-        ),
-    },
-    {
-        "num": "17",
-        "title": "LET KIDS OWN THEIR REVELATIONS",
-        "guest": "Jared Posey",
-        "prompt": (
-            "A forest clearing, shot from inside the tree line looking outward. A "
-            "single child-sized figure stands in the center of the clearing, arms "
-            "slightly raised, looking up at dramatic rays of sunlight breaking "
-            "through the tree canopy above. The surrounding trees are tall and "
-            "ancient, creating a natural cathedral. Ferns and wildflowers carpet the "
-            "forest floor. Warm golden shafts cutting through deep forest green "
-            "shadows."
-        ),
-    },
-    {
-        "num": "18",
-        "title": "SAVING THE SOUL OF THE CLASSROOM",
-        "guest": "Rachel Guerrero",
-        "prompt": (
-            "A close-up of an old wooden teacher's desk near a classroom window. A "
-            "small potted plant sits on the desk, reaching toward the window light. "
-            "Beside it, a stack of well-worn books and a handwritten note partially "
-            "visible. Warm afternoon sunlight pours through the window, casting the "
-            "plant's shadow across the desk surface. The window looks out onto a "
-            "blurry green schoolyard. The desk's surface shows years of use — "
-            "scratches, ink marks, character."
-        ),
-    },
-    {
-        "num": "19",
-        "title": "THE MYSTERY OF SATOSHI NAKAMOTO",
-        "guest": None,
-        "prompt": (
-            "A dark server room stretching into deep perspective, rows of tall black "
-            "server racks on both sides with small green and amber LED lights "
-            "blinking in the darkness. The floor is reflective, creating mirror-like "
-            "repetitions of the lights. At the far end of the aisle, a single "
-            "monitor glows with a warm amber light, its screen content "
-            "indistinguishable. Cool dark tones with pinpoints of green and amber "
-            "light."
-        ),
-    },
-    {
-        "num": "20",
-        "title": "AI, SPEED, AND STAYING IN THE SHIRE",
-        "guest": None,
-        "prompt": (
-            "Rolling green hills in soft evening light — lush, gentle, pastoral — "
-            "with a round wooden door set into a grassy hillside in the foreground (a "
-            "hobbit-hole, warm light glowing from within). In the far background, "
-            "barely visible on the distant horizon through a slight haze, the sharp "
-            "geometric silhouettes of a futuristic city skyline rise — glass and "
-            "steel catching the last light. Warm golden-green pastoral tones in the "
-            "foreground, cool steel-grey on the distant horizon."
-        ),
-    },
-    {
-        "num": "21",
-        "title": "ECHOES OF THE FUTURE",
-        "guest": None,
-        "prompt": (
-            "A vintage turntable with a vinyl record spinning, placed on a wooden "
-            "table in front of a floor-to-ceiling glass window of a modern office "
-            "building. Through the window, a city skyline at dusk — lights beginning "
-            "to glow. The turntable's warm wood grain and analog craftsmanship "
-            "contrasts with the sleek glass and steel of the building. The vinyl "
-            "catches a warm amber reflection from the sunset outside."
-        ),
-    },
-    {
-        "num": "22",
-        "title": "RAPID RIFFS",
-        "guest": None,
-        "prompt": (
-            "A lived-in cafe table shot from slightly above, covered in a creative "
-            "mess — scattered newspaper pages, an open laptop, two half-finished "
-            "coffees in ceramic mugs, a few pens, a dog-eared paperback book, and a "
-            "phone face-down. Morning light streams in from a window to the left, "
-            "casting warm light across the clutter and creating soft shadows. The "
-            "cafe background is soft-focus — exposed brick, warm wood, other empty "
-            "tables."
-        ),
-    },
-    {
-        "num": "23",
-        "title": "TRIBES, TWEETS, AND THE TROUBLE WITH TRUTH",
-        "guest": None,
-        "prompt": (
-            "The interior of a classic American town hall, shot from the center aisle "
-            "looking toward a wooden podium at the front. The room is divided — the "
-            "left side lit in warm amber from tall windows, the right side in cooler "
-            "shadow. A sharp line of light cuts diagonally across the floor between "
-            "the two sides. Rows of empty wooden chairs face the podium on both "
-            "sides."
-        ),
-    },
-    {
-        "num": "24",
-        "title": "WHY KNOWING YOURSELF MATTERS",
-        "guest": "Suneet Bhatt",
-        "prompt": (
-            "A tall corporate ladder leaning against a plain concrete wall, shot from "
-            "ground level. But the scene's focus is to the left — a figure walking "
-            "away from the ladder through an open gate into a vast, open landscape of "
-            "rolling fields leading to distant mountains. The figure is small but "
-            "purposeful, heading toward the horizon. Behind them, the ladder casts a "
-            "long shadow. Late afternoon golden hour light illuminates the open "
-            "field, while the wall and ladder remain in cooler shadow."
-        ),
-    },
-    {
-        "num": "25",
-        "title": "THE JOURNEY TO YOURSELF",
-        "guest": "Ruth Pearce",
-        "prompt": (
-            "A theater dressing room, shot from slightly above. A row of masks — "
-            "dramatic, comedic, neutral — hang on hooks along a worn brick wall. "
-            "Below them, a single wooden chair faces a large mirror surrounded by "
-            "warm vanity bulbs. The mirror reflects the empty chair and the masks "
-            "behind it. One mask has fallen to the floor. The vanity bulbs cast warm, "
-            "honest light while the rest of the room fades into shadow."
-        ),
-    },
-    {
-        "num": "27",
-        "title": "KIDS DON'T NEED A SEAT. THEY NEED THE WHEEL.",
-        "guest": "Anand Sanwal",
-        "prompt": (
-            "An open two-lane road stretching toward distant mountains, shot from "
-            "the driver's perspective through a vintage car windshield. The steering "
-            "wheel is prominent in the lower foreground — worn leather, classic "
-            "design. The road ahead is wide and empty, cutting through open desert "
-            "scrubland with wildflowers sprouting through cracks in the asphalt. "
-            "Golden hour light floods through the windshield, casting long warm "
-            "shadows across the dashboard. The distant mountains glow amber and "
-            "purple against a vast sky."
-        ),
-    },
-]
+# Titles, guests, tags and prompts live in episodes.json (see catalog.py)
+CATALOG = load_catalog()
+EPISODES = CATALOG.episodes
 
 # ── Prompt suffix (appended to all prompts) ─────────────────────────
 PROMPT_SUFFIX = (
@@ -405,232 +85,596 @@ PROMPT_SUFFIX = (
     "16:9 wide landscape format."
 )
 
+# Extra request fields sent with every generation call (part of the cache key)
+GEN_PARAMS = {}
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/sec, holding at most `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def positive_rate(text):
+    """argparse type for --rate: calls per second, > 0."""
+    try:
+        rate = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number, got {text!r}")
+    if not rate > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {text!r}")
+    return rate
+
+
+def positive_burst(text):
+    """argparse type for --burst: a whole number of calls, >= 1."""
+    try:
+        burst = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a whole number, got {text!r}")
+    if burst < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {text!r}")
+    return burst
+
+
+def build_prompt(prompt_text):
+    """Full text sent to the image model for an episode prompt."""
+    return f"Generate an image: {prompt_text}{PROMPT_SUFFIX}"
+
+
+def episode_background(ep, cache, client, candidates=1, tag=""):
+    """Return the cached background for an episode, generating on a miss.
+
+    Returns the image path, or None if generation failed.
+    """
+    name = f"ep-{ep['num']}-bg"
+    full_prompt = build_prompt(ep["prompt"])
+    path, hit = cache.get_or_generate(
+        name,
+        MODEL,
+        full_prompt,
+        lambda out: generate_background(client, MODEL, full_prompt, out, params=GEN_PARAMS, tag=tag),
+        params=GEN_PARAMS,
+        candidates=candidates,
+        legacy_path=os.path.join(BG_DIR, f"{name}.png"),
+    )
+    if hit:
+        print(f"  {tag}[skip] Background cached: {os.path.basename(path)}")
+    return path
 
-def generate_background(prompt_text, output_path, retries=3):
-    """Call OpenRouter API to generate a background image."""
-    if os.path.exists(output_path):
-        print(f"  [skip] Background already exists: {os.path.basename(output_path)}")
-        return True
-
-    full_prompt = f"Generate an image: {prompt_text}{PROMPT_SUFFIX}"
-
-    for attempt in range(retries):
-        try:
-            resp = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": MODEL,
-                    "messages": [{"role": "user", "content": full_prompt}],
-                },
-                timeout=120,
-            )
-            data = resp.json()
-
-            if "error" in data:
-                print(f"  [error] API error: {data['error'].get('message', data['error'])}")
-                if attempt < retries - 1:
-                    print(f"  [retry] Waiting 10s before retry {attempt + 2}/{retries}...")
-                    time.sleep(10)
-                    continue
-                return False
-
-            images = data.get("choices", [{}])[0].get("message", {}).get("images", [])
-            if not images:
-                print(f"  [error] No images in response")
-                if attempt < retries - 1:
-                    time.sleep(10)
-                    continue
-                return False
-
-            url = images[0].get("image_url", {}).get("url", "")
-            if url.startswith("data:"):
-                _, b64data = url.split(",", 1)
-                img_bytes = base64.b64decode(b64data)
-                with open(output_path, "wb") as f:
-                    f.write(img_bytes)
-                print(f"  [ok] Background saved ({len(img_bytes)} bytes)")
-                return True
-
-        except Exception as e:
-            print(f"  [error] Exception: {e}")
-            if attempt < retries - 1:
-                time.sleep(10)
-                continue
-            return False
 
-    return False
+@lru_cache(maxsize=8192)
+def measure(font_path, size, text):
+    """Advance width of a word (or the space) at `size`, measured once."""
+    from qe_render.resource_cache import get_font
+    return get_font(font_path, size).getlength(text)
 
 
-def wrap_text(draw, text, font, max_width):
+def wrap_text(text, font_path, size, max_width):
     """Word-wrap text to fit within max_width, with anti-widow protection.
 
+    Line widths are summed from cached per-word advances instead of
+    re-measuring every growing prefix string.
+
     After greedy wrapping, if the last line has only 1 word and the title
     has more than 3 words, pull one word from the penultimate line down
     to eliminate the orphan. Exception: 3-word titles where the final word
     is long enough to stand alone (e.g. "THE CLASSROOM / REVOLUTION").
     """
     words = text.split()
+    space = measure(font_path, size, " ")
     lines = []
-    current_line = ""
+    current_line = []
+    current_width = 0
     for word in words:
-        test = f"{current_line} {word}".strip()
-        bbox = draw.textbbox((0, 0), test, font=font)
-        if bbox[2] - bbox[0] > max_width and current_line:
+        word_width = measure(font_path, size, word)
+        test_width = current_width + space + word_width if current_line else word_width
+        if test_width > max_width and current_line:
             lines.append(current_line)
-            current_line = word
+            current_line = [word]
+            current_width = word_width
         else:
-            current_line = test
+            current_line.append(word)
+            current_width = test_width
     if current_line:
         lines.append(current_line)
 
     # Anti-widow: fix single-word last lines
     if len(lines) >= 2:
-        last_words = lines[-1].split()
-        if len(last_words) == 1 and len(words) > 3:
+        if len(lines[-1]) == 1 and len(words) > 3:
             # Pull last word from penultimate line down to join the orphan
-            prev_words = lines[-2].split()
-            if len(prev_words) >= 2:
-                moved_word = prev_words.pop()
-                lines[-2] = " ".join(prev_words)
-                lines[-1] = f"{moved_word} {lines[-1]}"
-
-    return lines
-
-
-def composite_thumbnail(bg_path, title, guest, output_path):
-    """Composite background + gradient + logo + text into final thumbnail."""
-    # Load and resize background to 1920x1080
-    bg = Image.open(bg_path).convert("RGBA")
-    scale = max(1920 / bg.width, 1080 / bg.height)
-    bg = bg.resize((int(bg.width * scale), int(bg.height * scale)), Image.LANCZOS)
-    left = (bg.width - 1920) // 2
-    top = (bg.height - 1080) // 2
-    bg = bg.crop((left, top, left + 1920, top + 1080))
-
-    # Slightly darken
-    bg = ImageEnhance.Brightness(bg).enhance(0.85)
-
-    # Gradient overlay — starts at 42% from top for readable text area
-    gradient = Image.new("RGBA", (1920, 1080), (0, 0, 0, 0))
-    draw_grad = ImageDraw.Draw(gradient)
-    gradient_start = int(1080 * 0.42)
-    for y in range(gradient_start, 1080):
-        progress = (y - gradient_start) / (1080 - gradient_start)
-        alpha = int(225 * progress ** 1.2)
-        draw_grad.line([(0, y), (1920, y)], fill=(0, 0, 0, min(alpha, 225)))
-    bg = Image.alpha_composite(bg, gradient)
+            if len(lines[-2]) >= 2:
+                lines[-1].insert(0, lines[-2].pop())
 
-    # Logo — ~15% of image height
-    logo = Image.open(LOGO_PATH).convert("RGBA")
-    logo_height = 165
-    logo_ratio = logo_height / logo.height
-    logo = logo.resize(
-        (int(logo.width * logo_ratio), logo_height), Image.LANCZOS
-    )
-    logo_x = 40
-    BOTTOM_MARGIN = 45
-    logo_y = 1080 - logo_height - BOTTOM_MARGIN
-    bg.paste(logo, (logo_x, logo_y), logo)
+    return [" ".join(line) for line in lines]
 
-    draw = ImageDraw.Draw(bg)
-    text_x = logo_x + logo.width + 22
 
-    # Available vertical space: from logo_y to (image bottom - bottom padding)
-    BOTTOM_PAD = 18  # minimum pixels below last text line
-    available_height = 1080 - logo_y - BOTTOM_PAD
+def layout_title(title, guest, text_x, available_height):
+    """Pick the largest title size whose text block fits available_height.
 
-    # Dynamic font sizing: start large, shrink until everything fits
+    Binary-searches the 2 px size steps between MIN_TITLE_SIZE and the
+    start size (fit is monotonic in size). Returns a dict with the chosen
+    sizes, wrapped lines, block height and whether it still overflows at
+    the minimum size.
+    """
     # Text block = title lines + optional guest line
     GUEST_FONT_RATIO = 0.47  # guest font size relative to title font
     LINE_HEIGHT_RATIO = 1.06  # line height relative to font size
     GUEST_GAP = 8  # pixels between last title line and guest
 
-    title_size = 76  # start size
+    START_TITLE_SIZE = 76
     MIN_TITLE_SIZE = 48  # never go below this
 
-    while title_size >= MIN_TITLE_SIZE:
-        title_font = ImageFont.truetype(FONT_BOLD, title_size)
+    # Wrap width scales slightly with font size to keep right side open
+    max_text_width = int((1920 - text_x) * 0.55)
+
+    def measure_block(title_size):
         guest_size = max(28, int(title_size * GUEST_FONT_RATIO))
         line_height = int(title_size * LINE_HEIGHT_RATIO)
-
-        # Wrap width scales slightly with font size to keep right side open
-        max_text_width = int((1920 - text_x) * 0.55)
-        lines = wrap_text(draw, title, title_font, max_text_width)
-
-        # Calculate total block height
-        title_block_height = len(lines) * line_height
+        lines = wrap_text(title, FONT_BOLD, title_size, max_text_width)
+        height = len(lines) * line_height
         if guest:
-            total_height = title_block_height + GUEST_GAP + guest_size
+            height += GUEST_GAP + guest_size
+        return {
+            "title_size": title_size,
+            "guest_size": guest_size,
+            "line_height": line_height,
+            "guest_gap": GUEST_GAP,
+            "lines": lines,
+            "height": height,
+            "overflow": height > available_height,
+        }
+
+    sizes = list(range(MIN_TITLE_SIZE, START_TITLE_SIZE + 1, 2))
+    best = None
+    lo, hi = 0, len(sizes) - 1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        block = measure_block(sizes[mid])
+        if block["overflow"]:
+            hi = mid - 1
         else:
-            total_height = title_block_height
+            best = block
+            lo = mid + 1
+    return best or measure_block(MIN_TITLE_SIZE)
 
-        if total_height <= available_height:
-            break  # it fits!
-        title_size -= 2  # shrink and retry
 
-    # Load final fonts at chosen size
-    title_font = ImageFont.truetype(FONT_BOLD, title_size)
-    guest_size = max(28, int(title_size * GUEST_FONT_RATIO))
-    guest_font = ImageFont.truetype(FONT_REG, guest_size)
-    line_height = int(title_size * LINE_HEIGHT_RATIO)
-    max_text_width = int((1920 - text_x) * 0.55)
-    lines = wrap_text(draw, title, title_font, max_text_width)
-
-    # Title top aligns with logo top
-    title_y = logo_y
-    for i, line in enumerate(lines):
-        draw.text(
-            (text_x, title_y + i * line_height),
-            line,
-            font=title_font,
-            fill=(255, 255, 255, 255),
-        )
+@lru_cache(maxsize=1)
+def thumbnail_geometry():
+    """Logo placement and the text area beside it.
+
+    Only reads the logo's header for its aspect ratio — no pixel decode —
+    so layout planning can run without touching any image data.
+    """
+    from PIL import Image
+
+    logo_height = 165
+    with Image.open(LOGO_PATH) as src:
+        logo_width = int(src.width * (logo_height / src.height))
+    logo_x = 40
+    BOTTOM_MARGIN = 45
+    logo_y = 1080 - logo_height - BOTTOM_MARGIN
+
+    # Available vertical space: from logo_y to (image bottom - bottom padding)
+    BOTTOM_PAD = 18  # minimum pixels below last text line
+    return {
+        "logo_height": logo_height,
+        "logo_x": logo_x,
+        "logo_y": logo_y,
+        "text_x": logo_x + logo_width + 22,
+        "available_height": 1080 - logo_y - BOTTOM_PAD,
+    }
+
+
+GRADIENT_START = int(1080 * 0.42)
 
-    # Guest name below title block
-    if guest:
-        guest_text = f"with {guest}"
-        guest_y = title_y + len(lines) * line_height + GUEST_GAP
-        draw.text(
-            (text_x, guest_y),
-            guest_text,
-            font=guest_font,
-            fill=(255, 255, 255, 210),
-        )
+
+@lru_cache(maxsize=1)
+def thumbnail_gradient():
+    """Per-row overlay alpha for the bottom gradient, GRADIENT_START..1080."""
+    alphas = []
+    for y in range(GRADIENT_START, 1080):
+        progress = (y - GRADIENT_START) / (1080 - GRADIENT_START)
+        alphas.append(min(int(225 * progress ** 1.2), 225))
+    return tuple(alphas)
+
+
+def composite_thumbnail(bg_path, title, guest, output_path, variants_dir=None):
+    """Composite background + gradient + logo + text into final thumbnail.
+
+    With `variants_dir`, every derived size is written there too (see
+    qe_render/variants.py), cut from the same in-memory render.
+    """
+    with profiler.span("composite_thumbnail", output=os.path.basename(output_path)):
+        return _composite_thumbnail(bg_path, title, guest, output_path, variants_dir)
+
+
+def _composite_thumbnail(bg_path, title, guest, output_path, variants_dir=None):
+    from PIL import ImageDraw
+    from qe_render import variants
+    from qe_render.backdrop import load_cover
+    from qe_render.overlay import shade
+    from qe_render.resource_cache import get_font, get_logo
+
+    # Background scaled to cover 1920x1080 and center-cropped, decoding
+    # and resampling only what survives the crop — see qe_render/backdrop.py
+    bg = load_cover(bg_path, (1920, 1080))
+
+    # Slightly darken + gradient overlay (starts at 42% from top for
+    # readable text area), fused into one multiply — see qe_render/overlay.py
+    with profiler.span("thumbnail.gradient"):
+        bg = shade(bg, 0.85, GRADIENT_START, thumbnail_gradient())
+
+    # Logo — ~15% of image height
+    geo = thumbnail_geometry()
+    logo_y = geo["logo_y"]
+    with profiler.span("thumbnail.logo"):
+        logo = get_logo(LOGO_PATH, geo["logo_height"])
+        bg.paste(logo, (geo["logo_x"], logo_y), logo)
+
+    draw = ImageDraw.Draw(bg)
+    text_x = geo["text_x"]
+    available_height = geo["available_height"]
+
+    # Dynamic font sizing: largest size where everything fits
+    with profiler.span("thumbnail.fit_text"):
+        layout = layout_title(title, guest, text_x, available_height)
+    title_size = layout["title_size"]
+    lines = layout["lines"]
+    line_height = layout["line_height"]
+    title_font = get_font(FONT_BOLD, title_size)
+    guest_font = get_font(FONT_REG, layout["guest_size"])
+
+    with profiler.span("thumbnail.draw_text"):
+        # Title top aligns with logo top
+        title_y = logo_y
+        for i, line in enumerate(lines):
+            draw.text(
+                (text_x, title_y + i * line_height),
+                line,
+                font=title_font,
+                fill=(255, 255, 255, 255),
+            )
+
+        # Guest name below title block
+        if guest:
+            guest_text = f"with {guest}"
+            guest_y = title_y + len(lines) * line_height + layout["guest_gap"]
+            draw.text(
+                (text_x, guest_y),
+                guest_text,
+                font=guest_font,
+                fill=(255, 255, 255, 210),
+            )
 
     if title_size < 76:
         print(f"  [note] Font scaled to {title_size}px ({len(lines)} lines)")
+    if layout["overflow"]:
+        print(f"  [warn] Title overflows by {layout['height'] - available_height}px at {title_size}px")
+
+    # Save — PNG if it fits YouTube's limit, else the best JPEG that does,
+    # so the file in final/ is upload-ready as-is
+    master = bg.convert("RGB")
+    with profiler.span("thumbnail.encode"):
+        result = encode_to_file(master, output_path, MAX_THUMBNAIL_BYTES, formats=("png", "jpeg"))
+    print(f"  [ok] Thumbnail saved: {os.path.basename(result.path)} ({result.describe()})")
+
+    if variants_dir:
+        stem = os.path.splitext(os.path.basename(output_path))[0]
+        with profiler.span("thumbnail.variants"):
+            written = variants.write_variants(master, stem, variants_dir)
+        print(f"  [ok] {len(written)} variant(s) saved to {os.path.basename(variants_dir)}/")
+    return result.path
+
+
+# ── Render cache ────────────────────────────────────────────────────
+_file_digests = {}
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents, memoized per run for shared inputs."""
+    if path not in _file_digests:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        _file_digests[path] = h.hexdigest()
+    return _file_digests[path]
+
+
+@lru_cache(maxsize=1)
+def layout_fingerprint():
+    """Digest of the code and settings every thumbnail shares.
+
+    Only what is listed here counts: the source of the compositing, layout,
+    overlay, logo and encoder functions (so constants defined inside them
+    are covered), plus the module-level settings they read — the gradient,
+    the byte budget, the quality ladder and the format options. A new
+    input to the render must be added here or cached thumbnails go stale.
+    """
+    import inspect
+    from qe_render import encoder, overlay
+    from qe_render.backdrop import cover_box, load_cover
+    from qe_render.resource_cache import get_logo
+
+    h = hashlib.sha256()
+    for part in (
+        file_digest(FONT_BOLD),
+        file_digest(FONT_REG),
+        file_digest(LOGO_PATH),
+        inspect.getsource(_composite_thumbnail),
+        inspect.getsource(load_cover),
+        inspect.getsource(cover_box),
+        inspect.getsource(thumbnail_geometry),
+        inspect.getsource(layout_title),
+        inspect.getsource(wrap_text),
+        inspect.getsource(get_logo),
+        inspect.getsource(overlay.row_factor),
+        inspect.getsource(overlay.shade_mask),
+        inspect.getsource(overlay.shade),
+        repr((GRADIENT_START, thumbnail_gradient())),
+        inspect.getsource(encoder._encode_once),
+        inspect.getsource(encoder.encode),
+        repr((MAX_THUMBNAIL_BYTES, encoder.MIN_QUALITY, encoder.MAX_QUALITY,
+              sorted(encoder.FORMATS.items()))),
+    ):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def render_key(bg_path, title, guest, with_variants=True):
+    """Hash everything that affects a final thumbnail (and its variants):
+    the background, the text, layout_fingerprint() and, when variants are
+    written, variants.fingerprint()."""
+    from qe_render import variants
+
+    h = hashlib.sha256()
+    for part in (
+        file_digest(bg_path),
+        title,
+        guest or "",
+        layout_fingerprint(),
+        variants.fingerprint() if with_variants else "",
+    ):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def load_render_cache():
+    """Load {episode num: render key} from the cache manifest."""
+    try:
+        with open(RENDER_CACHE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_render_cache(cache):
+    with open(RENDER_CACHE_PATH, "w") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def plan_episode(ep):
+    """Layout-only dry run for one episode: no background, no encode."""
+    geo = thumbnail_geometry()
+    layout = layout_title(ep["title"], ep["guest"], geo["text_x"], geo["available_height"])
+    size = layout["title_size"]
+    space = measure(FONT_BOLD, size, " ")
+    max_width = int((1920 - geo["text_x"]) * 0.55)
+    widths = [
+        round(sum(measure(FONT_BOLD, size, w) for w in line.split())
+              + space * (len(line.split()) - 1))
+        for line in layout["lines"]
+    ]
+    return {
+        "num": ep["num"],
+        "title": ep["title"],
+        "guest": ep["guest"],
+        "title_size": size,
+        "guest_size": layout["guest_size"] if ep["guest"] else None,
+        "scaled": size < 76,
+        "lines": layout["lines"],
+        "line_widths": widths,
+        "max_width": max_width,
+        "block_height": layout["height"],
+        "available_height": geo["available_height"],
+        "overflow": layout["overflow"],
+        "too_wide": any(w > max_width for w in widths),
+    }
+
+
+def prefetch_backgrounds(episodes, cache, client, jobs, candidates=1):
+    """Generate missing backgrounds concurrently on a bounded thread pool.
+
+    Returns {num: path or None} — each episode's background, if available.
+    """
+    results = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(
+                episode_background,
+                ep,
+                cache,
+                client,
+                candidates=candidates,
+                tag=f"ep-{ep['num']} ",
+            ): ep["num"]
+            for ep in episodes
+        }
+        for future in as_completed(futures):
+            num = futures[future]
+            try:
+                results[num] = future.result()
+            except Exception as e:
+                print(f"  ep-{num} [error] Exception: {e}")
+                results[num] = None
+            sys.stdout.flush()
+    return results
+
+
+def _composite_job(num, bg_path, title, guest, output_path, variants_dir):
+    """Process-pool worker: composite one thumbnail, capturing its log output.
+
+    Returns (num, ok, seconds, log, spans) so the parent can report in one
+    place; spans are the worker's profiler records, if profiling.
+    """
+    log = StringIO()
+    start = time.perf_counter()
+    ok = True
+    with contextlib.redirect_stdout(log):
+        try:
+            composite_thumbnail(bg_path, title, guest, output_path, variants_dir)
+        except Exception as e:
+            print(f"  [FAILED] Compositing error: {e}")
+            ok = False
+    return num, ok, time.perf_counter() - start, log.getvalue(), profiler.drain()
+
+
+def composite_many(tasks, workers):
+    """Composite (num, bg_path, title, guest, output_path, variants_dir) tasks
+    across processes.
+
+    Yields (num, ok, seconds, log) tuples as episodes finish; worker spans
+    are merged into this process's profile.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=profiler.reset,
+                             initargs=(profiler.enabled(),)) as pool:
+        futures = [pool.submit(_composite_job, *task) for task in tasks]
+        for future in as_completed(futures):
+            *result, spans = future.result()
+            profiler.absorb(spans)
+            yield tuple(result)
 
-    # Save
-    bg = bg.convert("RGB")
-    bg.save(output_path, "PNG")
-    print(f"  [ok] Thumbnail saved: {os.path.basename(output_path)}")
+
+def use_state_dir(root):
+    """Send outputs, backgrounds and the render cache to `root` instead of
+    final/ and backgrounds/ — used for runs against a local stub API."""
+    global OUTPUT_DIR, BG_DIR, RENDER_CACHE_PATH, VARIANTS_DIR
+    OUTPUT_DIR = os.path.join(root, "final")
+    BG_DIR = os.path.join(root, "backgrounds")
+    RENDER_CACHE_PATH = os.path.join(OUTPUT_DIR, ".render-cache.json")
+    VARIANTS_DIR = os.path.join(OUTPUT_DIR, "variants")
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    os.makedirs(BG_DIR, exist_ok=True)
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate QE podcast thumbnails")
+    parser.add_argument("episode", nargs="?",
+                        help="Episode or selection expression (e.g. '05', '00-teaser', '03-07,tag:ai')")
+    add_selection_arguments(parser)
+    parser.add_argument("--jobs", type=int, default=1, help="Concurrent background API calls (default: 1)")
+    parser.add_argument("--rate", type=positive_rate, default=API_RATE, help=f"Max background API calls per second (default: {API_RATE:.2f})")
+    parser.add_argument("--burst", type=positive_burst, default=API_BURST, help=f"API calls allowed back-to-back before throttling (default: {API_BURST})")
+    parser.add_argument("--workers", type=int, default=1, help="Compositing processes; 0 = one per CPU core (default: 1)")
+    parser.add_argument("--force", action="store_true", help="Ignore the render cache and re-composite everything")
+    parser.add_argument("--candidates", type=int, default=1, help="Background candidates to keep per prompt (default: 1)")
+    parser.add_argument("--plan", action="store_true", help="Print the title layout for each episode as JSON; render nothing")
+    parser.add_argument("--no-variants", action="store_true",
+                        help="Skip the derived YouTube/OG/square/srcset sizes in final/variants/")
+    parser.add_argument("--base-url", default=OPENROUTER_BASE_URL,
+                        help="OpenRouter-compatible API base URL (default: $OPENROUTER_BASE_URL or OpenRouter)")
+    parser.add_argument("--profile", nargs="?", const="", metavar="TRACE",
+                        help="Time each render stage; print p50/p95 per stage and write a Chrome trace "
+                             "(default: .cache/profile/thumbnails-<time>.trace.json)")
+    args = parser.parse_args()
+    if args.profile is not None:
+        profiler.enable()
+
+    if args.base_url != DEFAULT_BASE_URL:
+        from qe_render.sandbox import sandbox_dir
+        sandbox = sandbox_dir(args.base_url)
+        if sandbox:
+            use_state_dir(sandbox)
+
+    try:
+        episodes = select_episodes(
+            CATALOG, args.episode, args,
+            lambda ep: find_artifact(os.path.join(OUTPUT_DIR, f"ep-{ep['num']}-thumbnail.png")),
+        )
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    if not episodes:
+        print("No episodes match that selection.")
+        sys.exit(1 if args.episode else 0)
+
+    if args.plan:
+        report = [plan_episode(ep) for ep in episodes]
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        problems = [r["num"] for r in report if r["overflow"] or r["too_wide"]]
+        scaled = [r["num"] for r in report if r["scaled"]]
+        print(f"Planned {len(report)} episode(s): {len(scaled)} scaled, "
+              f"{len(problems)} overflowing{': ' + ', '.join(problems) if problems else ''}",
+              file=sys.stderr)
+        sys.exit(1 if problems else 0)
+
     if not OPENROUTER_API_KEY:
         print("ERROR: Set OPENROUTER_API_KEY environment variable")
         sys.exit(1)
 
-    # Filter to a single episode if argument provided
-    if len(sys.argv) > 1:
-        target = sys.argv[1]
-        episodes = [e for e in EPISODES if e["num"] == target]
-        if not episodes:
-            print(f"ERROR: Episode {target} not found in EPISODES list")
-            sys.exit(1)
-    else:
-        episodes = EPISODES
+    from qe_render import variants
+
+    jobs = max(1, args.jobs)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    limiter = TokenBucket(args.rate, args.burst)
+    client = OpenRouterClient(OPENROUTER_API_KEY, limiter=limiter, pool_size=jobs, base_url=args.base_url)
+    bg_cache = BackgroundCache(BG_DIR)
+    candidates = max(1, args.candidates)
 
     print(f"Generating {len(episodes)} thumbnail(s)...")
     print(f"Backgrounds: {BG_DIR}")
     print(f"Final output: {OUTPUT_DIR}")
+    if args.base_url != DEFAULT_BASE_URL:
+        print(f"API: {args.base_url}")
+    if jobs > 1:
+        print(f"Concurrency: {jobs} jobs, {args.rate:.2f} calls/s (burst {args.burst})")
+    if workers > 1:
+        print(f"Compositing: {workers} processes")
+    variants_dir = None if args.no_variants else VARIANTS_DIR
+    if variants_dir:
+        print(f"Variants: {variants_dir}")
+        unsupported = variants.skipped_formats()
+        if unsupported:
+            print(f"  [note] This Pillow build can't write {', '.join(unsupported).upper()} — skipping those variants")
     print()
 
     failed = []
+    pending = []  # composite tasks deferred to the process pool
+    render_cache = load_render_cache()
+    pending_keys = {}
+    built, stale, cached = [], [], []
+
+    # Concurrent mode: fetch every missing background first, then composite
+    bg_ready = None
+    if jobs > 1:
+        print(f"Fetching backgrounds ({jobs} jobs)...")
+        bg_ready = prefetch_backgrounds(episodes, bg_cache, client, jobs, candidates)
+        print()
 
     for i, ep in enumerate(episodes):
         num = ep["num"]
@@ -641,37 +685,94 @@ def main():
             label += f" | with {guest}"
         print(label)
 
-        bg_path = os.path.join(BG_DIR, f"ep-{num}-bg.png")
         final_path = os.path.join(OUTPUT_DIR, f"ep-{num}-thumbnail.png")
 
-        # Generate background
-        if not generate_background(ep["prompt"], bg_path):
+        # Generate background (or reuse the one cached for this exact prompt)
+        if bg_ready is not None:
+            bg_path = bg_ready[num]
+        else:
+            bg_path = episode_background(ep, bg_cache, client, candidates)
+        if not bg_path:
             print(f"  [FAILED] Could not generate background")
             failed.append(num)
             continue
 
+        # Skip compositing when nothing that affects the output changed
+        key = render_key(bg_path, title, guest, with_variants=bool(variants_dir))
+        previous = render_cache.get(num)
+        existing = find_artifact(final_path)
+        stem = os.path.splitext(os.path.basename(final_path))[0]
+        complete = not variants_dir or not variants.missing(variants_dir, stem)
+        if not args.force and previous == key and existing and complete:
+            print(f"  [cached] Thumbnail up to date: {os.path.basename(existing)}")
+            cached.append(num)
+            continue
+
         # Composite final thumbnail
+        if workers > 1:
+            pending.append((num, bg_path, title, guest, final_path, variants_dir))
+            pending_keys[num] = key, previous
+            continue
         try:
-            composite_thumbnail(bg_path, title, guest, final_path)
+            composite_thumbnail(bg_path, title, guest, final_path, variants_dir)
         except Exception as e:
             print(f"  [FAILED] Compositing error: {e}")
             failed.append(num)
             continue
+        (stale if previous else built).append(num)
+        render_cache[num] = key
+        save_render_cache(render_cache)
 
         sys.stdout.flush()
 
-        # Rate limit: small delay between API calls
-        if i < len(episodes) - 1 and not os.path.exists(
-            os.path.join(BG_DIR, f"ep-{episodes[i+1]['num']}-bg.png")
-        ):
-            time.sleep(3)
+    if pending:
+        print()
+        print(f"Compositing {len(pending)} thumbnail(s) on {workers} processes...")
+        wall_start = time.perf_counter()
+        cpu_total = 0.0
+        for num, ok, seconds, log in composite_many(pending, workers):
+            cpu_total += seconds
+            print(f"Episode {num} ({seconds:.2f}s)")
+            print(log, end="")
+            if ok:
+                key, previous = pending_keys[num]
+                (stale if previous else built).append(num)
+                render_cache[num] = key
+            else:
+                failed.append(num)
+            sys.stdout.flush()
+        save_render_cache(render_cache)
+        wall = time.perf_counter() - wall_start
+        print(f"Composited in {wall:.1f}s wall ({cpu_total:.1f}s summed across episodes)")
+
+    if variants_dir:
+        manifest = variants.write_manifest(
+            variants_dir, {ep["num"]: f"ep-{ep['num']}-thumbnail" for ep in EPISODES})
+        print(f"Variant manifest: {manifest}")
+
+    # BlurHash / colour / preview placeholders for the site (placeholders.py)
+    import importlib.util
+    if importlib.util.find_spec("numpy") is None:
+        print("Placeholders: skipped (pip install numpy to enable)")
+    else:
+        import placeholders
+        computed, unchanged = placeholders.update(OUTPUT_DIR, EPISODES)
+        print(f"Placeholders: {computed} computed, {unchanged} unchanged → "
+              f"{os.path.join(OUTPUT_DIR, placeholders.MANIFEST_NAME)}")
+
+    evicted = bg_cache.evict()
+    if evicted:
+        print(f"Background cache: evicted {len(evicted)} file(s): {', '.join(evicted)}")
 
     print()
     print("=" * 50)
     print(f"Done! {len(episodes) - len(failed)}/{len(episodes)} thumbnail(s) generated.")
+    print(f"Render cache: {len(built)} built, {len(stale)} stale (rebuilt), {len(cached)} cached")
     if failed:
         print(f"Failed: {', '.join(failed)}")
     print(f"Output folder: {OUTPUT_DIR}")
+    if args.profile is not None:
+        profiler.report(args.profile or None, "thumbnails")
     sys.stdout.flush()
 
 
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Low-quality image placeholders for every thumbnail in final/.
+
+For each episode thumbnail this stores, in final/placeholders.json:
+
+  blurhash  a BlurHash string (4x3 components) for a blurred stand-in
+  color     the dominant colour, as "#rrggbb", for a flat fill
+  preview   a 16x9 WebP as a base64 data: URL, to inline as the <img> src
+  width, height  of the full thumbnail, so the page can reserve space
+
+Every thumbnail is reduced to a SAMPLE-sized RGB array once. The
+per-image work is then batched in NumPy across the whole run:
+  - the BlurHash DCT is one einsum
+  - the dominant colour is one bincount over quantized pixels
+  - the 16 px preview is a block mean
+Only decoding (on a thread pool) and the tiny WebP encode remain per
+image. Decoding uses the 320w WebP variant (see qe_render/variants.py)
+when it is at least as new as the thumbnail, since a 1920x1080 PNG costs
+~30x more to decode.
+
+Reruns only touch changed thumbnails. Each entry remembers its
+thumbnail's size, mtime and SHA-256, and a stat match skips the file
+without reading it.
+
+Requires NumPy (pip install numpy). generate-thumbnails.py runs this
+stage after rendering when NumPy is installed.
+
+Usage:
+  python placeholders.py             # Update final/placeholders.json
+  python placeholders.py --force     # Recompute every entry
+  python placeholders.py --final .cache/stub/127.0.0.1-8780/final
+"""
+
+import os
+import io
+import json
+import time
+import base64
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+from qe_render.backdrop import load_cover
+from catalog import load_catalog
+from qe_render.encoder import find_artifact
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FINAL_DIR = os.path.join(BASE_DIR, "final")
+MANIFEST_NAME = "placeholders.json"
+SAMPLE = (64, 36)  # pixels every thumbnail is reduced to before hashing
+PREVIEW = (16, 9)
+COMPONENTS = (4, 3)  # BlurHash x/y components; 4x3 suits 16:9
+PREVIEW_QUALITY = 50
+COLOR_BITS = 3  # per-channel bits when binning colours for the dominant one
+
+BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+# ── Vectorized stages (batch of N samples, shape N×H×W×3 uint8) ─────
+def srgb_to_linear(values):
+    v = values / 255.0
+    return np.where(v <= 0.04045, v / 12.92, ((v + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb(values):
+    v = np.clip(values, 0.0, 1.0)
+    srgb = np.where(v <= 0.0031308, v * 12.92, 1.055 * v ** (1 / 2.4) - 0.055)
+    return np.trunc(srgb * 255 + 0.5).astype(np.int64)
+
+
+def blurhash_factors(batch, components=COMPONENTS):
+    """DCT factors for every image at once: shape N × (cy·cx) × 3, in
+    BlurHash order (y-major)."""
+    n, h, w, _ = batch.shape
+    cx, cy = components
+    linear = srgb_to_linear(batch.astype(np.float64))
+    basis_x = np.cos(np.pi * np.arange(cx)[:, None] * np.arange(w)[None, :] / w)  # cx × w
+    basis_y = np.cos(np.pi * np.arange(cy)[:, None] * np.arange(h)[None, :] / h)  # cy × h
+    factors = np.einsum("jy,ix,nyxc->njic", basis_y, basis_x, linear) / (w * h)
+    norm = np.full((cy, cx), 2.0)
+    norm[0, 0] = 1.0
+    return (factors * norm[None, :, :, None]).reshape(n, cy * cx, 3)
+
+
+def encode83(value, length):
+    return "".join(BASE83[(value // 83 ** (length - i)) % 83] for i in range(1, length + 1))
+
+
+def blurhashes(batch, components=COMPONENTS):
+    """BlurHash strings for a batch; quantization is vectorized, only the
+    base83 spelling is per image."""
+    factors = blurhash_factors(batch, components)
+    dc, ac = factors[:, 0], factors[:, 1:]
+    size_flag = (components[0] - 1) + (components[1] - 1) * 9
+
+    quant_max = np.floor(np.clip(np.floor(np.abs(ac).max(axis=(1, 2)) * 166 - 0.5), 0, 82)).astype(np.int64)
+    max_value = (quant_max + 1) / 166
+    dc_rgb = linear_to_srgb(dc)
+    dc_value = (dc_rgb[:, 0] << 16) + (dc_rgb[:, 1] << 8) + dc_rgb[:, 2]
+    scaled = ac / max_value[:, None, None]
+    quant = np.floor(np.clip(np.floor(np.sign(scaled) * np.sqrt(np.abs(scaled)) * 9 + 9.5), 0, 18)).astype(np.int64)
+    ac_value = quant[..., 0] * 19 * 19 + quant[..., 1] * 19 + quant[..., 2]
+
+    return [
+        encode83(size_flag, 1) + encode83(int(quant_max[k]), 1) + encode83(int(dc_value[k]), 4)
+        + "".join(encode83(int(v), 2) for v in ac_value[k])
+        for k in range(len(batch))
+    ]
+
+
+def dominant_colors(batch, bits=COLOR_BITS):
+    """Mean colour of each image's most populated colour bin, N × 3 uint8.
+    One bincount covers the whole batch: each image's bins are offset into
+    its own range."""
+    n = len(batch)
+    pixels = batch.reshape(n, -1, 3).astype(np.int64)
+    q = pixels >> (8 - bits)
+    bins = (q[..., 0] << (2 * bits)) | (q[..., 1] << bits) | q[..., 2]
+    nbins = 1 << (3 * bits)
+    flat = (bins + np.arange(n)[:, None] * nbins).ravel()
+    counts = np.bincount(flat, minlength=n * nbins).reshape(n, nbins)
+    sums = np.stack([
+        np.bincount(flat, weights=pixels[..., c].ravel(), minlength=n * nbins).reshape(n, nbins)
+        for c in range(3)
+    ], axis=-1)
+    top = counts.argmax(axis=1)
+    rows = np.arange(n)
+    return np.round(sums[rows, top] / counts[rows, top][:, None]).astype(np.uint8)
+
+
+def previews(batch, size=PREVIEW):
+    """Block-mean downsample of every sample to `size` (an exact divisor)."""
+    n, h, w, _ = batch.shape
+    fy, fx = h // size[1], w // size[0]
+    return batch.reshape(n, size[1], fy, size[0], fx, 3).mean(axis=(2, 4)).round().astype(np.uint8)
+
+
+def data_url(pixels):
+    buf = io.BytesIO()
+    Image.fromarray(pixels, "RGB").save(buf, "WEBP", quality=PREVIEW_QUALITY)
+    return "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+# ── Sources ─────────────────────────────────────────────────────────
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def sample_source(thumb_path, final_dir):
+    """Cheapest up-to-date image to sample `thumb_path` from."""
+    stem = os.path.splitext(os.path.basename(thumb_path))[0]
+    small = os.path.join(final_dir, "variants", f"{stem}-320w.webp")
+    try:
+        if os.path.getmtime(small) >= os.path.getmtime(thumb_path):
+            return small
+    except OSError:
+        pass
+    return thumb_path
+
+
+def load_sample(thumb_path, final_dir):
+    return np.asarray(load_cover(sample_source(thumb_path, final_dir), SAMPLE, stage="placeholder"), dtype=np.uint8)
+
+
+# ── Manifest ────────────────────────────────────────────────────────
+def load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def update(final_dir=FINAL_DIR, episodes=None, force=False):
+    """Bring final/placeholders.json up to date; returns (computed, unchanged)."""
+    episodes = episodes if episodes is not None else load_catalog().episodes
+    path = os.path.join(final_dir, MANIFEST_NAME)
+    settings = {"sample": list(SAMPLE), "preview": list(PREVIEW), "components": list(COMPONENTS),
+                "preview_quality": PREVIEW_QUALITY, "color_bits": COLOR_BITS}
+    manifest = load_manifest(path)
+    previous = manifest.get("episodes", {}) if manifest.get("settings") == settings and not force else {}
+
+    entries, todo = {}, []
+    for ep in episodes:
+        thumb = find_artifact(os.path.join(final_dir, f"ep-{ep['num']}-thumbnail.png"))
+        if not thumb:
+            continue
+        st = os.stat(thumb)
+        old = previous.get(ep["num"])
+        source = {"file": os.path.basename(thumb), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        if old and all(old["source"].get(k) == v for k, v in source.items()):
+            entries[ep["num"]] = old  # stat fast path: unchanged, never opened
+            continue
+        source["sha256"] = file_sha256(thumb)
+        if old and old["source"].get("sha256") == source["sha256"] and old["source"]["file"] == source["file"]:
+            entries[ep["num"]] = dict(old, source=source)  # touched, same bytes
+            continue
+        todo.append((ep["num"], thumb, source))
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:  # decoders release the GIL
+            batch = np.stack(list(pool.map(lambda item: load_sample(item[1], final_dir), todo)))
+        hashes = blurhashes(batch)
+        colors = dominant_colors(batch)
+        small = previews(batch)
+        for k, (num, thumb, source) in enumerate(todo):
+            with Image.open(thumb) as img:
+                width, height = img.size
+            entries[num] = {
+                "blurhash": hashes[k],
+                "color": "#{:02x}{:02x}{:02x}".format(*colors[k]),
+                "preview": data_url(small[k]),
+                "width": width,
+                "height": height,
+                "source": source,
+            }
+
+    new_manifest = {"version": 1, "settings": settings, "episodes": entries}
+    if new_manifest != manifest:
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(new_manifest, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp, path)
+    return len(todo), len(entries) - len(todo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute BlurHash/colour/preview placeholders for final/")
+    parser.add_argument("--final", default=FINAL_DIR, help="Folder of rendered thumbnails (default: final/)")
+    parser.add_argument("--force", action="store_true", help="Recompute every entry")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    computed, unchanged = update(args.final, force=args.force)
+    print(f"Placeholders: {computed} computed, {unchanged} unchanged "
+          f"({(time.perf_counter() - start) * 1000:.0f} ms) → {os.path.join(args.final, MANIFEST_NAME)}")
+
+
+if __name__ == "__main__":
+    main()
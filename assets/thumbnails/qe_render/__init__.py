@@ -0,0 +1,27 @@
+"""
+Rendering and API code shared by generate-thumbnails.py, generate-banner.py
+and upload-youtube-thumbnails.py (and the smaller tools beside them).
+
+  openrouter        image-generation client and generate_background()
+  youtube           YouTube Data API credentials and service construction
+  background_cache  prompt-keyed cache of generated backgrounds
+  backdrop          background loading: decode and resample only the crop
+  overlay           fused darken + gradient pass
+  resource_cache    fonts and scaled logo renditions
+  variants          derived sizes and formats of each thumbnail
+  encoder           size-budgeted in-memory encoding
+  profiler          --profile stage timing
+  sandbox           state directories for runs against the local stubs
+
+Import rule: Pillow, requests and the Google client libraries take
+25-300 ms each to import, more than the rest of a --help, --plan or
+--dry-run run. The modules the scripts import at startup (openrouter,
+youtube, background_cache, encoder, profiler, sandbox) therefore import
+those libraries inside the functions that use them. backdrop, overlay,
+resource_cache and variants need Pillow for everything they do, so they
+import it at the top, and the scripts import them only on paths that
+render. `python benchmark.py --startup` times each entry point and
+records its imports, so a new top-level import shows up as a regression.
+
+This package re-exports nothing; import the submodule you need.
+"""
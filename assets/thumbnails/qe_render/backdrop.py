@@ -0,0 +1,68 @@
+"""
+Background loading for generate-thumbnails.py and generate-banner.py.
+
+Both compositors need the background scaled to cover their canvas and
+center-cropped. Doing that as open → convert → resize the whole image →
+crop decodes, copies and resamples pixels that the crop then throws away.
+load_cover() produces the same framing more cheaply:
+
+  1. cover_box() works out the crop in source coordinates
+  2. JPEG sources are decoded at reduced size via Image.draft() — libjpeg's
+     DCT scaling (1/2, 1/4, 1/8) never drops below the target resolution
+  3. only that box is resampled, with reducing_gap so large downscales
+     (e.g. a 4K PNG) start with a cheap integer reduce() before LANCZOS
+  4. the mode conversion runs on the output-sized image, not the source
+
+The output matches the old path to within resampling rounding.
+"""
+
+import math
+from PIL import Image
+from . import profiler
+
+# reduce() by integer factors until within this factor of the target, then
+# LANCZOS; 3.0 is indistinguishable from a full LANCZOS per Pillow's docs
+REDUCING_GAP = 3.0
+
+# Modes Image.resize handles natively; anything else (P, 1, CMYK, I;16...)
+# is converted before resampling
+RESAMPLE_MODES = ("RGB", "RGBA", "L", "LA")
+
+
+def cover_box(src_size, size, anchor=(0.5, 0.5)):
+    """Source-space (left, top, right, bottom) kept by scaling `src_size`
+    to cover `size` and cropping — the same framing as resizing to
+    int(w * scale) × int(h * scale) and cropping the middle. `anchor` moves
+    the crop: (0, 0) keeps the top-left, (0.5, 1) the bottom edge."""
+    w, h = src_size
+    target_w, target_h = size
+    scale = max(target_w / w, target_h / h)
+    left = int((int(w * scale) - target_w) * anchor[0])
+    top = int((int(h * scale) - target_h) * anchor[1])
+    return (left / scale, top / scale, (left + target_w) / scale, (top + target_h) / scale)
+
+
+def load_cover(path, size, mode="RGB", reducing_gap=REDUCING_GAP, stage="background"):
+    """Open `path` scaled to cover `size` and center-cropped to it, in `mode`.
+
+    Profiled as `stage`.decode and `stage`.resample."""
+    with Image.open(path) as img:
+        with profiler.span(f"{stage}.decode"):
+            src_size = img.size
+            if img.format == "JPEG":
+                scale = max(size[0] / img.width, size[1] / img.height)
+                img.draft("RGB", (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+            img.load()
+        # Rescale the box if draft() decoded at a reduced size
+        fx, fy = img.width / src_size[0], img.height / src_size[1]
+        left, top, right, bottom = cover_box(src_size, size)
+        box = (left * fx, top * fy, right * fx, bottom * fy)
+
+        with profiler.span(f"{stage}.resample"):
+            if img.mode not in RESAMPLE_MODES:
+                has_alpha = "transparency" in img.info or img.mode in ("PA", "RGBa")
+                img = img.convert("RGBA" if has_alpha else "RGB")
+            out = img.resize(size, Image.LANCZOS, box=box, reducing_gap=reducing_gap)
+    if out.mode != mode:
+        out = out.convert(mode)
+    return out
@@ -0,0 +1,220 @@
+"""
+Prompt-keyed cache for AI-generated background images.
+
+Shared by generate-thumbnails.py and generate-banner.py. A background is
+keyed by (model, full prompt text, generation params) — editing a prompt or
+PROMPT_SUFFIX changes the key, so the stale image is regenerated instead of
+silently reused, while unchanged prompts are never re-fetched.
+
+State lives in backgrounds/manifest.json:
+  entries[key] = {
+      "name":       "ep-05-bg",          # slot the key was generated for
+      "model", "prompt", "params",       # everything that went into the key
+      "candidates": [{"file", "bytes", "created"}, ...],
+      "selected":   0,                   # candidate used for compositing
+      "last_used":  <unix time>,
+      "superseded": false,               # true once the slot's prompt changed
+  }
+
+Several candidates can be held per key (pick one by editing "selected").
+Eviction keeps backgrounds/ under a size budget and drops superseded
+entries that have not been used for a while; the selected candidate of a
+live entry is never evicted.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+MANIFEST_NAME = "manifest.json"
+MAX_CACHE_BYTES = 100_000_000  # size budget for backgrounds/
+MAX_STALE_AGE_DAYS = 30  # superseded entries unused this long are dropped
+
+
+def cache_key(model, prompt, params=None):
+    """Stable hash of everything sent to the image model."""
+    blob = json.dumps(
+        {"model": model, "prompt": prompt, "params": params or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class BackgroundCache:
+    """Manifest-backed background store rooted at a directory. Thread-safe."""
+
+    def __init__(self, root, max_bytes=MAX_CACHE_BYTES, max_stale_age_days=MAX_STALE_AGE_DAYS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_stale_age = max_stale_age_days * 86400
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        self.lock = threading.RLock()
+        os.makedirs(root, exist_ok=True)
+        self.entries = self._load()
+
+    # ── Manifest I/O ────────────────────────────────────────────────
+    def _load(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f).get("entries", {})
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        with self.lock:
+            tmp = self.manifest_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"version": 1, "entries": self.entries}, f, indent=2, sort_keys=True)
+                f.write("\n")
+            os.replace(tmp, self.manifest_path)
+
+    def _path(self, filename):
+        return os.path.join(self.root, filename)
+
+    # ── Lookup / insert ─────────────────────────────────────────────
+    def _entry(self, name, key, model, prompt, params, legacy_path):
+        """Return the entry for `key`, creating it if needed. Caller holds the lock."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            return entry
+
+        known_slot = any(e["name"] == name for e in self.entries.values())
+        entry = {
+            "name": name,
+            "model": model,
+            "prompt": prompt,
+            "params": params or {},
+            "candidates": [],
+            "selected": 0,
+            "last_used": time.time(),
+            "superseded": False,
+        }
+        # First run against a pre-manifest backgrounds/ dir: adopt the
+        # existing file for this slot rather than paying to regenerate it.
+        # A file outside the cache (the banner's) is copied in, so eviction
+        # never touches it.
+        if not known_slot and legacy_path and os.path.exists(legacy_path):
+            if not self._owns(legacy_path):
+                adopted = self._path(f"{name}-{key[:8]}-1.png")
+                shutil.copy2(legacy_path, adopted)
+                legacy_path = adopted
+            entry["candidates"].append(self._describe(legacy_path))
+            entry["adopted"] = True
+        self.entries[key] = entry
+        return entry
+
+    def _owns(self, path):
+        """True if `path` lies inside the cache directory."""
+        root = os.path.abspath(self.root)
+        return os.path.commonpath([root, os.path.abspath(path)]) == root
+
+    def _describe(self, path):
+        return {
+            "file": os.path.relpath(path, self.root),
+            "bytes": os.path.getsize(path),
+            "created": time.time(),
+        }
+
+    def _live_candidates(self, entry):
+        """Drop candidates whose files were deleted by hand."""
+        entry["candidates"] = [
+            c for c in entry["candidates"] if os.path.exists(self._path(c["file"]))
+        ]
+        if entry["selected"] >= len(entry["candidates"]):
+            entry["selected"] = 0
+        return entry["candidates"]
+
+    def get_or_generate(self, name, model, prompt, generate, params=None,
+                        candidates=1, legacy_path=None):
+        """Return the selected background for this prompt, generating on a miss.
+
+        `generate(output_path) -> bool` is called once per missing candidate.
+        Returns (path, hit) — path is None if nothing could be generated.
+        """
+        key = cache_key(model, prompt, params)
+        with self.lock:
+            entry = self._entry(name, key, model, prompt, params, legacy_path)
+            have = len(self._live_candidates(entry))
+            hit = have >= candidates
+
+        for i in range(have, candidates):
+            path = self._path(f"{name}-{key[:8]}-{i + 1}.png")
+            if not generate(path):
+                break
+            with self.lock:
+                entry["candidates"].append(self._describe(path))
+                self.save()
+
+        with self.lock:
+            if not entry["candidates"]:
+                return None, False
+            entry["last_used"] = time.time()
+            for other_key, other in self.entries.items():
+                if other["name"] == name:
+                    other["superseded"] = other_key != key
+            selected = entry["candidates"][entry["selected"]]["file"]
+            self.save()
+        return self._path(selected), hit
+
+    # ── Eviction ────────────────────────────────────────────────────
+    def evict(self):
+        """Apply the age and size policies. Returns the list of removed files.
+
+        Order: superseded entries past the age limit, then (while over
+        budget) superseded entries least-recently-used first, then
+        unselected candidates of live entries. Selected candidates of live
+        entries are never removed.
+        """
+        removed = []
+        now = time.time()
+        with self.lock:
+            def drop(key, entry, index=None):
+                doomed = entry["candidates"] if index is None else [entry["candidates"][index]]
+                for c in doomed:
+                    path = self._path(c["file"])
+                    # Manifests from before adoption copied files in may
+                    # point outside the cache; forget those, never delete them
+                    if self._owns(path) and os.path.exists(path):
+                        os.remove(path)
+                    removed.append(c["file"])
+                if index is None:
+                    del self.entries[key]
+                else:
+                    del entry["candidates"][index]
+                    if entry["selected"] > index:
+                        entry["selected"] -= 1
+
+            stale = sorted(
+                ((k, e) for k, e in self.entries.items() if e.get("superseded")),
+                key=lambda item: item[1]["last_used"],
+            )
+            for key, entry in stale:
+                if now - entry["last_used"] > self.max_stale_age:
+                    drop(key, entry)
+
+            for key, entry in stale:
+                if self.total_bytes() <= self.max_bytes:
+                    break
+                if key in self.entries:
+                    drop(key, entry)
+
+            live = sorted(
+                ((k, e) for k, e in self.entries.items() if not e.get("superseded")),
+                key=lambda item: item[1]["last_used"],
+            )
+            for key, entry in live:
+                while self.total_bytes() > self.max_bytes and len(entry["candidates"]) > 1:
+                    spare = next(i for i in reversed(range(len(entry["candidates"])))
+                                 if i != entry["selected"])
+                    drop(key, entry, spare)
+
+            if removed:
+                self.save()
+        return removed
+
+    def total_bytes(self):
+        return sum(c["bytes"] for e in self.entries.values() for c in e["candidates"])
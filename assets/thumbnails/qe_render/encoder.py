@@ -0,0 +1,138 @@
+"""
+Size-budgeted image encoder shared by generate-thumbnails.py,
+generate-banner.py and upload-youtube-thumbnails.py.
+
+Every candidate encode happens in a BytesIO buffer. Formats are tried in
+preference order: a lossless format wins if it fits the byte budget, and
+for lossy formats the highest quality that fits is found by binary search
+(~4 encodes instead of a fixed 95/90/85/80 ladder). Only the winning bytes
+are ever written to disk, once.
+"""
+
+import os
+from io import BytesIO
+
+FORMATS = {
+    "png": {"pil": "PNG", "mimetype": "image/png", "ext": ".png", "lossy": False},
+    "jpeg": {"pil": "JPEG", "mimetype": "image/jpeg", "ext": ".jpg", "lossy": True},
+    "webp": {"pil": "WEBP", "mimetype": "image/webp", "ext": ".webp", "lossy": True},
+    # speed 9 of 0-10: ~15x faster than the default 6 for ~2% larger files
+    "avif": {"pil": "AVIF", "mimetype": "image/avif", "ext": ".avif", "lossy": True,
+             "options": {"speed": 9}},
+}
+MIN_QUALITY = 70
+MAX_QUALITY = 95
+
+
+class Encoded:
+    """Encoded image bytes plus how they were produced."""
+
+    def __init__(self, data, fmt, quality=None, fits=True):
+        self.data = data
+        self.format = fmt
+        self.quality = quality
+        self.fits = fits  # False if nothing met the budget (smallest attempt kept)
+        self.path = None
+
+    @property
+    def mimetype(self):
+        return FORMATS[self.format]["mimetype"]
+
+    @property
+    def ext(self):
+        return FORMATS[self.format]["ext"]
+
+    def __len__(self):
+        return len(self.data)
+
+    def describe(self):
+        q = f" q={self.quality}" if self.quality else ""
+        return f"{self.format.upper()}{q}, {len(self.data) / 1e6:.2f} MB"
+
+
+def _encode_once(img, fmt, quality=None, png_optimize=False):
+    spec = FORMATS[fmt]
+    if spec["lossy"] and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    buf = BytesIO()
+    if fmt == "jpeg":
+        img.save(buf, spec["pil"], quality=quality, optimize=True)
+    elif spec["lossy"]:
+        img.save(buf, spec["pil"], quality=quality, **spec.get("options", {}))
+    else:
+        img.save(buf, spec["pil"], optimize=png_optimize)
+    return buf.getvalue()
+
+
+def encode(img, max_bytes=None, formats=("png", "jpeg"),
+           min_quality=MIN_QUALITY, max_quality=MAX_QUALITY, png_optimize=False):
+    """Encode `img` in the first of `formats` that fits `max_bytes`.
+
+    Lossy formats use the highest quality in [min_quality, max_quality]
+    that fits. If nothing fits, returns the smallest attempt with
+    fits=False. With no budget, the first format wins at max_quality.
+    """
+    smallest = None
+    for fmt in formats:
+        if not FORMATS[fmt]["lossy"]:
+            data = _encode_once(img, fmt, png_optimize=png_optimize)
+            result = Encoded(data, fmt)
+            if max_bytes is None or len(data) <= max_bytes:
+                return result
+        else:
+            if max_bytes is None:
+                return Encoded(_encode_once(img, fmt, max_quality), fmt, max_quality)
+            best = None
+            lo, hi = min_quality, max_quality
+            while lo <= hi:
+                mid = (lo + hi) // 2
+                data = _encode_once(img, fmt, mid)
+                if len(data) <= max_bytes:
+                    best = Encoded(data, fmt, mid)
+                    lo = mid + 1
+                else:
+                    hi = mid - 1
+            if best:
+                return best
+            result = Encoded(_encode_once(img, fmt, min_quality), fmt, min_quality)
+        if smallest is None or len(result) < len(smallest):
+            smallest = result
+    smallest.fits = False
+    return smallest
+
+
+def find_artifact(path):
+    """Newest existing file for `path`'s stem in any known format, or None."""
+    stem = os.path.splitext(path)[0]
+    found = [stem + spec["ext"] for spec in FORMATS.values()
+             if os.path.exists(stem + spec["ext"])]
+    return max(found, key=os.path.getmtime) if found else None
+
+
+def available(fmt):
+    """Whether this Pillow build can write `fmt` (AVIF needs Pillow 11.2+
+    built with libavif)."""
+    from PIL import Image
+    Image.init()
+    return FORMATS[fmt]["pil"] in Image.SAVE
+
+
+def encode_to_file(img, path, max_bytes=None, formats=("png", "jpeg"), exclusive=True, **kwargs):
+    """Encode in memory, then write the winner once as `path`'s stem + the
+    format's extension. Same-stem files in other formats are removed so
+    there is exactly one artifact, unless `exclusive` is False (e.g. a
+    WebP and an AVIF of the same rendition). Returns the Encoded result
+    (with .path).
+    """
+    result = encode(img, max_bytes, formats, **kwargs)
+    stem = os.path.splitext(path)[0]
+    result.path = stem + result.ext
+    tmp = f"{result.path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(result.data)
+    os.replace(tmp, result.path)
+    for spec in FORMATS.values() if exclusive else ():
+        other = stem + spec["ext"]
+        if other != result.path and os.path.exists(other):
+            os.remove(other)
+    return result
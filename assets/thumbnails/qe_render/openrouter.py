@@ -0,0 +1,338 @@
+"""
+OpenRouter client shared by generate-thumbnails.py and generate-banner.py.
+
+OpenRouterClient keeps one pooled requests.Session for every call, uses
+separate connect/read timeouts, and retries with exponential backoff plus
+jitter — honoring Retry-After on 429/503, capped at BACKOFF_MAX. Failures
+are classified:
+
+  - retryable: transport errors, timeouts, 408/429/5xx, image-less or
+    undecodable responses
+  - fatal for the request: other 4xx (bad request, moderation)
+  - fatal for the run: 401/402 (bad key, out of credits) and local I/O
+    errors writing the image (disk full, permissions) — the client stops
+    issuing requests so remaining episodes fail immediately instead of
+    each burning its own (paid) retries
+
+Image responses arrive as one JSON body with the picture inlined as a
+base64 data URL (choices[0].message.images[0].image_url.url). Rather than
+holding the JSON text, the base64 string and the decoded bytes in memory
+at once, save_streamed_image() scans the body as it streams in, decodes the
+base64 payload in chunks straight into a temp file next to the destination,
+checks that the result opens as an image, then renames it into place.
+
+generate_background() is the scripts' entry point: one background to a
+file, with progress and failures logged instead of raised.
+
+requests and Pillow are imported when a client is built or an image
+saved, so DEFAULT_BASE_URL and the error types cost nothing at startup.
+"""
+
+import os
+import re
+import json
+import time
+import random
+import binascii
+import threading
+from . import profiler
+
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+CONNECT_TIMEOUT = 10  # seconds to establish the connection
+READ_TIMEOUT = 120  # max seconds between bytes while the image streams in
+RETRIES = 3  # attempts per request
+BACKOFF_BASE = 2  # first retry waits ~2s, then ~4s, ~8s... (with jitter)
+BACKOFF_MAX = 60
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+RUN_FATAL_STATUS = {401, 402}
+
+# Start of the inlined image: "url": "data:image/png;base64,
+DATA_URL = re.compile(rb'"url"\s*:\s*"data:[^,"]*,')
+HEAD_LIMIT = 4 << 20  # max bytes of JSON to buffer while looking for the image
+CHUNK_SIZE = 1 << 16
+
+
+class APIError(Exception):
+    """An error reported by OpenRouter (HTTP status or an "error" body)."""
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self):
+        return self.status is None or self.status in RETRYABLE_STATUS
+
+    @property
+    def stops_run(self):
+        return self.status in RUN_FATAL_STATUS
+
+    def __str__(self):
+        message = super().__str__()
+        return f"{message} (HTTP {self.status})" if self.status else message
+
+
+class NoImageError(Exception):
+    """The response finished without a usable image."""
+
+
+class RunAbortedError(Exception):
+    """An earlier request hit a run-fatal error; no further calls are made."""
+
+
+class _Base64Sink:
+    """Decode a streamed JSON-string base64 payload into a file object."""
+
+    def __init__(self, out):
+        self.out = out
+        self.pending = b""  # undecoded base64 (< 4 chars) or a split escape
+        self.written = 0
+        self.done = False
+
+    def feed(self, data):
+        """Consume `data`; returns True once the closing quote is seen."""
+        end = data.find(b'"')
+        if end != -1:
+            data = data[:end]
+            self.done = True
+        data = self.pending + data
+        # A backslash at the chunk edge starts an escape we can't read yet
+        if data.endswith(b"\\") and not self.done:
+            data, self.pending = data[:-1], b"\\"
+        else:
+            self.pending = b""
+        data = data.replace(b"\\/", b"/").replace(b"\\n", b"").replace(b"\\r", b"")
+        usable = len(data) - len(data) % 4
+        if usable:
+            decoded = binascii.a2b_base64(data[:usable])
+            self.out.write(decoded)
+            self.written += len(decoded)
+        self.pending = data[usable:] + self.pending
+        return self.done
+
+    def close(self):
+        if self.pending:
+            tail = self.pending.rstrip(b"=")
+            decoded = binascii.a2b_base64(tail + b"=" * (-len(tail) % 4))
+            self.out.write(decoded)
+            self.written += len(decoded)
+            self.pending = b""
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _raise_for_body(body, status=None, retry_after=None):
+    """Explain a complete, image-less response body."""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        if status:
+            raise APIError(f"HTTP error, unparseable body ({len(body)} bytes)", status, retry_after)
+        raise NoImageError(f"Unparseable response ({len(body)} bytes)")
+    if isinstance(data, dict) and "error" in data:
+        err = data["error"]
+        message = err.get("message", err) if isinstance(err, dict) else err
+        code = err.get("code") if isinstance(err, dict) else None
+        raise APIError(message, status or (code if isinstance(code, int) else None), retry_after)
+    if status:
+        raise APIError("HTTP error", status, retry_after)
+    raise NoImageError("No images in response")
+
+
+def save_streamed_image(resp, output_path, chunk_size=CHUNK_SIZE):
+    """Stream the first inlined image in `resp` (requested with stream=True)
+    to `output_path`. Returns the number of image bytes written.
+
+    Raises APIError / NoImageError for bodies without an image, and
+    NoImageError if the payload doesn't decode as an image. Failures
+    writing the file propagate as OSError. Nothing is written to
+    `output_path` unless the image verifies.
+    """
+    import tempfile
+    from PIL import Image
+
+    chunks = resp.iter_content(chunk_size=chunk_size)
+    head = b""
+    match = None
+    for chunk in chunks:
+        head += chunk
+        match = DATA_URL.search(head)
+        if match:
+            break
+        if len(head) > HEAD_LIMIT:
+            raise NoImageError(f"No image data in the first {HEAD_LIMIT} bytes")
+    if not match:
+        _raise_for_body(head)
+
+    fd, tmp = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(output_path)), suffix=".part"
+    )
+    try:
+        with os.fdopen(fd, "wb") as out:
+            sink = _Base64Sink(out)
+            sink.feed(head[match.end():])
+            for chunk in chunks:
+                if sink.done:
+                    break
+                sink.feed(chunk)
+            if not sink.done:
+                raise NoImageError("Response ended inside the image data")
+            sink.close()
+        for _ in chunks:  # drain the rest (usage stats) so the connection can be reused
+            pass
+
+        try:
+            with Image.open(tmp) as img:
+                img.verify()
+        except (OSError, SyntaxError) as e:  # PIL couldn't decode what we received
+            raise NoImageError(f"Bad image data: {e}") from e
+        os.replace(tmp, output_path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return sink.written
+
+
+class OpenRouterClient:
+    """Pooled, retrying image-generation client. Safe to share across threads.
+
+    `limiter` (anything with .acquire()) is consulted before every attempt.
+    `base_url` points the client at another OpenAI-compatible endpoint,
+    e.g. the local stub in stub_servers.py.
+    """
+
+    def __init__(self, api_key, limiter=None, retries=RETRIES, pool_size=8,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), base_url=DEFAULT_BASE_URL):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.api_url = base_url.rstrip("/") + "/chat/completions"
+        self.limiter = limiter
+        self.retries = retries
+        self.timeout = timeout
+        self.aborted = threading.Event()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        })
+
+    def backoff(self, attempt, retry_after=None):
+        """Delay before retry number `attempt` (1-based)."""
+        if retry_after is not None:
+            return min(retry_after, BACKOFF_MAX) + random.uniform(0, 1)
+        ceiling = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def _attempt(self, model, prompt, output_path, params):
+        with profiler.span("api.request"):  # until the response headers arrive
+            resp = self.session.post(
+                self.api_url,
+                json={
+                    "model": model,
+                    "messages": [{"role": "user", "content": prompt}],
+                    **(params or {}),
+                },
+                timeout=self.timeout,
+                stream=True,
+            )
+        with resp:
+            if resp.status_code >= 400:
+                _raise_for_body(
+                    resp.content,
+                    resp.status_code,
+                    parse_retry_after(resp.headers.get("Retry-After")),
+                )
+            with profiler.span("api.download"):  # stream, base64-decode, verify
+                return save_streamed_image(resp, output_path)
+
+    def generate_image(self, model, prompt, output_path, params=None, log=print):
+        """Generate one image to `output_path`; returns bytes written.
+
+        Retries retryable failures, then re-raises the last one. Raises
+        APIError immediately for fatal ones, OSError for local I/O failures
+        (which also stop the run), and RunAbortedError once any request has
+        hit a run-fatal error.
+        """
+        import requests
+
+        for attempt in range(1, self.retries + 1):
+            if self.aborted.is_set():
+                raise RunAbortedError("Skipped: an earlier request hit a fatal error")
+            if self.limiter:
+                with profiler.span("api.throttle"):
+                    self.limiter.acquire()
+            retry_after = None
+            try:
+                return self._attempt(model, prompt, output_path, params)
+            except APIError as e:
+                log(f"[error] API error: {e}")
+                if e.stops_run:
+                    self.aborted.set()
+                    raise
+                if not e.retryable or attempt == self.retries:
+                    raise
+                retry_after = e.retry_after
+            except (requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                log(f"[error] Network error: {e}")
+                if attempt == self.retries:
+                    raise
+            except requests.RequestException:
+                raise  # malformed URL, invalid headers... retrying won't help
+            except NoImageError as e:
+                log(f"[error] {e}")
+                if attempt == self.retries:
+                    raise
+            except OSError as e:  # writing the image failed locally: no retry will fix that
+                log(f"[error] Can't save image: {e}")
+                self.aborted.set()
+                raise
+            delay = self.backoff(attempt, retry_after)
+            log(f"[retry] Waiting {delay:.1f}s before retry {attempt + 1}/{self.retries}...")
+            with profiler.span("api.backoff"):
+                time.sleep(delay)
+
+
+def generate_background(client, model, prompt, output_path, params=None, tag=""):
+    """Generate one background image to `output_path`; returns True on success.
+
+    Retries, backoff and rate limiting happen inside `client`. Failures are
+    logged, not raised, so a failed background only fails its own episode.
+    `tag` prefixes log lines so concurrent output stays attributable.
+    """
+    try:
+        with profiler.span("generate_background", output=os.path.basename(output_path)):
+            img_bytes = client.generate_image(
+                model, prompt, output_path, params=params,
+                log=lambda msg: print(f"  {tag}{msg}"),
+            )
+    except RunAbortedError as e:
+        print(f"  {tag}[skip] {e}")
+        return False
+    except Exception as e:
+        if client.aborted.is_set():
+            print(f"  {tag}[abort] Fatal error — skipping remaining API calls")
+        else:
+            print(f"  {tag}[error] Giving up: {e}")
+        return False
+    print(f"  {tag}[ok] Background saved ({img_bytes} bytes)")
+    return True
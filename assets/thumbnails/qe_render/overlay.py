@@ -0,0 +1,47 @@
+"""
+Fused darken + black-gradient overlay, shared by generate-thumbnails.py and
+generate-banner.py.
+
+Both compositors used to run ImageEnhance.Brightness over the full frame,
+draw a black gradient one line at a time onto a transparent layer, then
+alpha_composite the two. Every one of those steps only ever scales a row's
+colour by a constant, so the whole chain collapses into one per-row factor:
+a single ImageChops.multiply against a precomputed mask.
+
+Over an opaque background a black overlay of alpha a scales colour by
+(1 - a/255), so the factors reproduce the old chain up to rounding.
+"""
+
+from functools import lru_cache
+from PIL import Image, ImageChops
+
+
+def row_factor(brightness, overlay_alpha):
+    """Colour multiplier for one row: darken, then black overlay at `overlay_alpha` (0-255)."""
+    return brightness * (1 - overlay_alpha / 255)
+
+
+@lru_cache(maxsize=8)
+def shade_mask(size, brightness, top, alphas):
+    """RGB multiply mask for `size`: rows top..top+len(alphas) get the
+    gradient `alphas`, every other row just the brightness factor.
+
+    Built once per (size, parameters) from a 1-px column and cached.
+    """
+    width, height = size
+    base = round(255 * brightness)
+    column = [base] * height
+    for i, alpha in enumerate(alphas):
+        y = top + i
+        if 0 <= y < height:
+            column[y] = round(255 * row_factor(brightness, alpha))
+    strip = Image.new("L", (1, height))
+    strip.putdata(column)
+    mask = strip.resize((width, height), Image.NEAREST)
+    return Image.merge("RGB", (mask, mask, mask))
+
+
+def shade(img, brightness, top, alphas):
+    """Apply darken + gradient to an RGB image in one pass. Returns RGBA."""
+    mask = shade_mask(img.size, brightness, top, tuple(alphas))
+    return ImageChops.multiply(img, mask).convert("RGBA")
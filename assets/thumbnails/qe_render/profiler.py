@@ -0,0 +1,168 @@
+"""
+Stage timing for generate-thumbnails.py and generate-banner.py (--profile).
+
+The render functions wrap each stage in span():
+
+    with profiler.span("thumbnail.encode"):
+        result = encode_to_file(...)
+
+Profiling is off by default, and then span() returns one shared no-op
+context manager: the cost is a global lookup and a function call per
+stage. enable() switches recording on for the process. Spans from
+compositing worker processes are shipped back with drain() and merged with
+absorb().
+
+write_trace() saves Chrome trace-event JSON (open it in chrome://tracing
+or https://ui.perfetto.dev). summary_table() prints count, p50, p95, max
+and total per stage.
+"""
+
+import os
+import json
+import time
+import threading
+import contextlib
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE_DIR = os.path.join(BASE_DIR, ".cache", "profile")
+
+_NULL = contextlib.nullcontext()
+_events = None  # list of complete ("X") events while profiling, else None
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        event = {
+            "name": self.name,
+            "ph": "X",
+            "ts": self.start / 1000,
+            "dur": (end - self.start) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_native_id(),
+        }
+        if self.args:
+            event["args"] = self.args
+        if _events is not None:
+            _events.append(event)  # list.append is atomic; safe across threads
+        return False
+
+
+def span(name, **args):
+    """Time the enclosed block as stage `name` (no-op unless enabled)."""
+    if _events is None:
+        return _NULL
+    return _Span(name, args)
+
+
+def enable():
+    global _events
+    if _events is None:
+        _events = []
+
+
+def reset(enabled):
+    """Forget every span and switch recording on or off. Compositing workers
+    call this first: a forked worker inherits the parent's spans, and
+    drain() would send them back to be counted twice."""
+    global _events
+    _events = [] if enabled else None
+
+
+def enabled():
+    return _events is not None
+
+
+def drain():
+    """Return and forget the spans recorded so far in this process."""
+    if _events is None:
+        return []
+    events = _events[:]
+    del _events[:len(events)]
+    return events
+
+
+def absorb(events):
+    """Merge spans recorded in another process (see drain())."""
+    if _events is not None:
+        _events.extend(events)
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def stage_stats(events):
+    """{stage: {"n", "p50", "p95", "max", "total"}} in milliseconds."""
+    durations = {}
+    for event in events:
+        durations.setdefault(event["name"], []).append(event["dur"] / 1000)
+    stats = {}
+    for name, values in durations.items():
+        values.sort()
+        stats[name] = {
+            "n": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "max": values[-1],
+            "total": sum(values),
+        }
+    return stats
+
+
+def summary_table(events):
+    """Per-stage table, stages in the order they first started."""
+    stats = stage_stats(events)
+    order = sorted(stats, key=lambda name: min(e["ts"] for e in events if e["name"] == name))
+    width = max([len("Stage")] + [len(name) for name in order])
+    lines = [f"{'Stage':<{width}}  {'n':>4}  {'p50 ms':>9}  {'p95 ms':>9}  {'max ms':>9}  {'total s':>8}"]
+    for name in order:
+        s = stats[name]
+        lines.append(
+            f"{name:<{width}}  {s['n']:>4}  {s['p50']:>9.1f}  {s['p95']:>9.1f}"
+            f"  {s['max']:>9.1f}  {s['total'] / 1000:>8.2f}"
+        )
+    return "\n".join(lines)
+
+
+def write_trace(path, events, label):
+    """Write Chrome trace-event JSON, timestamps relative to the first span."""
+    origin = min((e["ts"] for e in events), default=0)
+    trace = [dict(e, ts=round(e["ts"] - origin, 3), dur=round(e["dur"], 3)) for e in events]
+    trace.sort(key=lambda e: e["ts"])
+    for pid in sorted({e["pid"] for e in events}):
+        name = label if pid == os.getpid() else f"{label} worker"
+        trace.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": name}})
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+    return path
+
+
+def default_trace_path(label):
+    return os.path.join(PROFILE_DIR, f"{label}-{time.strftime('%Y%m%d-%H%M%S')}.trace.json")
+
+
+def report(path, label):
+    """Write the trace for everything recorded and print the summary table."""
+    events = drain()
+    if not events:
+        print("Profile: no spans recorded")
+        return None
+    path = write_trace(path or default_trace_path(label), events, label)
+    print()
+    print(summary_table(events))
+    print(f"Trace: {path}")
+    return path
@@ -0,0 +1,50 @@
+"""
+Process-wide cache for compositing resources, shared by generate-thumbnails.py
+and generate-banner.py.
+
+  - get_font(path, size): parsed FreeType fonts, LRU by (path, size)
+  - get_logo(path, height): LANCZOS-scaled RGBA logo renditions, LRU by
+    target height, persisted to .cache/logo/ so later runs skip the resample
+
+Disk renditions are named by a hash of the source logo, so replacing the
+logo file invalidates them automatically. Returned objects are shared —
+callers must treat them as read-only (paste from them, never draw on them).
+"""
+
+import os
+import hashlib
+from functools import lru_cache
+from PIL import Image, ImageFont
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RENDITION_DIR = os.path.join(BASE_DIR, ".cache", "logo")
+
+
+@lru_cache(maxsize=64)
+def get_font(path, size):
+    """Load a TrueType font once per (path, size)."""
+    return ImageFont.truetype(path, size)
+
+
+@lru_cache(maxsize=8)
+def get_logo(path, height):
+    """Return the logo at `path` scaled to `height` px tall, as RGBA."""
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    rendition = os.path.join(RENDITION_DIR, f"{stem}-{digest}-h{height}.png")
+
+    if os.path.exists(rendition):
+        logo = Image.open(rendition)
+        logo.load()
+        return logo.convert("RGBA")
+
+    logo = Image.open(path).convert("RGBA")
+    ratio = height / logo.height
+    logo = logo.resize((int(logo.width * ratio), height), Image.LANCZOS)
+
+    os.makedirs(RENDITION_DIR, exist_ok=True)
+    tmp = f"{rendition}.{os.getpid()}.tmp"
+    logo.save(tmp, "PNG")
+    os.replace(tmp, rendition)
+    return logo
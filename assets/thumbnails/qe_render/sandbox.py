@@ -0,0 +1,28 @@
+"""
+Where scripts pointed at a local API keep their state.
+
+For a loopback --base-url (the stubs in stub_servers.py) the generators
+and the uploader write outputs, caches, manifests and quota to
+.cache/stub/<host>-<port>/ instead of the real locations, so stub images
+and stub uploads never mix with real ones. This lives apart from
+stub_servers.py so the scripts don't import an HTTP server to find it.
+"""
+
+import os
+import urllib.parse
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SANDBOX_ROOT = os.path.join(BASE_DIR, ".cache", "stub")
+LOOPBACK = {"localhost", "127.0.0.1", "::1"}
+
+
+def sandbox_dir(base_url):
+    """State directory for scripts pointed at a local API, or None.
+
+    Only loopback URLs are sandboxed — a remote base URL (a gateway in
+    front of the real API) keeps writing to the real locations.
+    """
+    parsed = urllib.parse.urlparse(base_url)
+    if parsed.hostname not in LOOPBACK:
+        return None
+    return os.path.join(SANDBOX_ROOT, f"{parsed.hostname}-{parsed.port or 80}")
@@ -0,0 +1,151 @@
+"""
+Derived renditions of each thumbnail for generate-thumbnails.py.
+
+composite_thumbnail() renders an episode once, at 1920x1080. Every other
+size the channel and the website need is cut from that in-memory master in
+the same pass, so no background is decoded or title composited twice:
+
+  youtube           1280x720 JPEG — YouTube's recommended thumbnail size
+  og                1200x630 JPEG — social cards; the crop is anchored to
+                    the bottom so the title block keeps its margin
+  square            1400x1400 JPEG — podcast directories; the whole frame
+                    over a blurred, darkened fill of itself (no square crop
+                    holds both the logo and a long title)
+  320w/640w/1280w   WebP + AVIF — the website's srcset
+
+Files land in final/variants/ as <thumbnail stem>-<variant><ext>.
+write_manifest() records every episode's files, dimensions and srcset
+strings in final/variants/manifest.json. AVIF is skipped, with a note,
+when Pillow was built without it.
+"""
+
+import os
+import json
+import inspect
+from PIL import Image, ImageEnhance, ImageFilter
+from .backdrop import REDUCING_GAP, cover_box
+from .encoder import FORMATS, available, encode_to_file
+
+SRCSET_WIDTHS = (320, 640, 1280)
+
+VARIANTS = [
+    {"name": "youtube", "size": (1280, 720), "formats": ("jpeg",), "quality": 92},
+    {"name": "og", "size": (1200, 630), "formats": ("jpeg",), "quality": 90, "anchor": (0.5, 1.0)},
+    {"name": "square", "size": (1400, 1400), "formats": ("jpeg",), "quality": 90, "fit": "pad"},
+] + [
+    # AVIF at 55 looks like WebP at 80 in roughly 60% of the bytes
+    {"name": f"{w}w", "size": (w, w * 9 // 16), "formats": ("webp", "avif"),
+     "quality": {"webp": 80, "avif": 55}, "srcset": True}
+    for w in SRCSET_WIDTHS
+]
+
+PAD_BLUR_SCALE = 32  # the square's fill is blurred at 1/32 size, then scaled up
+PAD_BRIGHTNESS = 0.55
+PAD_ANCHOR = (1.0, 0.5)  # sample the fill from the open right side, away from the title
+
+
+def formats_for(spec):
+    return [fmt for fmt in spec["formats"] if available(fmt)]
+
+
+def quality_for(spec, fmt):
+    quality = spec["quality"]
+    return quality[fmt] if isinstance(quality, dict) else quality
+
+
+def fingerprint():
+    """Everything about the variant set that changes its files — part of
+    the render cache key."""
+    return json.dumps([VARIANTS, [formats_for(spec) for spec in VARIANTS]]) + inspect.getsource(derive)
+
+
+def derive(master, spec):
+    """One variant image from the composited master."""
+    size = spec["size"]
+    if spec.get("fit") == "pad":
+        # Full frame, letterboxed over a soft blur of itself
+        small = (max(1, size[0] // PAD_BLUR_SCALE), max(1, size[1] // PAD_BLUR_SCALE))
+        fill = master.resize(small, Image.BILINEAR, box=cover_box(master.size, size, PAD_ANCHOR),
+                             reducing_gap=REDUCING_GAP)
+        fill = fill.filter(ImageFilter.GaussianBlur(3)).resize(size, Image.BILINEAR)
+        fill = ImageEnhance.Brightness(fill).enhance(PAD_BRIGHTNESS)
+        scale = min(size[0] / master.width, size[1] / master.height)
+        fg = master.resize((round(master.width * scale), round(master.height * scale)),
+                           Image.LANCZOS, reducing_gap=REDUCING_GAP)
+        fill.paste(fg, ((size[0] - fg.width) // 2, (size[1] - fg.height) // 2))
+        return fill
+    box = cover_box(master.size, size, spec.get("anchor", (0.5, 0.5)))
+    return master.resize(size, Image.LANCZOS, box=box, reducing_gap=REDUCING_GAP)
+
+
+def variant_path(out_dir, stem, spec, fmt):
+    return os.path.join(out_dir, f"{stem}-{spec['name']}{FORMATS[fmt]['ext']}")
+
+
+def write_variants(master, stem, out_dir):
+    """Derive and write every variant of `master`; returns the paths written."""
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for spec in VARIANTS:
+        img = derive(master, spec)
+        for fmt in formats_for(spec):
+            result = encode_to_file(
+                img, variant_path(out_dir, stem, spec, fmt),
+                formats=(fmt,), max_quality=quality_for(spec, fmt), exclusive=False,
+            )
+            written.append(result.path)
+    return written
+
+
+def missing(out_dir, stem):
+    """Whether any variant file for `stem` is absent."""
+    return any(not os.path.exists(variant_path(out_dir, stem, spec, fmt))
+               for spec in VARIANTS for fmt in formats_for(spec))
+
+
+def skipped_formats():
+    """Formats named in VARIANTS that this Pillow build can't write."""
+    return sorted({fmt for spec in VARIANTS for fmt in spec["formats"] if not available(fmt)})
+
+
+# ── Manifest ────────────────────────────────────────────────────────
+def manifest_entry(out_dir, stem):
+    """{variant: {...}} for the files present, plus "srcset" by MIME type."""
+    entry = {}
+    srcset = {}
+    for spec in VARIANTS:
+        for fmt in formats_for(spec):
+            path = variant_path(out_dir, stem, spec, fmt)
+            if not os.path.exists(path):
+                continue
+            name = os.path.basename(path)
+            if spec.get("srcset"):
+                srcset.setdefault(FORMATS[fmt]["mimetype"], []).append(f"{name} {spec['size'][0]}w")
+            else:
+                entry[spec["name"]] = {
+                    "file": name,
+                    "width": spec["size"][0],
+                    "height": spec["size"][1],
+                    "bytes": os.path.getsize(path),
+                }
+    if srcset:
+        entry["srcset"] = {mime: ", ".join(items) for mime, items in srcset.items()}
+    return entry
+
+
+def write_manifest(out_dir, stems):
+    """Rewrite manifest.json for {episode num: thumbnail stem}; returns its
+    path. Episodes without any variant files are left out."""
+    manifest = {"version": 1, "episodes": {}}
+    for num, stem in stems.items():
+        entry = manifest_entry(out_dir, stem)
+        if entry:
+            manifest["episodes"][num] = entry
+    path = os.path.join(out_dir, "manifest.json")
+    os.makedirs(out_dir, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+    return path
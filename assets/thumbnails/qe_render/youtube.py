@@ -0,0 +1,101 @@
+"""
+YouTube Data API v3 client for upload-youtube-thumbnails.py.
+
+  get_credentials()  OAuth 2.0 user credentials, refreshed or obtained via
+                     the browser flow and cached in the token file
+  build_service()    a youtube v3 service, optionally re-rooted at another
+                     endpoint such as the local stub in stub_servers.py
+  thread_service()   one service per thread (httplib2.Http isn't thread-safe)
+  media_body()       the upload body for a file on disk or in-memory bytes
+
+The Google client libraries take ~300 ms to import, longer than a whole
+--dry-run, so each function imports what it needs when it is called.
+"""
+
+import os
+import sys
+import json
+import threading
+from io import BytesIO
+
+SCOPES = ["https://www.googleapis.com/auth/youtube"]
+
+
+def get_credentials(token_file, client_secret_file, scopes=SCOPES, anonymous=False):
+    """Authenticate via OAuth 2.0 and return valid credentials.
+
+    `anonymous` skips OAuth entirely, for local stubs.
+    """
+    if anonymous:
+        from google.auth.credentials import AnonymousCredentials
+        return AnonymousCredentials()
+    from google.oauth2.credentials import Credentials
+    from google.auth.transport.requests import Request
+
+    creds = None
+
+    # Load existing token
+    if os.path.exists(token_file):
+        creds = Credentials.from_authorized_user_file(token_file, scopes)
+
+    # Refresh or run new auth flow
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            print("[auth] Refreshing expired token...")
+            creds.refresh(Request())
+        else:
+            if not os.path.exists(client_secret_file):
+                print(f"ERROR: {client_secret_file} not found.")
+                print()
+                print("Setup instructions:")
+                print("  1. Go to https://console.cloud.google.com/apis/credentials")
+                print("  2. Create OAuth 2.0 Client ID (type: Desktop app)")
+                print("  3. Download the JSON and save as:")
+                print(f"     {client_secret_file}")
+                sys.exit(1)
+
+            from google_auth_oauthlib.flow import InstalledAppFlow
+            print("[auth] Starting OAuth flow (browser will open)...")
+            flow = InstalledAppFlow.from_client_secrets_file(
+                client_secret_file, scopes
+            )
+            creds = flow.run_local_server(port=0)
+
+        # Save token for reuse
+        with open(token_file, "w") as f:
+            f.write(creds.to_json())
+        print(f"[auth] Token saved to {token_file}")
+
+    return creds
+
+
+def build_service(creds, base_url=None):
+    """Return a YouTube API service (each owns its own httplib2 connection)."""
+    from googleapiclient.discovery import build, build_from_document
+    if not base_url:
+        return build("youtube", "v3", credentials=creds)
+    # client_options' api_endpoint keeps https for media uploads, so
+    # re-root the bundled discovery document instead
+    from googleapiclient import discovery_cache
+    doc = json.loads(discovery_cache.get_static_doc("youtube", "v3"))
+    doc["rootUrl"] = base_url.rstrip("/") + "/"
+    return build_from_document(doc, credentials=creds)
+
+
+_thread_state = threading.local()
+
+
+def thread_service(creds, base_url=None):
+    """Per-thread YouTube service — httplib2.Http is not thread-safe, so
+    upload threads never share one."""
+    if getattr(_thread_state, "youtube", None) is None:
+        _thread_state.youtube = build_service(creds, base_url)
+    return _thread_state.youtube
+
+
+def media_body(mimetype, path=None, data=None):
+    """Upload body for thumbnails().set: the file at `path`, or `data` bytes."""
+    from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
+    if path is not None:
+        return MediaFileUpload(path, mimetype=mimetype)
+    return MediaIoBaseUpload(BytesIO(data), mimetype=mimetype)
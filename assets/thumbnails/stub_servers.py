@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the OpenRouter and YouTube Data APIs, for exercising
+the scripts' retry, concurrency, quota and streaming paths without a key,
+credentials or network.
+
+  OpenRouter  POST /api/v1/chat/completions — an image inlined as a base64
+              data URL, like the real image models' responses
+  YouTube     GET  /youtube/v3/channels, /playlistItems, /videos
+              POST /upload/youtube/v3/thumbnails/set
+              GET  /vi/<id>/<rendition>.jpg — the renditions videos.list
+              links to, cut from whatever was last uploaded
+
+Each service can be configured independently:
+
+  --or-latency / --yt-latency DIST   time to first byte, one of
+                                     fixed:S  uniform:LO,HI  normal:MEAN,SD
+                                     lognormal:MEDIAN,SIGMA  exp:MEAN
+  --or-error-rate / --yt-error-rate  fraction of requests answered 500/502/503
+  --or-429-burst / --yt-429-burst N:M  after every N requests, M in a row
+                                     get 429 with Retry-After
+  --or-payload-kb KB                 approximate size of the returned PNG
+  --or-bandwidth KBPS                throttle the response stream
+  --or-no-image-rate                 fraction of 200s that carry no image
+  --yt-quota UNITS                   answer 403 quotaExceeded once spent
+
+Point the scripts at it with --base-url. For a loopback base URL they keep
+their outputs and state (final/, backgrounds, manifests, quota) in
+.cache/stub/<host>-<port>/ (see qe_render/sandbox.py), so stub images never
+overwrite real artifacts. YouTube calls skip OAuth.
+
+Usage:
+  python stub_servers.py                    # OpenRouter on :8780, YouTube on :8781
+  python stub_servers.py --or-latency lognormal:2,0.5 --or-429-burst 8:2 --yt-error-rate 0.1
+  OPENROUTER_API_KEY=stub python generate-thumbnails.py --jobs 4 --base-url http://127.0.0.1:8780/api/v1
+  python upload-youtube-thumbnails.py --jobs 4 --base-url http://127.0.0.1:8781
+"""
+
+import re
+import sys
+import json
+import math
+import time
+import base64
+import random
+import argparse
+import threading
+import urllib.parse
+from io import BytesIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHUNK = 1 << 16
+
+QUOTA_COSTS = {"thumbnails.set": 50, "channels.list": 1, "playlistItems.list": 1, "videos.list": 1}
+RENDITIONS = {  # name → (width, height), as videos.list reports them
+    "default": (120, 90),
+    "medium": (320, 180),
+    "high": (480, 360),
+    "standard": (640, 480),
+    "maxres": (1280, 720),
+}
+
+
+# ── Fault injection ─────────────────────────────────────────────────
+def parse_latency(spec):
+    """Sampler (no args → seconds) for a DIST spec like "lognormal:1.5,0.4"."""
+    kind, _, params = spec.partition(":")
+    try:
+        values = [float(v) for v in params.split(",") if v]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected numbers after {kind}:, got {params!r}")
+    samplers = {
+        "fixed": lambda s: s,
+        "uniform": lambda lo, hi: random.uniform(lo, hi),
+        "normal": lambda mean, sd: random.gauss(mean, sd),
+        "lognormal": lambda median, sigma: random.lognormvariate(math.log(median), sigma),
+        "exp": lambda mean: random.expovariate(1 / mean),
+    }
+    if kind not in samplers:
+        raise argparse.ArgumentTypeError(f"unknown latency distribution {kind!r}")
+    try:
+        samplers[kind](*values)
+    except (TypeError, ValueError, ArithmeticError) as e:  # exp:0, lognormal:0,...
+        raise argparse.ArgumentTypeError(f"bad parameters for {kind}: {e}")
+    return lambda: max(0.0, samplers[kind](*values))
+
+
+def parse_burst(spec):
+    """(N, M) from "N:M": after every N requests, M 429s in a row."""
+    every, _, length = spec.partition(":")
+    try:
+        every, length = int(every), int(length or 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected N:M, got {spec!r}")
+    if every < 1 or length < 0:
+        raise argparse.ArgumentTypeError(f"need N >= 1 and M >= 0, got {spec!r}")
+    return every, length
+
+
+class Faults:
+    """Latency, random 5xx and periodic 429 bursts for one service. Thread-safe."""
+
+    def __init__(self, latency=None, error_rate=0.0, burst=None, retry_after=1):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.burst = burst
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def delay(self):
+        if self.latency:
+            time.sleep(self.latency())
+
+    def pick(self):
+        """None to serve normally, or the error status to return."""
+        with self.lock:
+            n = self.count
+            self.count += 1
+        if self.burst:
+            every, length = self.burst
+            if n % (every + length) >= every:
+                return 429
+        if random.random() < self.error_rate:
+            return random.choice((500, 502, 503))
+        return None
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "QEStub/1.0"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def injected_fault(self):
+        """Apply latency, then answer with an injected error if one is due."""
+        faults = self.server.faults
+        faults.delay()
+        status = faults.pick()
+        if status is None:
+            return False
+        self.read_body()
+        headers = {"Retry-After": str(faults.retry_after)} if status == 429 else None
+        self.send_json(status, self.error_body(status), headers)
+        return True
+
+
+# ── OpenRouter ──────────────────────────────────────────────────────
+def stub_png(target_bytes):
+    """A 1024x1024 PNG of roughly `target_bytes`: noise rows (incompressible)
+    over a flat fill, in the proportion that lands near the target."""
+    from PIL import Image
+    size = 1024
+    noise_rows = max(1, min(size, round(target_bytes / (size * 3))))
+    img = Image.new("RGB", (size, size), (40, 60, 80))
+    noise = Image.merge("RGB", [Image.effect_noise((size, noise_rows), 90) for _ in range(3)])
+    img.paste(noise, (0, 0))
+    buf = BytesIO()
+    img.save(buf, "PNG")
+    return buf.getvalue()
+
+
+class OpenRouterHandler(StubHandler):
+    def error_body(self, status):
+        return {"error": {"message": f"stub: injected HTTP {status}", "code": status}}
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.read_body()
+            self.send_json(404, {"error": {"message": f"no route {self.path}", "code": 404}})
+            return
+        if self.injected_fault():
+            return
+        request = json.loads(self.read_body() or b"{}")
+        if random.random() < self.server.no_image_rate:
+            self.send_json(200, {"choices": [{"message": {"content": "stub: no image this time"}}]})
+            return
+
+        b64 = base64.b64encode(self.server.png).decode()
+        head = json.dumps({
+            "id": "stub", "model": request.get("model"),
+            "choices": [{"message": {"role": "assistant", "images": [
+                {"type": "image_url", "image_url": {"url": "data:image/png;base64,"}}
+            ]}}],
+        }).encode()
+        # Splice the payload into the data URL so it streams like the real thing
+        marker = b"base64,"
+        cut = head.index(marker) + len(marker)
+        tail = head[cut:-1] + b', "usage": {"total_tokens": 1290}}'
+        body = [head[:cut], b64.encode(), tail]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(sum(len(part) for part in body)))
+        self.end_headers()
+        pace = CHUNK / (self.server.bandwidth * 1024) if self.server.bandwidth else 0
+        for part in body:
+            for i in range(0, len(part), CHUNK):
+                self.wfile.write(part[i:i + CHUNK])
+                if pace:
+                    time.sleep(pace)
+
+
+# ── YouTube ─────────────────────────────────────────────────────────
+class YouTubeState:
+    """Fake channel: one video per catalog episode, plus uploaded thumbnails."""
+
+    def __init__(self, quota=None):
+        from catalog import load_catalog
+        self.lock = threading.Lock()
+        self.quota = quota
+        self.spent = 0
+        self.thumbnails = {}  # video_id → uploaded bytes
+        self.videos = []  # newest first, like the uploads playlist
+        for i, ep in enumerate(load_catalog()):
+            guest = f" | {ep['guest']}" if ep.get("guest") else ""
+            self.videos.append({
+                "id": f"stub-{ep['num']}"[:11].ljust(11, "x"),
+                "title": f"{ep['title'].title()}{guest} | Question Everything Ep {ep['num']}",
+                "published_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(1_700_000_000 + i * 604_800)),
+            })
+        self.videos.reverse()
+        self.by_id = {v["id"]: v for v in self.videos}
+        self.etag = f'"stub-{len(self.videos)}"'
+
+    def charge(self, method):
+        """False once the quota is exhausted."""
+        with self.lock:
+            if self.quota is not None and self.spent + QUOTA_COSTS[method] > self.quota:
+                return False
+            self.spent += QUOTA_COSTS[method]
+            return True
+
+
+class YouTubeHandler(StubHandler):
+    def error_body(self, status, reason=None, message=None):
+        reason = reason or {429: "rateLimitExceeded", 500: "backendError"}.get(status, "backendError")
+        message = message or f"stub: injected HTTP {status}"
+        return {"error": {"code": status, "message": message,
+                          "errors": [{"reason": reason, "domain": "youtube", "message": message}]}}
+
+    def route(self):
+        parsed = urllib.parse.urlparse(self.path)
+        return parsed.path, {k: v[0] for k, v in urllib.parse.parse_qs(parsed.query).items()}
+
+    def charged(self, method):
+        if self.server.state.charge(method):
+            return True
+        self.read_body()
+        self.send_json(403, self.error_body(403, "quotaExceeded", "The request cannot be completed "
+                                                                  "because you have exceeded your quota."))
+        return False
+
+    def rendition_url(self, video_id, name):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/vi/{video_id}/{name}.jpg"
+
+    def thumbnail_set(self, video_id):
+        """snippet.thumbnails / thumbnails.set item for a video."""
+        uploaded = video_id in self.server.state.thumbnails
+        return {
+            name: {"url": self.rendition_url(video_id, name), "width": w, "height": h}
+            for name, (w, h) in RENDITIONS.items()
+            if uploaded or name != "maxres"
+        }
+
+    def do_GET(self):
+        path, query = self.route()
+        state = self.server.state
+
+        m = re.match(r"^/vi/([^/]+)/(\w+)\.jpg$", path)
+        if m:  # rendition images are served from a CDN — no faults, no quota
+            self.serve_rendition(m.group(1), m.group(2))
+            return
+        if self.injected_fault():
+            return
+
+        if path == "/youtube/v3/channels":
+            if self.charged("channels.list"):
+                self.send_json(200, {"items": [{"id": "UCstub", "contentDetails": {
+                    "relatedPlaylists": {"uploads": "UUstub"}}}]})
+        elif path == "/youtube/v3/playlistItems":
+            if not self.charged("playlistItems.list"):
+                return
+            if self.headers.get("If-None-Match") == state.etag and "pageToken" not in query:
+                self.send_response(304)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            start = int(query.get("pageToken", 0))
+            size = min(50, int(query.get("maxResults", 5)))
+            page = state.videos[start:start + size]
+            payload = {"etag": state.etag, "items": [{"snippet": {
+                "title": v["title"], "publishedAt": v["published_at"],
+                "resourceId": {"kind": "youtube#video", "videoId": v["id"]},
+            }} for v in page]}
+            if start + size < len(state.videos):
+                payload["nextPageToken"] = str(start + size)
+            self.send_json(200, payload)
+        elif path == "/youtube/v3/videos":
+            if not self.charged("videos.list"):
+                return
+            ids = [i for i in query.get("id", "").split(",") if i][:50]
+            self.send_json(200, {"items": [
+                {"id": i, "snippet": {"title": state.by_id[i]["title"], "thumbnails": self.thumbnail_set(i)}}
+                for i in ids if i in state.by_id
+            ]})
+        else:
+            self.send_json(404, self.error_body(404, "notFound", f"no route {path}"))
+
+    def do_POST(self):
+        path, query = self.route()
+        if path != "/upload/youtube/v3/thumbnails/set":
+            self.read_body()
+            self.send_json(404, self.error_body(404, "notFound", f"no route {path}"))
+            return
+        if self.injected_fault() or not self.charged("thumbnails.set"):
+            return
+        data = self.read_body()
+        video_id = query.get("videoId")
+        if video_id not in self.server.state.by_id:
+            self.send_json(404, self.error_body(404, "videoNotFound", f"video {video_id} not found"))
+        elif len(data) > 2 * 1024 * 1024:
+            self.send_json(400, self.error_body(400, "mediaBodyTooLarge", "thumbnail exceeds 2 MB"))
+        else:
+            self.server.state.thumbnails[video_id] = data
+            self.send_json(200, {"kind": "youtube#thumbnailSetResponse",
+                                 "items": [self.thumbnail_set(video_id)]})
+
+    def serve_rendition(self, video_id, name):
+        from PIL import Image
+        size = RENDITIONS.get(name)
+        if size is None:
+            self.send_json(404, self.error_body(404, "notFound", name))
+            return
+        data = self.server.state.thumbnails.get(video_id)
+        if data:
+            with Image.open(BytesIO(data)) as img:
+                img = img.convert("RGB").resize(size, Image.BILINEAR)
+        else:  # nothing uploaded: an "auto-generated frame"
+            img = Image.new("RGB", size, (90, 90, 90))
+        buf = BytesIO()
+        img.save(buf, "JPEG", quality=85)
+        body = buf.getvalue()
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(handler, port, faults, verbose, **attrs):
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.faults = faults
+    server.verbose = verbose
+    for key, value in attrs.items():
+        setattr(server, key, value)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenRouter / YouTube API stubs")
+    parser.add_argument("--or-port", type=int, default=8780, help="OpenRouter stub port (default: 8780; 0 = off)")
+    parser.add_argument("--yt-port", type=int, default=8781, help="YouTube stub port (default: 8781; 0 = off)")
+    for prefix, name in (("or", "OpenRouter"), ("yt", "YouTube")):
+        parser.add_argument(f"--{prefix}-latency", type=parse_latency, metavar="DIST",
+                            help=f"{name} time-to-first-byte distribution (e.g. lognormal:1.5,0.4)")
+        parser.add_argument(f"--{prefix}-error-rate", type=float, default=0.0,
+                            help=f"Fraction of {name} requests answered with a 5xx")
+        parser.add_argument(f"--{prefix}-429-burst", type=parse_burst, metavar="N:M",
+                            help=f"After every N {name} requests, answer M with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on 429s (default: 1)")
+    parser.add_argument("--or-payload-kb", type=int, default=1500, help="Approximate image size (default: 1500)")
+    parser.add_argument("--or-bandwidth", type=float, help="Stream OpenRouter responses at this many KB/s")
+    parser.add_argument("--or-no-image-rate", type=float, default=0.0,
+                        help="Fraction of OpenRouter 200s without an image")
+    parser.add_argument("--yt-quota", type=int, help="Daily quota units before 403 quotaExceeded")
+    parser.add_argument("--seed", type=int, help="Seed the fault/latency RNG for repeatable runs")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    servers = []
+    if args.or_port:
+        png = stub_png(args.or_payload_kb * 1024)
+        faults = Faults(args.or_latency, args.or_error_rate, args.or_429_burst, args.retry_after)
+        servers.append(serve(OpenRouterHandler, args.or_port, faults, args.verbose, png=png,
+                             bandwidth=args.or_bandwidth, no_image_rate=args.or_no_image_rate))
+        print(f"OpenRouter stub: http://127.0.0.1:{args.or_port}/api/v1 ({len(png) / 1e6:.2f} MB images)")
+    if args.yt_port:
+        faults = Faults(args.yt_latency, args.yt_error_rate, args.yt_429_burst, args.retry_after)
+        state = YouTubeState(args.yt_quota)
+        servers.append(serve(YouTubeHandler, args.yt_port, faults, args.verbose, state=state))
+        print(f"YouTube stub:    http://127.0.0.1:{args.yt_port} ({len(state.videos)} videos)")
+    if not servers:
+        print("Both stubs disabled — nothing to do.")
+        sys.exit(1)
+    print("Ctrl-C to stop.")
+    sys.stdout.flush()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,22 +9,48 @@ Prerequisites:
   4. pip install google-api-python-client google-auth-oauthlib
 
 Usage:
-  python upload-youtube-thumbnails.py          # Upload all 26 thumbnails
-  python upload-youtube-thumbnails.py --dry-run # Preview what would be uploaded
+  python upload-youtube-thumbnails.py          # Upload new/changed thumbnails
+  python upload-youtube-thumbnails.py --dry-run # Show exactly what would be uploaded
+  python upload-youtube-thumbnails.py --force   # Re-upload even if unchanged
   python upload-youtube-thumbnails.py --episode 05  # Upload just one episode
+  python upload-youtube-thumbnails.py --episode 20-,tag:ai  # Any selection (see catalog.py)
+  python upload-youtube-thumbnails.py --jobs 4  # Upload 4 at a time
+  python upload-youtube-thumbnails.py --resume  # Continue a run stopped by the quota
+  python upload-youtube-thumbnails.py --refresh-index  # Rebuild the episode → video index
+  python upload-youtube-thumbnails.py --verify  # Check what YouTube is actually serving
+  python upload-youtube-thumbnails.py --base-url http://127.0.0.1:8781  # Local stub (stub_servers.py)
+
+Episodes are matched to videos automatically (video_index.py): the channel's
+uploads playlist is paged and titles are matched against the episode
+catalog (episodes.json). The result is cached in .cache/video-index.json and refreshed
+incrementally at the start of each run (--dry-run uses the cache if present).
+
+Quota: every thumbnails.set call costs QUOTA_COSTS["thumbnails.set"] units
+of the project's daily Data API quota (reset at midnight Pacific). Units
+spent are tracked in final/.upload-quota.json; a run stops before it would
+exceed --quota-budget and writes what it didn't get to to
+final/.upload-queue.json, which --resume picks up the next day.
+
+The Google client libraries, requests and Pillow load only on the paths
+that call the API or decode images (see qe_render/youtube.py). --help and
+a --dry-run served from the cached index start in tens of milliseconds.
 """
 
 import os
 import sys
 import argparse
 import json
-import tempfile
-from PIL import Image
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+import time
+import hashlib
+import threading
+from io import BytesIO
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from qe_render import youtube as youtube_api
+from qe_render.encoder import FORMATS, encode, find_artifact
+from video_index import INDEX_PATH, SEED_EPISODES, load_index, refresh_index, seed_index
+from catalog import add_selection_arguments, load_catalog, select_episodes
 
 MAX_THUMBNAIL_BYTES = 2_097_152  # YouTube's 2 MB limit
 
@@ -34,187 +60,651 @@ THUMBNAIL_DIR = os.path.join(BASE_DIR, "final")
 CREDS_DIR = os.path.join(os.path.dirname(BASE_DIR), "..", ".credentials")
 CLIENT_SECRET_FILE = os.path.join(CREDS_DIR, "youtube-client-secret.json")
 TOKEN_FILE = os.path.join(CREDS_DIR, "youtube-token-qe.json")
-SCOPES = ["https://www.googleapis.com/auth/youtube"]
-
-# ── Episode → New YouTube Video ID mapping ──────────────────────────
-# Built from catalog.json (title → old_id) + progress.json (old_id → new_id)
-EPISODE_MAP = {
-    "00-teaser": "84IrxXcTkbE",
-    "01": "Ad-Fi8eo1jA",
-    "02": "GQ6_WqnxNw8",
-    "03": "m6KWYdR7Ozw",
-    "04": "0nGMyzONKh8",
-    "05": "WRQzzGMeDXc",
-    "06": "c9Fw6CFKYGk",
-    "07": "dUjbOhMygDY",
-    "08": "7bTO55moAmg",
-    "09": "hC-Xo2VSoUE",
-    "10": "9dA2Nk8ActY",
-    "11": "6d4x44EkAHw",
-    "12": "KWbMnB4LoW8",
-    "13": "UIcrNaX1Az8",
-    "14": "ZXudfbtqJDs",
-    "15": "RHhSHr8uIFo",
-    "16": "IzAkfYn-HCY",
-    "17": "dMoh3U7qH6I",
-    "18": "v8iND36k2yg",
-    "19": "dgj_i6Xxp_g",
-    "20": "-yc1jUYC--E",
-    "21": "pL7BVSrZk4o",
-    "22": "oQrQBDIuJbE",
-    "23": "iTzcu-JU8Mk",
-    "24": "jlvBbn-nwZc",
-    "25": "Bmee2V1BdDs",
+# video ID → last uploaded artifact (hash, stat, timestamp, API response)
+UPLOAD_MANIFEST = os.path.join(THUMBNAIL_DIR, ".upload-manifest.json")
+VIDEO_INDEX = INDEX_PATH
+INDEX_SEED = SEED_EPISODES
+# Another endpoint for the Data API, e.g. the local stub in stub_servers.py
+YOUTUBE_API_BASE_URL = os.environ.get("YOUTUBE_API_BASE_URL")
+ANONYMOUS = False  # set for local stubs: no OAuth
+
+# ── Quota ───────────────────────────────────────────────────────────
+QUOTA_STATE = os.path.join(THUMBNAIL_DIR, ".upload-quota.json")
+UPLOAD_QUEUE = os.path.join(THUMBNAIL_DIR, ".upload-queue.json")
+DAILY_QUOTA = 10_000  # default project quota, units/day
+QUOTA_TZ = ZoneInfo("America/Los_Angeles")  # the quota day rolls over at midnight PT
+QUOTA_COSTS = {
+    "thumbnails.set": 50,
+    "channels.list": 1,
+    "videos.list": 1,
+    "playlistItems.list": 1,
 }
 
 
-def get_authenticated_service():
-    """Authenticate via OAuth 2.0 and return a YouTube API service."""
-    creds = None
+# ── YouTube API & upload ────────────────────────────────────────────
+def get_credentials():
+    """Authenticate via OAuth 2.0 and return valid credentials."""
+    return youtube_api.get_credentials(TOKEN_FILE, CLIENT_SECRET_FILE, anonymous=ANONYMOUS)
 
-    # Load existing token
-    if os.path.exists(TOKEN_FILE):
-        creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
 
-    # Refresh or run new auth flow
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            print("[auth] Refreshing expired token...")
-            creds.refresh(Request())
-        else:
-            if not os.path.exists(CLIENT_SECRET_FILE):
-                print(f"ERROR: {CLIENT_SECRET_FILE} not found.")
-                print()
-                print("Setup instructions:")
-                print("  1. Go to https://console.cloud.google.com/apis/credentials")
-                print("  2. Create OAuth 2.0 Client ID (type: Desktop app)")
-                print("  3. Download the JSON and save as:")
-                print(f"     {CLIENT_SECRET_FILE}")
-                sys.exit(1)
+def get_authenticated_service(creds=None):
+    """Return a YouTube API service (each owns its own httplib2 connection)."""
+    return youtube_api.build_service(creds or get_credentials(), YOUTUBE_API_BASE_URL)
 
-            print("[auth] Starting OAuth flow (browser will open)...")
-            flow = InstalledAppFlow.from_client_secrets_file(
-                CLIENT_SECRET_FILE, SCOPES
-            )
-            creds = flow.run_local_server(port=0)
 
-        # Save token for reuse
-        with open(TOKEN_FILE, "w") as f:
-            f.write(creds.to_json())
-        print(f"[auth] Token saved to {TOKEN_FILE}")
+def use_api(base_url):
+    """Talk to another Data API endpoint. For a local stub, skip OAuth and
+    keep the manifest, quota, queue and index in a sandbox — uploads there
+    must never look like real uploads."""
+    global YOUTUBE_API_BASE_URL, ANONYMOUS, UPLOAD_MANIFEST, QUOTA_STATE, UPLOAD_QUEUE, VIDEO_INDEX, INDEX_SEED
+    from qe_render.sandbox import sandbox_dir
+    YOUTUBE_API_BASE_URL = base_url
+    sandbox = sandbox_dir(base_url)
+    if sandbox:
+        os.makedirs(sandbox, exist_ok=True)
+        ANONYMOUS = True
+        UPLOAD_MANIFEST = os.path.join(sandbox, ".upload-manifest.json")
+        QUOTA_STATE = os.path.join(sandbox, ".upload-quota.json")
+        UPLOAD_QUEUE = os.path.join(sandbox, ".upload-queue.json")
+        VIDEO_INDEX = os.path.join(sandbox, "video-index.json")
+        INDEX_SEED = {}  # the seed's video IDs are real ones
 
-    return build("youtube", "v3", credentials=creds)
+
+def thumbnail_file(ep_num):
+    """The upload-ready artifact for an episode (.png or .jpg), or None."""
+    return find_artifact(os.path.join(THUMBNAIL_DIR, f"ep-{ep_num}-thumbnail.png"))
 
 
 def prepare_thumbnail(thumbnail_path):
-    """If the file exceeds 2 MB, convert to JPEG at decreasing quality until it fits.
-    Returns (upload_path, mimetype, was_compressed). Caller cleans up temp files."""
+    """Return (media, mimetype, size, compressed) ready for thumbnails().set.
+
+    Files already within 2 MB (the generator encodes finals to that budget)
+    are uploaded as-is. Older oversized files are re-encoded to the best
+    JPEG quality that fits, entirely in memory — no temp files."""
+    ext = os.path.splitext(thumbnail_path)[1].lower()
+    mimetype = next(
+        (spec["mimetype"] for spec in FORMATS.values() if spec["ext"] == ext),
+        "image/png",
+    )
     size = os.path.getsize(thumbnail_path)
     if size <= MAX_THUMBNAIL_BYTES:
-        return thumbnail_path, "image/png", False
+        return youtube_api.media_body(mimetype, path=thumbnail_path), mimetype, size, False
+
+    from PIL import Image
+    with Image.open(thumbnail_path) as img:
+        encoded = encode(img, MAX_THUMBNAIL_BYTES, formats=("jpeg",), min_quality=50)
+    media = youtube_api.media_body(encoded.mimetype, data=encoded.data)
+    return media, encoded.mimetype, len(encoded), True
+
+
+def upload_thumbnail(youtube, video_id, thumbnail_path, prepared=None):
+    """Upload a thumbnail for a specific video, compressing if needed.
+
+    `prepared` is a prepare_thumbnail() result computed ahead of time.
+    """
+    media, mimetype, size, compressed = prepared or prepare_thumbnail(thumbnail_path)
+    response = youtube.thumbnails().set(
+        videoId=video_id,
+        media_body=media,
+    ).execute()
+    return response
+
+
+def describe_response(response):
+    """One-line summary of a thumbnails.set response."""
+    items = response.get("items", [])
+    if items:
+        res = items[0].get("maxres") or items[0].get("high") or items[0].get("default", {})
+        return f"{res.get('width', '?')}x{res.get('height', '?')}"
+    return "Thumbnail set (no resolution info returned)"
+
+
+def is_quota_error(error):
+    """True for the API's quotaExceeded / dailyLimitExceeded 403s."""
+    text = str(error) + str(getattr(error, "content", b""))
+    return "quotaExceeded" in text or "dailyLimitExceeded" in text
 
-    img = Image.open(thumbnail_path).convert("RGB")
-    for quality in (95, 90, 85, 80):
-        tmp = tempfile.NamedTemporaryFile(suffix=".jpg", delete=False)
-        img.save(tmp.name, "JPEG", quality=quality)
-        if os.path.getsize(tmp.name) <= MAX_THUMBNAIL_BYTES:
-            return tmp.name, "image/jpeg", True
-        os.unlink(tmp.name)
 
-    # Last resort: lowest quality
-    tmp = tempfile.NamedTemporaryFile(suffix=".jpg", delete=False)
-    img.save(tmp.name, "JPEG", quality=70)
-    return tmp.name, "image/jpeg", True
+def upload_job(creds, ep_num, video_id, thumb_path, prepared_future, quota):
+    """Thread-pool worker: wait for the pre-encoded media, then upload it.
 
+    The call's quota units were reserved when the job was queued; if the
+    API reports the quota gone before this job runs, the reservation is
+    released and the episode is deferred instead of attempted.
 
-def upload_thumbnail(youtube, video_id, thumbnail_path):
-    """Upload a thumbnail for a specific video, compressing if needed."""
-    upload_path, mimetype, compressed = prepare_thumbnail(thumbnail_path)
+    Returns (ep_num, status, latency_seconds, message, response) with
+    status "ok", "failed" or "deferred".
+    """
+    if quota.halted.is_set():
+        quota.release("thumbnails.set")
+        return ep_num, "deferred", None, "Daily quota exhausted", None
     try:
-        if compressed:
-            new_size_kb = os.path.getsize(upload_path) / 1024
-            print(f"  [compress] PNG→JPEG ({new_size_kb:.0f} KB)")
-        media = MediaFileUpload(upload_path, mimetype=mimetype)
-        response = youtube.thumbnails().set(
-            videoId=video_id,
-            media_body=media,
+        prepared = prepared_future.result()
+        size, compressed = prepared[2], prepared[3]
+        youtube = youtube_api.thread_service(creds, YOUTUBE_API_BASE_URL)
+        start = time.perf_counter()
+        response = upload_thumbnail(youtube, video_id, thumb_path, prepared)
+        latency = time.perf_counter() - start
+        note = f" [compressed →JPEG {size / 1024:.0f} KB]" if compressed else ""
+        return ep_num, "ok", latency, describe_response(response) + note, response
+    except Exception as e:
+        if is_quota_error(e):
+            quota.exhaust()
+            return ep_num, "deferred", None, f"Daily quota exhausted: {e}", None
+        return ep_num, "failed", None, str(e), None
+
+
+# ── Quota budget & resumable queue ──────────────────────────────────
+def quota_day():
+    return datetime.now(QUOTA_TZ).strftime("%Y-%m-%d")
+
+
+class QuotaExhausted(Exception):
+    """Today's quota budget can't cover the next API call."""
+
+
+class QuotaBudget:
+    """Units spent today against a daily budget, persisted to QUOTA_STATE.
+
+    Units are reserved before a call is made (so concurrent uploads can't
+    overshoot) and stay spent whether or not the call succeeds — the API
+    charges failed requests too. Thread-safe.
+    """
+
+    def __init__(self, budget, path=None):
+        self.budget = budget
+        self.path = path or QUOTA_STATE
+        self.lock = threading.Lock()
+        self.halted = threading.Event()  # the API itself reported the quota gone
+        self.day = quota_day()
+        self.spent = 0
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+            if state.get("day") == self.day:
+                self.spent = state.get("spent", 0)
+        except (OSError, ValueError):
+            pass
+
+    @property
+    def remaining(self):
+        return max(0, self.budget - self.spent)
+
+    def affordable(self, method):
+        """How many more `method` calls fit in today's budget."""
+        return self.remaining // QUOTA_COSTS[method]
+
+    def reserve(self, method):
+        """Claim the units for one call; False if that would exceed the budget."""
+        cost = QUOTA_COSTS[method]
+        with self.lock:
+            if self.halted.is_set() or self.spent + cost > self.budget:
+                return False
+            self.spent += cost
+            self._save()
+            return True
+
+    def charge(self, method):
+        """reserve(), raising QuotaExhausted when the budget is spent — the
+        `charge` hook for read calls that can't be deferred."""
+        if not self.reserve(method):
+            raise QuotaExhausted(f"daily quota budget spent ({self.spent}/{self.budget} units)")
+
+    def release(self, method):
+        """Return units reserved for a call that was never made."""
+        with self.lock:
+            self.spent = max(0, self.spent - QUOTA_COSTS[method])
+            self._save()
+
+    def exhaust(self):
+        """The API says the quota is gone (other clients share it) — stop."""
+        with self.lock:
+            self.halted.set()
+            self.spent = max(self.spent, self.budget)
+            self._save()
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"day": self.day, "spent": self.spent, "budget": self.budget}, f, indent=2)
+            f.write("\n")
+        os.replace(tmp, self.path)
+
+
+def load_upload_queue():
+    try:
+        with open(UPLOAD_QUEUE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def queued_uploads(saved):
+    """{episode: (video_id, force)} from a saved queue. Older queue files
+    carry a single top-level force flag instead of one per item."""
+    default = saved.get("force", False)
+    return {item["episode"]: (item["video_id"], item.get("force", default)) for item in saved["queue"]}
+
+
+def update_upload_queue(deferred, forced, done=()):
+    """Merge `deferred` [(episode, video_id)] into the queue on disk and drop
+    the episodes in `done` — uploaded, or no longer needing an upload.
+
+    Each item keeps its own force flag (set for episodes in `forced`), so a
+    forced upload queued today doesn't force every other queued episode.
+    The file is only written when the queue changes, and deleted once empty.
+    """
+    saved = load_upload_queue()
+    before = queued_uploads(saved) if saved else {}
+    queued = {ep: item for ep, item in before.items() if ep not in done}
+    for ep, video_id in deferred:
+        queued[ep] = (video_id, ep in forced or before.get(ep, (None, False))[1])
+    if queued == before:
+        return
+    if not queued:
+        if os.path.exists(UPLOAD_QUEUE):
+            os.remove(UPLOAD_QUEUE)
+        return
+    tmp = UPLOAD_QUEUE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({
+            "saved_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "queue": [{"episode": ep, "video_id": video_id, "force": force}
+                      for ep, (video_id, force) in sorted(queued.items())],
+        }, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, UPLOAD_QUEUE)
+
+
+# ── Upload manifest ─────────────────────────────────────────────────
+def load_upload_manifest():
+    try:
+        with open(UPLOAD_MANIFEST) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_upload_manifest(manifest):
+    tmp = UPLOAD_MANIFEST + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, UPLOAD_MANIFEST)
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def sync_status(video_id, thumb_path, manifest):
+    """Compare a local artifact against what was last uploaded.
+
+    Returns (status, sha256) with status "new", "changed" or "unchanged".
+    Files whose name, size and mtime match the manifest are not read at all
+    (sha256 is then None). A file that was rewritten with the same bytes
+    has its entry's name, size and mtime refreshed in `manifest`, so the
+    next run takes the fast path again; the caller saves the manifest.
+    """
+    entry = manifest.get(video_id)
+    st = os.stat(thumb_path)
+    if entry is None:
+        return "new", file_sha256(thumb_path)
+    if (entry.get("file") == os.path.basename(thumb_path)
+            and entry.get("size") == st.st_size
+            and entry.get("mtime_ns") == st.st_mtime_ns):
+        return "unchanged", None
+    digest = file_sha256(thumb_path)
+    if entry.get("sha256") != digest:
+        return "changed", digest
+    entry.update(file=os.path.basename(thumb_path), size=st.st_size, mtime_ns=st.st_mtime_ns)
+    return "unchanged", digest
+
+
+def record_upload(manifest, video_id, ep_num, thumb_path, digest, response):
+    st = os.stat(thumb_path)
+    manifest[video_id] = {
+        "episode": ep_num,
+        "file": os.path.basename(thumb_path),
+        "sha256": digest or file_sha256(thumb_path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "uploaded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "response": response,
+    }
+
+
+# ── Verify ──────────────────────────────────────────────────────────
+VIDEOS_BATCH = 50  # videos.list accepts up to 50 ids per call
+COMPARE_SIZE = (320, 180)  # the "medium" rendition — 16:9, no letterbox bars
+MISMATCH_THRESHOLD = 12  # mean per-pixel difference (0-255) above which images differ
+
+
+def fetch_remote_thumbnails(youtube, video_ids, charge):
+    """Yield (batch, {video ID: snippet.thumbnails}) per videos.list call of
+    up to VIDEOS_BATCH ids; videos that no longer exist are left out."""
+    ids = list(video_ids)
+    for i in range(0, len(ids), VIDEOS_BATCH):
+        batch = ids[i:i + VIDEOS_BATCH]
+        charge("videos.list")
+        response = youtube.videos().list(
+            part="snippet", id=",".join(batch), maxResults=VIDEOS_BATCH
         ).execute()
-        return response
-    finally:
-        if compressed and os.path.exists(upload_path):
-            os.unlink(upload_path)
+        yield batch, {item["id"]: item["snippet"].get("thumbnails", {})
+                      for item in response.get("items", [])}
+
+
+def image_difference(remote_url, local_path, session):
+    """Mean per-pixel difference between the served rendition and the local
+    artifact, both reduced to COMPARE_SIZE greyscale."""
+    from PIL import Image, ImageChops, ImageStat
+    resp = session.get(remote_url, timeout=30)
+    resp.raise_for_status()
+    with Image.open(BytesIO(resp.content)) as remote:
+        remote = remote.convert("L").resize(COMPARE_SIZE, Image.BILINEAR)
+    with Image.open(local_path) as local:
+        local.draft("L", COMPARE_SIZE)
+        local = local.convert("L").resize(COMPARE_SIZE, Image.BILINEAR)
+    return ImageStat.Stat(ImageChops.difference(remote, local)).mean[0]
+
+
+def verify_episode(ep_num, video_id, thumbs, manifest, session):
+    """List of problems for one episode (empty if it checks out)."""
+    import requests
+    if thumbs is None:
+        return ["video not found (deleted or private?)"]
+    problems = []
+    thumb_path = thumbnail_file(ep_num)
+    diff = None
+    if "medium" in thumbs:
+        try:
+            diff = image_difference(thumbs["medium"]["url"], thumb_path, session)
+        except (requests.RequestException, OSError) as e:
+            problems.append(f"couldn't compare remote image: {e}")
+    else:
+        problems.append("no rendition to compare")
+    matches = diff is not None and diff <= MISMATCH_THRESHOLD
+
+    if video_id not in manifest:
+        # The API has no "is custom" flag: a video this tool never set a
+        # thumbnail on, whose image doesn't match ours, is presumed to be
+        # showing YouTube's auto-generated frame. Without a comparison
+        # there's nothing to presume.
+        if diff is None:
+            problems.append("missing from the upload manifest")
+        elif matches:
+            problems.append("matches local, but missing from the upload manifest")
+        else:
+            problems.append("no custom thumbnail")
+    else:
+        if sync_status(video_id, thumb_path, manifest)[0] != "unchanged":
+            problems.append("local artifact changed since upload")
+        if diff is not None and not matches:
+            problems.append(f"remote image differs from local (Δ{diff:.0f})")
+    if "maxres" not in thumbs:
+        problems.append("no maxres rendition")
+    return problems
+
+
+def verify(youtube, episodes, quota, jobs=4):
+    """Report per-episode problems; returns the number of flagged episodes
+    plus any left unchecked because the quota budget ran out."""
+    manifest = load_upload_manifest()
+    calls = -(-len(episodes) // VIDEOS_BATCH)
+    print(f"Verifying {len(episodes)} videos ({calls} videos.list call(s))")
+    print()
+
+    remote = {}
+    fetched = set()
+    try:
+        for batch, found in fetch_remote_thumbnails(youtube, episodes.values(), quota.charge):
+            fetched.update(batch)
+            remote.update(found)
+    except QuotaExhausted:
+        pass
+    unchecked = sorted(ep_num for ep_num, video_id in episodes.items() if video_id not in fetched)
+    episodes = {ep_num: video_id for ep_num, video_id in episodes.items() if video_id in fetched}
+
+    import requests
+    session = requests.Session()
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        results = {
+            ep_num: pool.submit(verify_episode, ep_num, video_id,
+                                remote.get(video_id), manifest, session)
+            for ep_num, video_id in episodes.items()
+        }
+    flagged = 0
+    for ep_num in sorted(results):
+        problems = results[ep_num].result()
+        if problems:
+            flagged += 1
+            print(f"  [MISMATCH] ep-{ep_num} → {episodes[ep_num]}: {'; '.join(problems)}")
+        else:
+            print(f"  [ok] ep-{ep_num} → {episodes[ep_num]}")
+    print()
+    print(f"{len(episodes) - flagged}/{len(episodes)} verified, {flagged} flagged")
+    if unchecked:
+        print(f"Quota budget spent ({quota.spent}/{quota.budget} units) — "
+              f"{len(unchecked)} episode(s) not checked; re-run tomorrow.")
+    return flagged + len(unchecked)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Upload QE thumbnails to YouTube")
     parser.add_argument("--dry-run", action="store_true", help="Preview without uploading")
-    parser.add_argument("--episode", type=str, help="Upload a single episode (e.g. '05' or '00-teaser')")
+    parser.add_argument("--episode", type=str,
+                        help="Episode or selection expression (e.g. '05', '00-teaser', '20-,tag:ai')")
+    add_selection_arguments(parser, missing_output=False)
+    parser.add_argument("--jobs", type=int, default=1, help="Concurrent uploads (default: 1)")
+    parser.add_argument("--force", action="store_true", help="Upload even if unchanged since the last upload")
+    parser.add_argument("--quota-budget", type=int, default=DAILY_QUOTA,
+                        help=f"Daily API quota units this script may spend (default: {DAILY_QUOTA})")
+    parser.add_argument("--resume", action="store_true", help="Continue the queue left by a quota-stopped run")
+    parser.add_argument("--refresh-index", action="store_true",
+                        help="Re-page the whole uploads playlist instead of fetching only new videos")
+    parser.add_argument("--verify", action="store_true",
+                        help="Compare the thumbnails YouTube serves against local artifacts and the manifest")
+    parser.add_argument("--base-url", default=YOUTUBE_API_BASE_URL,
+                        help="YouTube Data API base URL (default: $YOUTUBE_API_BASE_URL or Google's)")
     args = parser.parse_args()
+    if args.base_url:
+        use_api(args.base_url)
+        print(f"API: {args.base_url}")
+    quota = QuotaBudget(args.quota_budget)
+    creds = None
 
     # Determine which episodes to process
-    if args.episode:
-        if args.episode not in EPISODE_MAP:
-            print(f"ERROR: Episode '{args.episode}' not found in map.")
-            print(f"Valid episodes: {', '.join(sorted(EPISODE_MAP.keys()))}")
-            sys.exit(1)
-        episodes = {args.episode: EPISODE_MAP[args.episode]}
+    if args.resume:
+        saved = load_upload_queue()
+        if not saved:
+            print(f"Nothing to resume ({UPLOAD_QUEUE} not found).")
+            return
+        queue = queued_uploads(saved)
+        episodes = {ep: video_id for ep, (video_id, _) in queue.items()}
+        forced = {ep for ep, (_, force) in queue.items() if force or args.force}
+        print(f"Resuming {len(episodes)} queued upload(s) from {saved['saved_at']}")
+        dropped = {num for num in episodes if not thumbnail_file(num)}
+        if dropped:
+            print(f"[skip] Thumbnail file gone for queued episode(s): {', '.join(sorted(dropped))} "
+                  f"— dropping them from the queue")
+            for num in dropped:
+                del episodes[num]
     else:
-        episodes = EPISODE_MAP
-
-    # Verify all thumbnail files exist
-    missing = []
+        catalog = load_catalog()
+        try:
+            selected = select_episodes(catalog, args.episode, args)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        index = load_index(VIDEO_INDEX)
+        if args.dry_run and not (index or args.refresh_index or args.verify) and INDEX_SEED:
+            # A dry run never authenticates (a fresh clone has no index or credentials)
+            print("[index] WARNING: no cached index; previewing with the seed map (episodes up to 25). "
+                  "Run with --refresh-index to build it.")
+            index = seed_index(INDEX_SEED)
+        if args.refresh_index or args.verify or not (args.dry_run and index):
+            from googleapiclient.errors import HttpError
+            creds = get_credentials()
+            try:
+                index = refresh_index(get_authenticated_service(creds), catalog,
+                                      full=args.refresh_index, charge=quota.charge,
+                                      path=VIDEO_INDEX, seed=INDEX_SEED)
+            except (QuotaExhausted, RuntimeError, HttpError, OSError) as e:
+                fallback = "cached index" if index else "seed map (episodes up to 25)"
+                index = index or seed_index(INDEX_SEED)
+                if not index:
+                    print(f"ERROR: Can't build the episode index: {e}")
+                    sys.exit(1)
+                print(f"[index] WARNING: refresh failed ({e}); using the {fallback}")
+        video_ids = index["episodes"]
+
+        single = catalog.get(args.episode) if args.episode else None
+        if single:
+            num = single["num"]
+            if num not in video_ids:
+                print(f"ERROR: No video found for episode '{num}'.")
+                print(f"Matched episodes: {', '.join(sorted(video_ids))}")
+                sys.exit(1)
+            if not thumbnail_file(num):
+                print(f"ERROR: Missing thumbnail file for episode {num}")
+                sys.exit(1)
+            episodes = {num: video_ids[num]}
+        else:
+            nums = [ep["num"] for ep in selected]
+            unmatched = [num for num in nums if num not in video_ids]
+            if unmatched:
+                print(f"[index] No video found for episode(s): {', '.join(unmatched)}")
+            missing = [num for num in nums if num in video_ids and not thumbnail_file(num)]
+            if missing:
+                print(f"[skip] No thumbnail file yet for episode(s): {', '.join(missing)}")
+            episodes = {num: video_ids[num] for num in nums
+                        if num in video_ids and num not in missing}
+        forced = set(episodes) if args.force else set()
+        dropped = set()
+
+    if args.verify:
+        creds = creds or get_credentials()
+        flagged = verify(get_authenticated_service(creds), episodes, quota, args.jobs)
+        sys.exit(1 if flagged else 0)
+
+    # Delta sync: only new or changed artifacts go up unless --force
+    manifest = load_upload_manifest()
+    statuses = {}
+    digests = {}
     for ep_num, video_id in episodes.items():
-        thumb_path = os.path.join(THUMBNAIL_DIR, f"ep-{ep_num}-thumbnail.png")
-        if not os.path.exists(thumb_path):
-            missing.append(ep_num)
-
-    if missing:
-        print(f"ERROR: Missing thumbnail files for episodes: {', '.join(missing)}")
-        sys.exit(1)
-
-    print(f"{'[DRY RUN] ' if args.dry_run else ''}Uploading {len(episodes)} thumbnails to YouTube")
+        statuses[ep_num], digests[ep_num] = sync_status(video_id, thumbnail_file(ep_num), manifest)
+    if not args.dry_run and any(statuses[e] == "unchanged" and digests[e] for e in episodes):
+        save_upload_manifest(manifest)  # stat fields refreshed for re-rendered, identical files
+    to_upload = {
+        ep_num: video_id for ep_num, video_id in episodes.items()
+        if ep_num in forced or statuses[ep_num] != "unchanged"
+    }
+    unchanged = len(episodes) - sum(1 for e in episodes if statuses[e] != "unchanged")
+
+    print(f"{'[DRY RUN] ' if args.dry_run else ''}Uploading {len(to_upload)} of {len(episodes)} thumbnails to YouTube"
+          f" ({unchanged} unchanged{f', {len(forced)} forced' if forced else ''})")
     print(f"Thumbnail dir: {THUMBNAIL_DIR}")
     print()
 
+    cost = QUOTA_COSTS["thumbnails.set"]
+    print(f"Quota: {len(to_upload) * cost} units needed, {quota.remaining}/{quota.budget} left today"
+          f" ({quota.affordable('thumbnails.set')} uploads)")
+    print()
+
     if args.dry_run:
         for ep_num, video_id in sorted(episodes.items()):
-            thumb_path = os.path.join(THUMBNAIL_DIR, f"ep-{ep_num}-thumbnail.png")
+            thumb_path = thumbnail_file(ep_num)
             size_mb = os.path.getsize(thumb_path) / (1024 * 1024)
-            print(f"  ep-{ep_num} → {video_id}  ({size_mb:.1f} MB)")
+            action = "upload" if ep_num in to_upload else "skip"
+            print(f"  ep-{ep_num} → {video_id}  ({size_mb:.1f} MB)  {statuses[ep_num]:<9} [{action}]")
         print()
         print("Re-run without --dry-run to upload.")
         return
 
-    # Authenticate
-    youtube = get_authenticated_service()
+    if not to_upload:
+        print("Nothing to upload — every thumbnail matches the last upload. Use --force to re-upload.")
+        if args.resume:
+            update_upload_queue([], forced, done=set(episodes) | dropped)
+        return
+    # A resumed episode that no longer needs uploading leaves the queue
+    settled = dropped | {ep for ep in episodes if ep not in to_upload} if args.resume else set()
+    episodes = to_upload
+    ordered = sorted(episodes.items())
+
+    # Claim quota up front, in order; whatever doesn't fit today is queued
+    scheduled = []
+    for ep_num, video_id in ordered:
+        if not quota.reserve("thumbnails.set"):
+            break
+        scheduled.append((ep_num, video_id))
+    deferred = ordered[len(scheduled):]
+    if not scheduled:
+        update_upload_queue(deferred, forced, done=settled)
+        print(f"Daily quota budget spent ({quota.spent}/{quota.budget} units). "
+              f"Queued {len(deferred)} upload(s) — run with --resume after midnight PT.")
+        return
+
+    # Authenticate once; each upload thread builds its own client from these
+    creds = creds or get_credentials()
+    jobs = max(1, args.jobs)
 
-    # Upload
+    # Upload — encoding runs on its own thread, ahead of the uploads, so
+    # compressing episode N+1 overlaps with uploading episode N
     succeeded = []
     failed = []
-
-    for ep_num, video_id in sorted(episodes.items()):
-        thumb_path = os.path.join(THUMBNAIL_DIR, f"ep-{ep_num}-thumbnail.png")
-        size_mb = os.path.getsize(thumb_path) / (1024 * 1024)
-        print(f"[{len(succeeded) + len(failed) + 1}/{len(episodes)}] ep-{ep_num} → {video_id} ({size_mb:.1f} MB)")
-
-        try:
-            response = upload_thumbnail(youtube, video_id, thumb_path)
-            items = response.get("items", [])
-            if items:
-                res = items[0].get("maxres") or items[0].get("high") or items[0].get("default", {})
-                print(f"  [ok] {res.get('width', '?')}x{res.get('height', '?')}")
+    latencies = []
+    wall_start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=1) as prep_pool, \
+            ThreadPoolExecutor(max_workers=jobs) as upload_pool:
+        futures = {}
+        for ep_num, video_id in scheduled:
+            thumb_path = thumbnail_file(ep_num)
+            prepared = prep_pool.submit(prepare_thumbnail, thumb_path)
+            future = upload_pool.submit(upload_job, creds, ep_num, video_id, thumb_path, prepared, quota)
+            futures[future] = (video_id, thumb_path)
+
+        for done, future in enumerate(as_completed(futures), 1):
+            ep_num, status, latency, message, response = future.result()
+            video_id, thumb_path = futures[future]
+            size_mb = os.path.getsize(thumb_path) / (1024 * 1024)
+            print(f"[{done}/{len(scheduled)}] ep-{ep_num} → {video_id} ({size_mb:.1f} MB)")
+            if status == "deferred":
+                print(f"  [deferred] {message}")
+                deferred.append((ep_num, video_id))
+            elif status == "ok":
+                print(f"  [ok] {message} in {latency:.2f}s")
+                succeeded.append(ep_num)
+                latencies.append(latency)
+                record_upload(manifest, video_id, ep_num, thumb_path, digests[ep_num], response)
+                save_upload_manifest(manifest)
             else:
-                print(f"  [ok] Thumbnail set (no resolution info returned)")
-            succeeded.append(ep_num)
-        except Exception as e:
-            print(f"  [FAILED] {e}")
-            failed.append(ep_num)
+                print(f"  [FAILED] {message}")
+                failed.append(ep_num)
+            sys.stdout.flush()
+
+    wall = time.perf_counter() - wall_start
+    deferred.sort()
+    # Failed uploads stay queued (a --resume retries them); successes leave it
+    update_upload_queue(deferred, forced, done=settled | set(succeeded))
 
     print()
     print("=" * 50)
     print(f"Done! {len(succeeded)}/{len(episodes)} uploaded successfully.")
     if failed:
-        print(f"Failed: {', '.join(failed)}")
+        print(f"Failed: {', '.join(sorted(failed))}")
+    print(f"Quota: {quota.spent}/{quota.budget} units spent today")
+    if deferred:
+        print(f"Stopped before the daily quota ran out — {len(deferred)} upload(s) queued in "
+              f"{os.path.basename(UPLOAD_QUEUE)}. Run with --resume after midnight PT.")
+    if latencies:
+        latencies.sort()
+        print(f"Upload latency: median {latencies[len(latencies) // 2]:.2f}s, "
+              f"max {latencies[-1]:.2f}s ({wall:.1f}s wall, {jobs} job(s))")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,226 @@
+"""
+Cached episode → YouTube video ID index for upload-youtube-thumbnails.py.
+
+The channel's uploads playlist is paged with playlistItems.list (50 items
+per call, 1 quota unit each) and every video title is matched against the
+episode catalog. The hand-maintained map this replaced is kept as
+SEED_EPISODES: a matched video overrides it, but an episode whose video
+title no longer matches keeps its seeded video, and with no cached index
+and no API (quota gone, outage) the seed alone is enough to upload
+episodes 00-teaser..25.
+
+The index is cached in .cache/video-index.json:
+  {
+    "playlist_id": "UU...",             # the channel's uploads playlist
+    "etag":        "...",               # ETag of the newest page
+    "watermark":   "2026-...Z",          # newest snippet.publishedAt seen
+    "videos":      {video_id: {"title", "published_at"}},
+    "episodes":    {episode_num: video_id},
+  }
+
+Refreshes are incremental. The first page is requested with If-None-Match,
+so an unchanged playlist costs one call and returns nothing. Otherwise,
+because the uploads playlist lists newest first, paging stops at the first
+item at or before the watermark. Only new uploads are fetched.
+"""
+
+import os
+import re
+import json
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_PATH = os.path.join(BASE_DIR, ".cache", "video-index.json")
+PAGE_SIZE = 50  # playlistItems.list maximum
+
+# Built from catalog.json (title → old_id) + progress.json (old_id → new_id)
+SEED_EPISODES = {
+    "00-teaser": "84IrxXcTkbE",
+    "01": "Ad-Fi8eo1jA",
+    "02": "GQ6_WqnxNw8",
+    "03": "m6KWYdR7Ozw",
+    "04": "0nGMyzONKh8",
+    "05": "WRQzzGMeDXc",
+    "06": "c9Fw6CFKYGk",
+    "07": "dUjbOhMygDY",
+    "08": "7bTO55moAmg",
+    "09": "hC-Xo2VSoUE",
+    "10": "9dA2Nk8ActY",
+    "11": "6d4x44EkAHw",
+    "12": "KWbMnB4LoW8",
+    "13": "UIcrNaX1Az8",
+    "14": "ZXudfbtqJDs",
+    "15": "RHhSHr8uIFo",
+    "16": "IzAkfYn-HCY",
+    "17": "dMoh3U7qH6I",
+    "18": "v8iND36k2yg",
+    "19": "dgj_i6Xxp_g",
+    "20": "-yc1jUYC--E",
+    "21": "pL7BVSrZk4o",
+    "22": "oQrQBDIuJbE",
+    "23": "iTzcu-JU8Mk",
+    "24": "jlvBbn-nwZc",
+    "25": "Bmee2V1BdDs",
+}
+
+# "Ep 27", "Ep. 5", "Episode 12", "#3"
+EPISODE_NUMBER = re.compile(r"\b(?:ep(?:isode)?\.?\s*|#)0*(\d{1,3})\b", re.IGNORECASE)
+
+
+def normalize(text):
+    """Case- and punctuation-insensitive form of a title for matching."""
+    return re.sub(r"[^a-z0-9]+", " ", text.casefold()).strip()
+
+
+def match_episode(video_title, catalog):
+    """Episode number for a video title, or None.
+
+    The catalog title appearing in the video title wins; the longest match
+    is taken, so a short title can't shadow one that contains it. Failing
+    that, an explicit "Ep 27" / "Episode 27" / "#27" is used if the
+    catalog has that episode.
+    """
+    title = f" {normalize(video_title)} "
+    best = None
+    for ep in catalog:
+        needle = normalize(ep["title"])
+        if needle and f" {needle} " in title and (best is None or len(needle) > best[0]):
+            best = (len(needle), ep["num"])
+    if best:
+        return best[1]
+
+    nums = {ep["num"] for ep in catalog}
+    for m in EPISODE_NUMBER.finditer(video_title):
+        num = m.group(1).zfill(2)
+        if num in nums:
+            return num
+    return None
+
+
+def match_all(videos, catalog):
+    """Map episode → video ID. A re-uploaded episode resolves to its newest video.
+
+    Returns (episodes, duplicates) where duplicates lists the episodes that
+    matched more than one video.
+    """
+    episodes = {}
+    published = {}
+    duplicates = set()
+    for video_id, info in videos.items():
+        num = match_episode(info["title"], catalog)
+        if num is None:
+            continue
+        if num in episodes:
+            duplicates.add(num)
+            if info["published_at"] <= published[num]:
+                continue
+        episodes[num] = video_id
+        published[num] = info["published_at"]
+    return episodes, sorted(duplicates)
+
+
+def seed_index(seed=SEED_EPISODES):
+    """An index holding only `seed`, for when the API can't be reached; None
+    without a seed."""
+    if not seed:
+        return None
+    return {"playlist_id": None, "etag": None, "watermark": "", "videos": {}, "episodes": dict(seed)}
+
+
+def load_index(path=INDEX_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_index(index, path=INDEX_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def uploads_playlist(youtube):
+    """ID of the authenticated channel's uploads playlist."""
+    response = youtube.channels().list(part="contentDetails", mine=True).execute()
+    items = response.get("items", [])
+    if not items:
+        raise RuntimeError("No YouTube channel found for these credentials")
+    return items[0]["contentDetails"]["relatedPlaylists"]["uploads"]
+
+
+def refresh_index(youtube, catalog, full=False, charge=None, log=print, path=INDEX_PATH,
+                  seed=SEED_EPISODES):
+    """Bring the cached index up to date and return it.
+
+    `full` ignores the cache and re-pages the whole playlist. `charge(method)`
+    is called once before every API call, for quota accounting. Episodes in
+    `seed` that no video matches keep their seeded video ID.
+
+    API errors other than 304 Not Modified propagate and leave the cache
+    untouched; callers fall back to load_index() or seed_index().
+    """
+    from googleapiclient.errors import HttpError
+
+    charge = charge or (lambda method: None)
+    cached = None if full else load_index(path)
+    index = cached or {"playlist_id": None, "etag": None, "watermark": "", "videos": {}}
+
+    if not index["playlist_id"]:
+        charge("channels.list")
+        index["playlist_id"] = uploads_playlist(youtube)
+
+    new_videos = {}
+    newest = index["watermark"]
+    page_token = None
+    calls = 0
+    while True:
+        request = youtube.playlistItems().list(
+            part="snippet",
+            playlistId=index["playlist_id"],
+            maxResults=PAGE_SIZE,
+            pageToken=page_token,
+        )
+        if page_token is None and cached and index.get("etag"):
+            request.headers["If-None-Match"] = index["etag"]
+        charge("playlistItems.list")
+        calls += 1
+        try:
+            response = request.execute()
+        except HttpError as e:
+            if e.resp.status == 304:
+                log(f"[index] Uploads playlist unchanged (ETag), {len(index['videos'])} videos cached")
+                break
+            raise
+        if page_token is None:
+            index["etag"] = response.get("etag")
+
+        reached_watermark = False
+        for item in response.get("items", []):
+            snippet = item["snippet"]
+            published_at = snippet.get("publishedAt", "")
+            if cached and index["watermark"] and published_at <= index["watermark"]:
+                reached_watermark = True
+                break
+            new_videos[snippet["resourceId"]["videoId"]] = {
+                "title": snippet.get("title", ""),
+                "published_at": published_at,
+            }
+            newest = max(newest, published_at)
+
+        page_token = response.get("nextPageToken")
+        if reached_watermark or not page_token:
+            log(f"[index] {len(new_videos)} new video(s) in {calls} playlistItems.list call(s)")
+            break
+
+    index["videos"].update(new_videos)
+    index["watermark"] = newest
+    matched, duplicates = match_all(index["videos"], catalog)
+    index["episodes"] = {**(seed or {}), **matched}
+    if duplicates:
+        log(f"[index] Several videos match episode(s) {', '.join(duplicates)} — using the newest")
+    save_index(index, path)
+    return index